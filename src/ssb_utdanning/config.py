@@ -10,6 +10,19 @@ MOCKING (bool): Whether the application is running in mocking mode.
 
 DATETIME_FORMAT (str): The datetime format used in filenames.
 
+FORMAT_CACHE_MAXSIZE (int): Default max number of looked up keys a cached UtdFormat remembers.
+FORMAT_REGISTRY_MAXSIZE (int): Max number of parsed format-files get_format keeps in memory.
+FORMAT_COLUMNAR_MIN_KEYS (int): Formats with at least this many keys are also stored as columnar files by store_format_prod.
+
+SAS_PARQUET_CACHE_DIR (str): Folder to cache typed parquet-copies of the sas7bdat-files UtdData reads in. Empty turns the cache off.
+SAS_PARQUET_CACHE_MAX_BYTES (int): Max size of the sas-cache, the least recently used copies are evicted first.
+DATA_COMPACT_MIN_BYTES (int): UtdData compacts the dtypes of data it loads that takes at least this many bytes in memory. 0 turns it off.
+
+PARQUET_COMPRESSION (str): Compression codec UtdData.save writes parquet-files with.
+PARQUET_COMPRESSION_LEVEL (int | None): Compression level UtdData.save uses, None for the default of the codec.
+PARQUET_ROW_GROUP_SIZE (int): Max rows per row group UtdData.save writes, smaller row groups let filtered reads skip more.
+PARQUET_DICTIONARY_MAX_SHARE (float): UtdData.save dictionary-encodes the columns with at most this share of distinct values.
+
 PROD_FORMATS_PATH (str): The path to the production formats.
 """
 
@@ -26,6 +39,19 @@ MOCKING = False
 DATETIME_FORMAT = "%Y-%m-%dT%H-%M-%S"
 DEFAULT_DATE = datetime.datetime(2020, 1, 1)
 
+FORMAT_CACHE_MAXSIZE = 100_000
+FORMAT_REGISTRY_MAXSIZE = 256
+FORMAT_COLUMNAR_MIN_KEYS = 50_000
+
+SAS_PARQUET_CACHE_DIR = os.environ.get("SSB_UTDANNING_SAS_CACHE_DIR", "")
+SAS_PARQUET_CACHE_MAX_BYTES = 20 * 1024**3
+DATA_COMPACT_MIN_BYTES = 0
+
+PARQUET_COMPRESSION = "zstd"
+PARQUET_COMPRESSION_LEVEL: int | None = None
+PARQUET_ROW_GROUP_SIZE = 100_000
+PARQUET_DICTIONARY_MAX_SHARE = 0.5
+
 FOUR_DIGITS = ("[0-9]") * 4
 TWO_DIGITS = ("[0-9]") * 2
 
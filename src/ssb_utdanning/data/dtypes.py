@@ -7,7 +7,16 @@ Downcasts ints to smalles size. Changes possible columns to categoricals.
 import json
 
 import gcsfs
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+INTEGER_DTYPES = ("int8", "int16", "int32", "int64")
+# Rows sampled first, when judging if a long text-column has few enough distinct values to be a categorical
+_SAMPLE_SIZE = 10_000
+# Columns whose sample has more than this share of distinct values are taken to have mostly distinct values
+_SAMPLE_MAX_SHARE = 0.9
 
 
 def dtype_store_json(
@@ -62,3 +71,163 @@ def dtype_apply_from_json(
             df[col] = df[col].astype(dtypes["secondary_dtype"])
         df[col] = df[col].astype(dtypes["dtype"])
     return df
+
+
+def suggest_dtype(ser: pd.Series, categorical_max_share: float = 0.5) -> str:
+    """Suggests a smaller dtype for a column, keeping the values as they are.
+
+    Integers get the smallest integer dtype their values fit in, nullable integers stay nullable.
+    Text-columns with few distinct values, compared to their length, become categoricals.
+    Long columns are judged from a random sample first, and are not counted in full if the sample is nearly all distinct values,
+    so columns just under the share of distinct values can keep their dtype.
+    Other text-columns of digits, where some start with a zero, become Arrow-backed strings,
+    which hold the digits in a fraction of the memory of python objects, without losing the zeros.
+    Other columns keep their dtype.
+
+    Args:
+        ser (pd.Series): The column to suggest a dtype for.
+        categorical_max_share (float): Text-columns with at most this share of distinct values become categoricals.
+            Defaults to 0.5.
+
+    Returns:
+        str: The suggested dtype, which is the current one if no smaller one was found.
+    """
+    dtype = ser.dtype
+    if isinstance(dtype, pd.ArrowDtype | pd.CategoricalDtype):
+        return str(dtype)
+    if pd.api.types.is_integer_dtype(dtype):
+        if not ser.notna().any():
+            return str(dtype)
+        nullable = isinstance(dtype, pd.api.extensions.ExtensionDtype)
+        lowest, highest = ser.min(), ser.max()
+        for integer_dtype in INTEGER_DTYPES:
+            info = np.iinfo(integer_dtype)
+            if info.min <= lowest and highest <= info.max:
+                return integer_dtype.capitalize() if nullable else integer_dtype
+        return str(dtype)
+    if pd.api.types.is_object_dtype(dtype) or isinstance(dtype, pd.StringDtype):
+        if pd.api.types.infer_dtype(ser, skipna=True) != "string":
+            return str(dtype)
+        if _few_distinct(ser, categorical_max_share):
+            return "category"
+        if pd.api.types.is_object_dtype(dtype):
+            texts = pa.array(ser, from_pandas=True, type=pa.string())
+            if (
+                pc.all(pc.match_substring_regex(texts, "^[0-9]+$")).as_py()
+                and pc.any(pc.starts_with(texts, "0")).as_py()
+            ):
+                return "string[pyarrow]"
+    return str(dtype)
+
+
+def memory_report(df: pd.DataFrame, categorical_max_share: float = 0.5) -> pd.DataFrame:
+    """Reports what every column of a dataframe costs in memory, and the dtype suggest_dtype would give it.
+
+    Args:
+        df (pd.DataFrame): The dataframe to report on.
+        categorical_max_share (float): Passed on to suggest_dtype.
+
+    Returns:
+        pd.DataFrame: A row per column, with the dtype, the bytes including the python objects,
+            the number of distinct values (missing for columns of unhashable objects), and the suggested dtype. Sorted by bytes, largest first.
+    """
+    report = pd.DataFrame(
+        {
+            "dtype": df.dtypes.astype(str),
+            "bytes": df.memory_usage(deep=True, index=False),
+            "cardinality": pd.array(
+                [_cardinality(df[col]) for col in df.columns], dtype="Int64"
+            ),
+            "suggested_dtype": [
+                suggest_dtype(df[col], categorical_max_share) for col in df.columns
+            ],
+        },
+        index=df.columns,
+    )
+    return report.sort_values("bytes", ascending=False)
+
+
+def compact_dtypes(
+    df: pd.DataFrame, categorical_max_share: float = 0.5
+) -> pd.DataFrame:
+    """Changes the columns of a dataframe to the dtypes suggest_dtype gives them.
+
+    Args:
+        df (pd.DataFrame): The dataframe to compact, it is not changed.
+        categorical_max_share (float): Passed on to suggest_dtype.
+
+    Returns:
+        pd.DataFrame: The dataframe with the smaller dtypes, the columns that keep their dtype are not copied.
+    """
+    changes = {}
+    for col in df.columns:
+        suggested = suggest_dtype(df[col], categorical_max_share)
+        if suggested != str(df[col].dtype):
+            changes[col] = suggested
+    if not changes:
+        return df
+    # A shallow copy, so only the changed columns take up new memory
+    df = df.copy(deep=False)
+    for col, dtype in changes.items():
+        df[col] = df[col].astype(dtype)  # type: ignore[call-overload]
+    return df
+
+
+def low_cardinality_columns(df: pd.DataFrame, max_share: float = 0.5) -> list[str]:
+    """Finds the columns with few distinct values compared to their length, like the ones suggest_dtype makes categoricals.
+
+    Args:
+        df (pd.DataFrame): The dataframe to look through.
+        max_share (float): Columns with at most this share of distinct values are returned. Defaults to 0.5.
+
+    Returns:
+        list[str]: The names of the columns, categoricals are always included.
+    """
+    return [
+        str(col)
+        for col in df.columns
+        if isinstance(df[col].dtype, pd.CategoricalDtype)
+        or _few_distinct(df[col], max_share)
+    ]
+
+
+def _few_distinct(ser: pd.Series, max_share: float) -> bool:
+    """Checks if a column has at most a share of distinct values.
+
+    Counting the distinct values of long text-columns is slow, so a random sample of them is counted first.
+    If the sample is nearly all distinct values, the column is taken to have too many, without counting the rest.
+    The sample is random, as an evenly spread one would be all distinct values in a sorted column.
+
+    Args:
+        ser (pd.Series): The column.
+        max_share (float): The max share of distinct values.
+
+    Returns:
+        bool: True if the column has few distinct values, False also if the values can not be hashed.
+    """
+    if len(ser) > _SAMPLE_SIZE:
+        positions = np.random.default_rng(0).choice(
+            len(ser), _SAMPLE_SIZE, replace=False
+        )
+        sample_cardinality = _cardinality(ser.iloc[positions])
+        if sample_cardinality is None or sample_cardinality > _SAMPLE_SIZE * max(
+            max_share, _SAMPLE_MAX_SHARE
+        ):
+            return False
+    cardinality = _cardinality(ser)
+    return cardinality is not None and cardinality <= max_share * len(ser)
+
+
+def _cardinality(ser: pd.Series) -> int | None:
+    """Counts the distinct values in a column.
+
+    Args:
+        ser (pd.Series): The column.
+
+    Returns:
+        int | None: The number of distinct values, None if the values can not be hashed, like dicts.
+    """
+    try:
+        return int(ser.nunique())
+    except TypeError:
+        return None
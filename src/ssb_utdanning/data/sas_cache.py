@@ -0,0 +1,204 @@
+"""An opt-in cache of typed parquet-copies of sas7bdat-files, so the slow SAS-reader and auto_dtype only run once per file.
+
+Turn it on by setting SAS_PARQUET_CACHE_DIR in the config. The first time UtdData reads a sas7bdat-file,
+the typed data is written to the cache, and later reads of the same file read the parquet-copy instead.
+The copies are keyed by the absolute path, size and modification time of the sas7bdat-file,
+so a changed file is read again, and its old copy is dropped.
+The least recently used copies are evicted when the cache is larger than SAS_PARQUET_CACHE_MAX_BYTES.
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ssb_utdanning import config
+from ssb_utdanning import utdanning_logger
+
+# Key in the parquet-metadata of the copies, holding the path of the sas7bdat-file
+_SOURCE_METADATA_KEY = b"ssb_utdanning_sas_source"
+
+
+def cache_enabled() -> bool:
+    """Whether the cache is turned on, by setting SAS_PARQUET_CACHE_DIR in the config.
+
+    Returns:
+        bool: True if the cache is turned on.
+    """
+    return bool(config.SAS_PARQUET_CACHE_DIR)
+
+
+def cached_path(sas_path: str | Path) -> Path | None:
+    """Finds the parquet-copy of a sas7bdat-file in the cache, marking it as recently used.
+
+    Args:
+        sas_path (str | Path): The path to the sas7bdat-file.
+
+    Returns:
+        Path | None: The path to the parquet-copy, None if the cache is off or has no copy of the file as it is now.
+    """
+    if not cache_enabled():
+        return None
+    path = _copy_path(sas_path)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    utdanning_logger.logger.info("Reading %s from the cache at %s", sas_path, path)
+    return path
+
+
+def store_in_cache(sas_path: str | Path, df: pd.DataFrame) -> Path | None:
+    """Writes the typed data of a sas7bdat-file to the cache, dropping older copies of the file, and evicting if the cache is full.
+
+    Failing to write is logged as a warning, the cache is never needed to read the data.
+    Copies larger than SAS_PARQUET_CACHE_MAX_BYTES are not cached, as they would evict everything else, and then themselves.
+
+    Args:
+        sas_path (str | Path): The path to the sas7bdat-file the data was read from.
+        df (pd.DataFrame): All the data in the file, after auto_dtype.
+
+    Returns:
+        Path | None: The path to the parquet-copy, None if the cache is off, the copy could not be written, or is too large.
+    """
+    if not cache_enabled():
+        return None
+    path = _copy_path(sas_path)
+    try:
+        os.makedirs(path.parent, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata(
+            {
+                **(table.schema.metadata or {}),
+                _SOURCE_METADATA_KEY: str(os.path.abspath(sas_path)).encode(),
+            }
+        )
+        file_descriptor, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        os.close(file_descriptor)
+        try:
+            pq.write_table(table, temp_path)
+            size = os.path.getsize(temp_path)
+            if size <= config.SAS_PARQUET_CACHE_MAX_BYTES:
+                os.replace(temp_path, path)
+        finally:
+            # Left behind if writing failed, or the copy is too large to cache
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    except OSError as e:
+        utdanning_logger.logger.warning(
+            "Couldnt write %s to the sas-cache: %s", sas_path, str(e)
+        )
+        return None
+    # Copies of the file before it changed will never be read again
+    for old_copy in path.parent.glob(path.name.split("_")[0] + "_*.parquet"):
+        if old_copy != path:
+            old_copy.unlink(missing_ok=True)
+    if size > config.SAS_PARQUET_CACHE_MAX_BYTES:
+        utdanning_logger.logger.info(
+            "Not caching %s, the copy of %s bytes is larger than the whole sas-cache",
+            sas_path,
+            str(size),
+        )
+        return None
+    evict()
+    return path
+
+
+def evict(max_bytes: int | None = None) -> list[Path]:
+    """Removes the least recently used copies, until the cache is not larger than max_bytes.
+
+    Args:
+        max_bytes (int | None): The max size of the cache. Defaults to SAS_PARQUET_CACHE_MAX_BYTES from the config.
+
+    Returns:
+        list[Path]: The paths of the removed copies.
+    """
+    if max_bytes is None:
+        max_bytes = config.SAS_PARQUET_CACHE_MAX_BYTES
+    copies = _copies_by_last_use()
+    total = sum(size for _, size, _ in copies)
+    removed = []
+    for path, size, _ in copies:
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        removed.append(path)
+    if removed:
+        utdanning_logger.logger.info(
+            "Evicted %s files from the sas-cache", str(len(removed))
+        )
+    return removed
+
+
+def cache_info() -> pd.DataFrame:
+    """Lists the copies in the cache, the least recently used first.
+
+    Returns:
+        pd.DataFrame: The path, the sas7bdat-file it is a copy of, the size in bytes and when it was last used, of every copy.
+    """
+    rows = []
+    for path, size, last_used in _copies_by_last_use():
+        metadata = pq.read_schema(path).metadata or {}
+        rows.append(
+            {
+                "path": str(path),
+                "source": metadata.get(_SOURCE_METADATA_KEY, b"").decode(),
+                "size_bytes": size,
+                "last_used": pd.Timestamp(last_used, unit="ns"),
+            }
+        )
+    return pd.DataFrame(rows, columns=["path", "source", "size_bytes", "last_used"])
+
+
+def clear_cache() -> int:
+    """Removes all the copies in the cache.
+
+    Returns:
+        int: The number of copies removed.
+    """
+    copies = _copies_by_last_use()
+    for path, _, _ in copies:
+        path.unlink(missing_ok=True)
+    return len(copies)
+
+
+def _copy_path(sas_path: str | Path) -> Path:
+    """The path in the cache of the parquet-copy of a sas7bdat-file as it is now.
+
+    The name starts with a hash of the absolute path, and ends with a hash of the size and modification time.
+
+    Args:
+        sas_path (str | Path): The path to the sas7bdat-file.
+
+    Returns:
+        Path: The path of the copy, it might not exist.
+    """
+    absolute = os.path.abspath(sas_path)
+    stat = os.stat(absolute)
+    source_hash = hashlib.sha256(absolute.encode()).hexdigest()[:16]
+    version_hash = hashlib.sha256(
+        f"{stat.st_size}-{stat.st_mtime_ns}".encode()
+    ).hexdigest()[:16]
+    return Path(config.SAS_PARQUET_CACHE_DIR) / f"{source_hash}_{version_hash}.parquet"
+
+
+def _copies_by_last_use() -> list[tuple[Path, int, int]]:
+    """The copies in the cache, the least recently used first.
+
+    Returns:
+        list[tuple[Path, int, int]]: The path, size in bytes and last use in nanoseconds of every copy.
+    """
+    if not cache_enabled() or not os.path.isdir(config.SAS_PARQUET_CACHE_DIR):
+        return []
+    copies = []
+    with os.scandir(config.SAS_PARQUET_CACHE_DIR) as entries:
+        for entry in entries:
+            if entry.name.endswith(".parquet"):
+                stat = entry.stat()
+                copies.append((Path(entry.path), stat.st_size, stat.st_mtime_ns))
+    return sorted(copies, key=lambda copy: copy[2])
@@ -1,11 +1,19 @@
 import concurrent
 import enum
+from collections.abc import Iterator
+from collections.abc import Mapping
+from functools import lru_cache
 from io import StringIO
 from pathlib import Path
 from string import digits
+from typing import Any
+from typing import cast
 
 import dapla as dp
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 from cloudpathlib import GSPath
 from datadoc.backend.datadoc_metadata import DataDocMetadata
 from datadoc.backend.statistic_subject_mapping import StatisticSubjectMapping
@@ -14,9 +22,20 @@ from fagfunksjoner import auto_dtype
 
 from ssb_utdanning import config
 from ssb_utdanning import utdanning_logger
+from ssb_utdanning.data import sas_cache
+from ssb_utdanning.data.dtypes import compact_dtypes
+from ssb_utdanning.data.dtypes import low_cardinality_columns
+from ssb_utdanning.data.dtypes import memory_report
+from ssb_utdanning.paths import version_index
 from ssb_utdanning.paths import versioning
 from ssb_utdanning.paths.get_paths import get_path_dates
 from ssb_utdanning.paths.get_paths import get_path_latest
+from ssb_utdanning.paths.get_paths import get_paths
+
+# Row-filters like pyarrow takes them: a list of (column, operator, value), or a list of those lists, to OR them
+FILTERS_TYPE = list[tuple[str, str, Any]] | list[list[tuple[str, str, Any]]]
+# Rows read at a time from sas7bdat-files, when only some of the columns are kept
+_SAS_CHUNKSIZE = 100_000
 
 
 class OverwriteMode(enum.Enum):
@@ -33,6 +52,19 @@ class OverwriteMode(enum.Enum):
     NONE = ""
 
 
+class ReadEngine(enum.Enum):
+    """Enum for specifying how UtdData holds the data it reads.
+
+    Attributes:
+        pandas (str): Reads into the usual numpy-backed dtypes, with the strings as python objects.
+        arrow (str): Keeps the data in the Arrow-buffers it was read into, as pd.ArrowDtype columns,
+            which hold strings in a fraction of the memory, and can be handed on as a pyarrow.Table without a copy.
+    """
+
+    pandas = "pandas"
+    arrow = "arrow"
+
+
 class UtdData:
     """Manages loading, saving and access to metadata.
 
@@ -47,15 +79,27 @@ class UtdData:
     data management are critical.
 
     Attributes:
-        data (pd.DataFrame | None): The DataFrame loaded into the instance, either provided at initialization or loaded from the specified path.
+        data (pd.DataFrame): The DataFrame of the instance, either provided at initialization or loaded from the specified path
+            the first time it is accessed.
+        is_loaded (bool): Whether the data is provided or loaded already.
         path (Union[Path, GSPath, str]): The primary file path associated with the data.
-        metadata (DataDocMetadata): Metadata associated with the data, automatically managed based on file path changes or data updates.
+        read_only (bool): Whether the UtdData was opened read-only, without metadata, and can not be saved.
+        engine (ReadEngine): Whether the data is read into numpy-backed or Arrow-backed columns.
+        memory_map (bool): Whether parquet-files are memory mapped when read with the arrow engine.
+        metadata (DataDocMetadata): Metadata associated with the data, made from the path the first time it is accessed.
 
     Methods:
         __init__: Constructor for initializing a new UtdData instance with optional data and path specifications.
-        get_data: Loads data from the specified path if not already loaded.
+        load: Loads the data from the specified path, if not loaded already.
+        get_data: Loads data from the specified path.
+        iter_batches: Reads the data from the specified path in typed chunks, without loading all of it.
+        stream_to_parquet: Writes the chunks from iter_batches to a parquet-file, one at a time.
+        to_arrow: Hands the data on as a pyarrow.Table, without copying Arrow-backed columns.
+        memory_report: Reports what every column costs in memory, and a smaller dtype for it.
+        compact: Changes the columns to smaller dtypes, keeping the values.
+        from_glob: Reads all the files matching a glob pattern concurrently, into one DataFrame with their periods.
         save: Saves the current data and metadata to a specified path, managing file versioning and overwrite behavior.
-        _metadata_from_path: Updates metadata based on the current data path, extracting relevant details as needed.
+        _metadata_from_path: Makes the metadata from the current data path, the first time the metadata is accessed.
 
     This class is designed to be versatile, supporting various data storage formats and environments, and
     is easily extendable for additional data handling and processing needs.
@@ -67,21 +111,39 @@ class UtdData:
         path: Path | GSPath | str = "",
         glob_pattern_latest: str = "",
         exclude_keywords: list[str] | None = None,
+        columns: list[str] | None = None,
+        filters: FILTERS_TYPE | None = None,
+        read_only: bool = False,
+        engine: str | ReadEngine = ReadEngine.pandas,
+        memory_map: bool = False,
     ) -> None:
         """Initializes the UtdData class with data and path parameters. If glob_pattern is used, it will use the latest file matching the pattern.
 
         Args:
-            data (pd.DataFrame | None): Initial dataframe to be used. If None, data will be loaded from the specified path.
+            data (pd.DataFrame | None): Initial dataframe to be used. If None, data will be loaded from the specified path,
+                the first time the data is accessed, or load is called.
             path (Union[Path, GSPath, str]): Path to the file or directory from which the data should be loaded.
             glob_pattern_latest (str): Glob pattern to find files if no direct path is given.
             exclude_keywords (List[str] | None): List of keywords to exclude while searching for files using glob pattern.
+            columns (list[str] | None): Only load these columns, see get_data. Defaults to all the columns.
+            filters (list | None): Only load the rows matching these filters, see get_data. Defaults to all the rows.
+            read_only (bool): Skip the metadata entirely, and refuse to save. Defaults to False.
+            engine (str | ReadEngine): "arrow" keeps the data read as pd.ArrowDtype columns, instead of numpy and python objects,
+                see ReadEngine. Defaults to "pandas".
+            memory_map (bool): Memory map local parquet-files read with the arrow engine, instead of reading them into memory first.
+                Defaults to False.
 
         Raises:
-            ValueError: If neither path nor glob_pattern are provided.
+            ValueError: If neither path nor glob_pattern are provided, or the engine is unknown.
         """
         # defining global variables for file-suffix
         self.parquet_suffix = ".parquet"
         self.sas_suffix = ".sas7bdat"
+        self.columns = columns
+        self.filters = filters
+        self.read_only = read_only
+        self.engine = ReadEngine(engine)
+        self.memory_map = memory_map
         if glob_pattern_latest and path:
             utdanning_logger.logger.info(
                 "You set both glob pattern and path, will prioritize path."
@@ -94,12 +156,8 @@ class UtdData:
         if glob_pattern_latest and not path:
             path = self._find_last_glob(glob_pattern_latest, exclude_keywords)
         self._correct_check_path(path)
-        if data is None:
-            self.get_data()
-        else:
-            self.data = data
-        if self.path.is_file():
-            self._metadata_from_path()
+        self._data: pd.DataFrame | None = data
+        self._metadata: DataDocMetadata | None = None
 
     def __str__(self) -> str:
         """Provides a string representation of the UtdData object, excluding the data itself for brevity.
@@ -109,9 +167,11 @@ class UtdData:
         """
         result = "UtdData content:\n"
         for key, attr in vars(self).items():
-            if key != "data":
+            if key != "_data":
                 result += f"\n{key}: {attr}"
         result += "\n\nColumn-info:\n"
+        if not self.is_loaded:
+            return result + "Data not loaded yet."
         buf = StringIO()
         self.data.info(buf=buf)
         result += buf.getvalue()
@@ -125,6 +185,66 @@ class UtdData:
         """
         return len(self.data)
 
+    @property
+    def data(self) -> pd.DataFrame:
+        """The data, loaded from the path the first time it is accessed.
+
+        Returns:
+            pd.DataFrame: The data.
+
+        Raises:
+            ValueError: If the data could not be loaded.
+        """
+        if self._data is None:
+            self.load()
+        if self._data is None:
+            raise ValueError(f"No data loaded from {self.path}.")
+        return self._data
+
+    @data.setter
+    def data(self, data: pd.DataFrame) -> None:
+        """Replaces the data.
+
+        Args:
+            data (pd.DataFrame): The new data.
+        """
+        self._data = data
+
+    @property
+    def metadata(self) -> DataDocMetadata:
+        """The metadata of the data, made from the path the first time it is accessed.
+
+        Returns:
+            DataDocMetadata: The metadata.
+
+        Raises:
+            ValueError: If the UtdData was opened read-only.
+        """
+        if self.read_only:
+            raise ValueError(f"{self.path} was opened read-only, without metadata.")
+        if self._metadata is None:
+            self._metadata_from_path()
+        return cast(DataDocMetadata, self._metadata)
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the data is provided or loaded already, so accessing it will not read the file.
+
+        Returns:
+            bool: True if the data is loaded.
+        """
+        return self._data is not None
+
+    def load(self) -> pd.DataFrame | None:
+        """Loads the data from the path, if not loaded already, with the columns and filters the UtdData was made with.
+
+        Returns:
+            pd.DataFrame | None: The data, None if the loading was aborted, see get_data.
+        """
+        if self._data is None:
+            self.get_data()
+        return self._data
+
     def _correct_check_path(self, path: Path | GSPath | str) -> None:
         """Checks and corrects path.
 
@@ -185,9 +305,14 @@ class UtdData:
     def get_similar_paths(self) -> list[str]:
         """Finds paths that are similar to the current path, excluding versions.
 
+        Locally the paths come from the version index of the folder, which is only rebuilt when the folder changes,
+        see the version_index module.
+
         Returns:
-            List[str]: A sorted list of similar file paths.
+            List[str]: The similar file paths, sorted by version.
         """
+        if config.REGION == "ON_PREM":
+            return version_index.similar_paths(str(self.path))
         return sorted(
             [
                 str(x)
@@ -207,9 +332,22 @@ class UtdData:
 
     def get_data(
         self,
+        columns: list[str] | None = None,
+        filters: FILTERS_TYPE | None = None,
     ) -> None | pd.DataFrame | tuple[pd.DataFrame, dict[str, str | bool]]:
         """Loads the data from the specified path, or the most recent file version if the specified path is outdated.
 
+        The columns and filters are passed on to the parquet-reader, so only the columns asked for are read,
+        and the row groups that can not match the filters are skipped by their statistics.
+        From sas7bdat-files, the columns are picked while reading the file in chunks, and the rows filtered after.
+
+        Args:
+            columns (list[str] | None): Only load these columns. Defaults to the columns the UtdData was made with, or all of them.
+            filters (list | None): Only load the rows matching these filters, in the form pyarrow takes them:
+                a list of (column, operator, value), all of which must match, or a list of such lists, of which one must match.
+                The operators are "==", "=", "!=", "<", "<=", ">", ">=", "in" and "not in".
+                Defaults to the filters the UtdData was made with, or all the rows.
+
         Returns:
             None | tuple[pd.DataFrame, dict[str, str|bool]]: The loaded data and metadata if successful, None otherwise.
 
@@ -219,32 +357,246 @@ class UtdData:
         path = self.path
 
         # Warn user if not opening the latest version?
-        if str(self.get_latest_version_path()) != str(self.path):
+        latest_version_path = self.get_latest_version_path()
+        if str(latest_version_path) != str(self.path):
             sure = input(
-                f"You are opening {self.path}, not opening the latest version of the file: {self.get_latest_version_path()} \n Are you sure? Y/y: "
+                f"You are opening {self.path}, not opening the latest version of the file: {latest_version_path} \n Are you sure? Y/y: "
             )
             if sure.lower() != "y":
                 return None
+        if columns is None:
+            columns = self.columns
+        if filters is None:
+            filters = self.filters
         utdanning_logger.logger.info("Opening data from %s", str(self.path))
-        df_get_data: pd.DataFrame
-        if config.REGION == "ON_PREM":
-            if path.suffix == self.parquet_suffix:
-                df_get_data = pd.read_parquet(path)
-            elif path.suffix == self.sas_suffix:
-                df_get_data = auto_dtype(pd.read_sas(path))
-            else:
-                raise OSError(
-                    f"Can only open parquet and sas7bdat, you gave me {path.suffix}"
+        df_get_data = _read_path(path, columns, filters, self.engine, self.memory_map)
+        self.data = df_get_data
+        if config.DATA_COMPACT_MIN_BYTES and self.engine == ReadEngine.pandas:
+            loaded_bytes = int(df_get_data.memory_usage(deep=True).sum())
+            if loaded_bytes >= config.DATA_COMPACT_MIN_BYTES:
+                saved = self.compact()
+                utdanning_logger.logger.info(
+                    "Compacted the data from %s bytes by %s bytes",
+                    str(loaded_bytes),
+                    str(saved),
                 )
-        if config.REGION == "BIP":
-            if path.suffix == self.sas_suffix:
-                with dp.FileClient().gcs_open(str(path), "r") as sasfile:
-                    df_get_data = auto_dtype(pd.read_sas(str(sasfile)))
+                df_get_data = self.data
+        return df_get_data
+
+    def iter_batches(
+        self,
+        chunksize: int = _SAS_CHUNKSIZE,
+        columns: list[str] | None = None,
+        filters: FILTERS_TYPE | None = None,
+        dtypes: Mapping[str, Any] | None = None,
+    ) -> Iterator[pd.DataFrame]:
+        """Reads the data from the path in chunks of rows, so only one chunk is held in memory at a time.
+
+        Chunks of a sas7bdat-file all get the same dtypes, from the types in the file: text as strings and numbers as Float64.
+        A chunk can not tell the dtypes of the ones after it, codes with leading zeros or fractions might come later.
+        If the sas-cache has a parquet-copy of the file, the chunks are read from that instead, see the sas_cache module.
+        The chunks of a parquet-file have the dtypes in the file, and the filters are pushed down to the reader.
+        The data already loaded into the UtdData is not used.
+
+        Args:
+            chunksize (int): Number of rows to read at a time. Defaults to 100 000.
+            columns (list[str] | None): Only read these columns. Defaults to the columns the UtdData was made with, or all of them.
+            filters (list | None): Only keep the rows matching these filters, see get_data.
+                Defaults to the filters the UtdData was made with.
+            dtypes (Mapping[str, Any] | None): The dtypes of the columns of a sas7bdat-file, instead of the ones from the types in the file.
+
+        Yields:
+            pd.DataFrame: The chunks of the data, some of them can be empty after filtering.
+
+        Raises:
+            OSError: If the file extension is not parquet or sas7bdat.
+        """
+        if columns is None:
+            columns = self.columns
+        if filters is None:
+            filters = self.filters
+        utdanning_logger.logger.info("Reading data in chunks from %s", str(self.path))
+        cached = None
+        if self.path.suffix == self.sas_suffix and config.REGION == "ON_PREM":
+            cached = sas_cache.cached_path(str(self.path))
+        if cached is not None:
+            yield from _iter_parquet_batches(
+                cached,
+                chunksize,
+                [col.lower() for col in columns] if columns else None,
+                filters,
+            )
+        elif self.path.suffix == self.sas_suffix:
+            if config.REGION == "BIP":
+                with dp.FileClient().gcs_open(str(self.path), "r") as sasfile:
+                    yield from _iter_sas_batches(
+                        str(sasfile), chunksize, columns, filters, dtypes
+                    )
             else:
-                df_get_data = pd.DataFrame(dp.read_pandas(str(path)))
+                yield from _iter_sas_batches(
+                    self.path, chunksize, columns, filters, dtypes
+                )
+        elif self.path.suffix == self.parquet_suffix:
+            filesystem = (
+                dp.FileClient.get_gcs_file_system() if config.REGION == "BIP" else None
+            )
+            yield from _iter_parquet_batches(
+                self.path, chunksize, columns, filters, filesystem
+            )
+        else:
+            raise OSError(
+                f"Can only open parquet and sas7bdat, you gave me {self.path.suffix}"
+            )
 
-        self.data = df_get_data
-        return df_get_data
+    def stream_to_parquet(
+        self,
+        path: str | Path,
+        chunksize: int = _SAS_CHUNKSIZE,
+        columns: list[str] | None = None,
+        filters: FILTERS_TYPE | None = None,
+        dtypes: Mapping[str, Any] | None = None,
+    ) -> Path:
+        """Writes the data from the path to a parquet-file, one chunk at a time, without holding all of it in memory.
+
+        Every chunk from iter_batches is written as its own row group.
+        Unlike save, the path is used as it is, without versioning, and the metadata is not written.
+
+        Args:
+            path (str | Path): The path of the parquet-file to write.
+            chunksize (int): Number of rows to read and write at a time. Defaults to 100 000.
+            columns (list[str] | None): Only write these columns, see iter_batches.
+            filters (list | None): Only write the rows matching these filters, see iter_batches.
+            dtypes (Mapping[str, Any] | None): The dtypes of the columns of a sas7bdat-file, see iter_batches.
+
+        Returns:
+            Path: The path of the written parquet-file.
+        """
+        path = Path(path)
+        writer: pq.ParquetWriter | None = None
+        try:
+            for batch in self.iter_batches(chunksize, columns, filters, dtypes):
+                if writer is None:
+                    table = pa.Table.from_pandas(batch, preserve_index=False)
+                    writer = pq.ParquetWriter(path, table.schema)
+                else:
+                    table = pa.Table.from_pandas(
+                        batch, schema=writer.schema, preserve_index=False
+                    )
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            utdanning_logger.logger.warning(
+                "No data in %s, did not write %s", str(self.path), str(path)
+            )
+        else:
+            utdanning_logger.logger.info("Wrote file to %s.", str(path))
+        return path
+
+    def to_arrow(self) -> pa.Table:
+        """Hands the data on as a pyarrow.Table, loading it first if needed.
+
+        Columns read with the arrow engine are handed on without a copy, the other columns are converted.
+
+        Returns:
+            pa.Table: The data, without the index.
+        """
+        return pa.Table.from_pandas(self.data, preserve_index=False)
+
+    def memory_report(self, categorical_max_share: float = 0.5) -> pd.DataFrame:
+        """Reports what every column of the data costs in memory, loading the data first if needed.
+
+        Args:
+            categorical_max_share (float): Text-columns with at most this share of distinct values are suggested as categoricals.
+
+        Returns:
+            pd.DataFrame: A row per column, with the dtype, bytes, number of distinct values and suggested dtype,
+                see dtypes.memory_report.
+        """
+        return memory_report(self.data, categorical_max_share)
+
+    def compact(self, categorical_max_share: float = 0.5) -> int:
+        """Changes the columns of the data to the smaller dtypes memory_report suggests, loading the data first if needed.
+
+        Integers are downcast, text-columns with few distinct values become categoricals,
+        and text-columns of digits with leading zeros become Arrow-backed strings, see dtypes.suggest_dtype.
+        Loading compacts the data automatically, if it is larger than DATA_COMPACT_MIN_BYTES in the config.
+
+        Args:
+            categorical_max_share (float): Text-columns with at most this share of distinct values become categoricals.
+
+        Returns:
+            int: The bytes saved.
+        """
+        before = int(self.data.memory_usage(deep=True).sum())
+        self.data = compact_dtypes(self.data, categorical_max_share)
+        return before - int(self.data.memory_usage(deep=True).sum())
+
+    @staticmethod
+    def from_glob(
+        glob_pattern: str,
+        exclude_keywords: list[str] | None = None,
+        latest_version_only: bool = True,
+        columns: list[str] | None = None,
+        filters: FILTERS_TYPE | None = None,
+        period_col: str = "periode",
+        max_workers: int | None = None,
+    ) -> pd.DataFrame:
+        """Reads all the files matching a glob pattern concurrently, and stacks them into one DataFrame.
+
+        Every file gets the first date get_path_dates finds in its name in the period_col, so the periods can be told apart.
+        Files without a period and a version at the end of their name, like "_p2024-10_v1", are skipped with a warning.
+        The files are read on a thread pool, and concatenated once, oldest period first.
+        Categorical columns get the union of the categories in all the files, so they stay categorical.
+        The latest version of a file is not checked like in get_data, as all the files are read.
+
+        Args:
+            glob_pattern (str): Glob pattern matching the files of all the periods, like ".../data_p*_v*.parquet".
+            exclude_keywords (list[str] | None): Skip files with any of these keywords in their filename.
+            latest_version_only (bool): Only read the latest version of every period. Defaults to True.
+                If a period is stored both as parquet and sas7bdat, the parquet-file is read.
+            columns (list[str] | None): Only read these columns, see get_data. Defaults to all the columns.
+            filters (list | None): Only read the rows matching these filters, see get_data. Defaults to all the rows.
+            period_col (str): Name of the column to put the periods in. Defaults to "periode".
+            max_workers (int | None): Max number of files to read at the same time. Defaults to the default of ThreadPoolExecutor.
+
+        Returns:
+            pd.DataFrame: The data of all the files, with a fresh index.
+
+        Raises:
+            FileNotFoundError: If no files with a period in their name match the glob pattern.
+        """
+        paths = get_paths(glob_pattern, exclude_keywords)
+        if latest_version_only:
+            paths = _latest_versions(paths)
+        if not paths:
+            raise FileNotFoundError(f"No files match {glob_pattern}")
+        path_dates = {}
+        for path in paths:
+            try:
+                path_dates[path] = get_path_dates(path)
+            except (IndexError, ValueError, OverflowError):
+                utdanning_logger.logger.warning(
+                    "Skipping %s, there is no period and version at the end of its name.",
+                    path,
+                )
+        if not path_dates:
+            raise FileNotFoundError(
+                f"No files with a period in their name match {glob_pattern}"
+            )
+        paths = sorted(path_dates, key=lambda path: (path_dates[path], path))
+        path_type = GSPath if config.REGION == "BIP" else Path
+
+        def read_one(path: str) -> pd.DataFrame:
+            utdanning_logger.logger.info("Opening data from %s", path)
+            df = _read_path(path_type(path), columns, filters)
+            df[period_col] = pd.Timestamp(path_dates[path][0])
+            return df
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+            frames = list(pool.map(read_one, paths))
+        return pd.concat(_align_categories(frames), ignore_index=True)
 
     def get_version(self, path: str | Path | GSPath = "") -> int:
         """Gets the version number of the file at the specified path.
@@ -291,6 +643,11 @@ class UtdData:
         bump_version: bool = True,
         overwrite_mode: str | OverwriteMode = OverwriteMode.NONE,
         save_metadata: bool = True,
+        sort_by: list[str] | None = None,
+        compression: str | None = None,
+        compression_level: int | None = None,
+        row_group_size: int | None = None,
+        use_dictionary: bool | list[str] | None = None,
     ) -> None:
         """Saves data to path.
 
@@ -304,12 +661,22 @@ class UtdData:
             overwrite_mode (Union[str, OverwriteMode]): Specifies how to handle existing files at the target path.
                                                         Can be 'none', 'overwrite', or 'filebump'. Defaults to OverwriteMode.NONE.
             save_metadata (bool): Whether to save metadata along with the data. Defaults to True.
+            sort_by (list[str] | None): Sort the rows written by these columns, so the min/max-statistics of the row groups
+                let filtered reads on them skip most of the file. The index is not written when sorting.
+                The data in memory is not sorted. Defaults to no sorting.
+            compression (str | None): The compression codec, like "zstd", "snappy" or "none".
+                Defaults to PARQUET_COMPRESSION in the config.
+            compression_level (int | None): The compression level of the codec. Defaults to PARQUET_COMPRESSION_LEVEL in the config.
+            row_group_size (int | None): Max rows per row group. Defaults to PARQUET_ROW_GROUP_SIZE in the config.
+            use_dictionary (bool | list[str] | None): Dictionary-encode all the columns, none of them, or the ones listed.
+                Defaults to the columns with at most PARQUET_DICTIONARY_MAX_SHARE distinct values in the config.
 
         Returns:
             None
 
         Raises:
             OSError: If the file already exists and the conditions for overwriting are not met as per the `overwrite_mode`.
+            ValueError: If the UtdData was opened read-only.
 
         Notes:
             The method converts string paths to Path or GSPath based on the runtime environment. The path is also forced
@@ -331,8 +698,13 @@ class UtdData:
         else:
             overwrite_mode_enum = overwrite_mode
 
+        if self.read_only:
+            raise ValueError(f"{self.path} was opened read-only, cant save it.")
         if not path:
             path = self.path
+        # Load the data and metadata from where they are now, before the path is changed
+        data = self.data
+        metadata = self.metadata
 
         pathpath: Path | GSPath
         if isinstance(path, str) and config.REGION == "BIP":
@@ -390,20 +762,41 @@ class UtdData:
         # Reset the classes path, as when we write somewhere, thats were we should open it from again...
         self.path = pathpath
 
+        if use_dictionary is None:
+            use_dictionary = low_cardinality_columns(
+                data, config.PARQUET_DICTIONARY_MAX_SHARE
+            )
+        write_options: dict[str, Any] = {
+            "compression": compression or config.PARQUET_COMPRESSION,
+            "compression_level": (
+                compression_level
+                if compression_level is not None
+                else config.PARQUET_COMPRESSION_LEVEL
+            ),
+            "row_group_size": row_group_size or config.PARQUET_ROW_GROUP_SIZE,
+            "use_dictionary": use_dictionary,
+        }
+        table = pa.Table.from_pandas(data, preserve_index=False if sort_by else None)
+        if sort_by:
+            # Sorting in Arrow is a lot faster than in pandas for text-columns, and also stable
+            table = table.sort_by([(col, "ascending") for col in sort_by])
         if config.REGION == "ON_PREM":
-            self.data.to_parquet(pathpath)
+            pq.write_table(table, pathpath, **write_options)
         elif config.REGION == "BIP":
-            dp.write_pandas(self.data, str(pathpath))
+            with dp.FileClient.get_gcs_file_system().open(
+                str(pathpath), "wb"
+            ) as buffer:
+                pq.write_table(table, buffer, **write_options)
 
         # Update path in metadata before saving
-        self.metadata.dataset_path = pathpath
-        metapath = self.metadata.metadata_document
+        metadata.dataset_path = pathpath
+        metapath = metadata.metadata_document
         if metapath:
             metapath = metapath.parent / (pathpath.stem + "__DOC.json")
-        self.metadata.metadata_document = metapath
+        metadata.metadata_document = metapath
         # Actuall save the metadata
         if save_metadata:
-            self.metadata.write_metadata_document()
+            metadata.write_metadata_document()
 
         utdanning_logger.logger.info(
             "Wrote file to %s. Wrote metadata to %s.", str(self.path), str(metapath)
@@ -412,10 +805,359 @@ class UtdData:
 
     def _metadata_from_path(self) -> None:
         """Extracts metadata from the file path, intended for internal use."""
-        self.metadata = DataDocMetadata(
-            statistic_subject_mapping=StatisticSubjectMapping(
-                executor=concurrent.futures.ThreadPoolExecutor(max_workers=12),
-                source_url=get_statistical_subject_source_url(),
-            ),
+        self._metadata = DataDocMetadata(
+            statistic_subject_mapping=_statistic_subject_mapping(),
             dataset_path=str(self.path),
         )
+
+
+@lru_cache(1)
+def _statistic_subject_mapping() -> StatisticSubjectMapping:
+    """The subject mapping shared by the metadata of all the UtdData, with its thread pool.
+
+    It is fetched once per process, the first time metadata is made, instead of once per file opened.
+
+    Returns:
+        StatisticSubjectMapping: The shared subject mapping.
+    """
+    return StatisticSubjectMapping(
+        executor=concurrent.futures.ThreadPoolExecutor(max_workers=12),
+        source_url=get_statistical_subject_source_url(),
+    )
+
+
+def _read_path(
+    path: Path | GSPath,
+    columns: list[str] | None = None,
+    filters: FILTERS_TYPE | None = None,
+    engine: ReadEngine = ReadEngine.pandas,
+    memory_map: bool = False,
+) -> pd.DataFrame:
+    """Reads a parquet- or sas7bdat-file, from the disk or the bucket depending on the REGION.
+
+    With the arrow engine, parquet-files are read straight into pd.ArrowDtype columns.
+    Sas7bdat-files can only be read into numpy first, and are converted after auto_dtype.
+
+    Args:
+        path (Path | GSPath): The path to the file.
+        columns (list[str] | None): Only read these columns. Defaults to all the columns.
+        filters (list | None): Only read the rows matching these filters, see UtdData.get_data.
+        engine (ReadEngine): Read into numpy-backed or Arrow-backed columns. Defaults to numpy-backed.
+        memory_map (bool): Memory map local parquet-files read with the arrow engine.
+
+    Returns:
+        pd.DataFrame: The data in the file.
+
+    Raises:
+        OSError: If the file extension is not parquet or sas7bdat.
+    """
+    df: pd.DataFrame
+    if engine == ReadEngine.arrow and path.suffix == ".parquet":
+        filesystem = (
+            dp.FileClient.get_gcs_file_system() if config.REGION == "BIP" else None
+        )
+        table = pq.read_table(
+            str(path),
+            columns=columns,
+            filters=filters,
+            memory_map=memory_map and filesystem is None,
+            filesystem=filesystem,
+        )
+        df = table.to_pandas(types_mapper=pd.ArrowDtype)
+        return df
+    if config.REGION == "ON_PREM":
+        if path.suffix == ".parquet":
+            df = pd.read_parquet(path, columns=columns, filters=filters)
+        elif path.suffix == ".sas7bdat":
+            df = _read_sas(path, columns, filters, cache=True)
+        else:
+            raise OSError(
+                f"Can only open parquet and sas7bdat, you gave me {path.suffix}"
+            )
+    if config.REGION == "BIP":
+        if path.suffix == ".sas7bdat":
+            with dp.FileClient().gcs_open(str(path), "r") as sasfile:
+                df = _read_sas(str(sasfile), columns, filters)
+        else:
+            df = pd.DataFrame(
+                dp.read_pandas(str(path), columns=columns, filters=filters)
+            )
+    if engine == ReadEngine.arrow:
+        df = pa.Table.from_pandas(df, preserve_index=False).to_pandas(
+            types_mapper=pd.ArrowDtype
+        )
+    return df
+
+
+def _latest_versions(paths: list[str]) -> list[str]:
+    """Keeps only the latest version of every file, preferring parquet over sas7bdat for the same version.
+
+    Files without a version in their name are all kept.
+
+    Args:
+        paths (list[str]): The paths to pick from.
+
+    Returns:
+        list[str]: The paths of the latest versions.
+    """
+    latest: dict[str, tuple[int, bool, str]] = {}
+    for path in paths:
+        name = path.rsplit(".", 1)[0]
+        try:
+            version = versioning.get_version(path)
+            base = name.rstrip(digits)
+        except ValueError:
+            version, base = 0, name
+        candidate = (version, path.endswith(".parquet"), path)
+        if base not in latest or candidate[:2] > latest[base][:2]:
+            latest[base] = candidate
+    return [path for _, _, path in latest.values()]
+
+
+def _align_categories(frames: list[pd.DataFrame]) -> list[pd.DataFrame]:
+    """Gives the categorical columns the same categories in all the frames, so concatenating keeps them categorical.
+
+    Args:
+        frames (list[pd.DataFrame]): The frames to concatenate, changed in place.
+
+    Returns:
+        list[pd.DataFrame]: The same frames.
+    """
+    categoricals: dict[str, list[pd.Series]] = {}
+    for df in frames:
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                categoricals.setdefault(col, []).append(df[col])
+    for col, series in categoricals.items():
+        if len(series) < len(frames) or all(
+            ser.dtype == series[0].dtype for ser in series
+        ):
+            continue
+        categories = pd.api.types.union_categoricals(
+            series, ignore_order=True
+        ).categories
+        for df in frames:
+            df[col] = df[col].cat.set_categories(categories)
+    return frames
+
+
+def _read_sas(
+    path: Path | GSPath | str,
+    columns: list[str] | None = None,
+    filters: FILTERS_TYPE | None = None,
+    cache: bool = False,
+) -> pd.DataFrame:
+    """Reads a sas7bdat-file, only keeping the columns and rows asked for.
+
+    The reader of pandas can not skip columns, so the file is read in chunks, keeping only the columns asked for from each.
+    The rows are filtered after the dtypes are set, as the text in the file is read as bytes.
+
+    Args:
+        path (Path | GSPath | str): The path to the sas7bdat-file.
+        columns (list[str] | None): Only keep these columns. Defaults to all the columns.
+        filters (list | None): Only keep the rows matching these filters, see UtdData.get_data.
+        cache (bool): Use the sas-cache, if it is turned on. Only for local files.
+            Filling the cache reads all the columns, the columns are picked after.
+
+    Returns:
+        pd.DataFrame: The data in the file.
+    """
+    if filters:
+        filters = _lowercase_filters(filters)
+    fill_cache = cache and sas_cache.cache_enabled()
+    if fill_cache:
+        cached = sas_cache.cached_path(str(path))
+        if cached is not None:
+            return pd.read_parquet(
+                cached,
+                columns=[col.lower() for col in columns] if columns else None,
+                filters=filters,
+            )
+    if columns is None or fill_cache:
+        df = pd.read_sas(path)
+    else:
+        with pd.read_sas(path, chunksize=_SAS_CHUNKSIZE) as reader:
+            chunks = [_select_columns(chunk, columns) for chunk in reader]
+        # An empty file gives no chunks
+        df = (
+            pd.concat(chunks, ignore_index=True)
+            if chunks
+            else pd.DataFrame(columns=columns)
+        )
+    df = auto_dtype(df)
+    if fill_cache:
+        sas_cache.store_in_cache(str(path), df)
+        if columns is not None:
+            df = _select_columns(df, columns)
+    if filters:
+        df = df[_filters_mask(df, filters)].reset_index(drop=True)
+    return df
+
+
+def _iter_parquet_batches(
+    path: Path | GSPath | str,
+    chunksize: int = _SAS_CHUNKSIZE,
+    columns: list[str] | None = None,
+    filters: FILTERS_TYPE | None = None,
+    filesystem: Any = None,
+) -> Iterator[pd.DataFrame]:
+    """Reads a parquet-file in chunks, with the columns and filters pushed down to the reader.
+
+    Args:
+        path (Path | GSPath | str): The path to the parquet-file.
+        chunksize (int): Max number of rows to read at a time.
+        columns (list[str] | None): Only read these columns. Defaults to all the columns.
+        filters (list | None): Only read the rows matching these filters, see UtdData.get_data.
+        filesystem (Any): The filesystem to read the file from, defaults to the local one.
+
+    Yields:
+        pd.DataFrame: The chunks.
+    """
+    dataset = ds.dataset(str(path), format="parquet", filesystem=filesystem)
+    for batch in dataset.to_batches(
+        columns=columns,
+        filter=pq.filters_to_expression(filters) if filters else None,
+        batch_size=chunksize,
+    ):
+        yield batch.to_pandas()
+
+
+def _iter_sas_batches(
+    path: Path | GSPath | str,
+    chunksize: int = _SAS_CHUNKSIZE,
+    columns: list[str] | None = None,
+    filters: FILTERS_TYPE | None = None,
+    dtypes: Mapping[str, Any] | None = None,
+) -> Iterator[pd.DataFrame]:
+    """Reads a sas7bdat-file in chunks, giving every chunk the same dtypes, see UtdData.iter_batches.
+
+    Args:
+        path (Path | GSPath | str): The path to the sas7bdat-file.
+        chunksize (int): Number of rows to read at a time.
+        columns (list[str] | None): Only keep these columns. Defaults to all the columns.
+        filters (list | None): Only keep the rows matching these filters, see UtdData.get_data.
+        dtypes (Mapping[str, Any] | None): The dtypes of the columns. Defaults to the ones _sas_batch_dtypes finds from the first chunk.
+
+    Yields:
+        pd.DataFrame: The typed chunks.
+
+    Raises:
+        ValueError: If a chunk can not be given the dtypes.
+    """
+    if filters:
+        filters = _lowercase_filters(filters)
+    with pd.read_sas(path, chunksize=chunksize) as reader:
+        for chunk in reader:
+            if columns is not None:
+                chunk = _select_columns(chunk, columns)
+            if dtypes is None:
+                dtypes = _sas_batch_dtypes(chunk)
+            chunk = auto_dtype(chunk, show_memory=False)
+            try:
+                chunk = chunk.astype(dtypes)
+            except (TypeError, ValueError) as e:
+                raise ValueError(
+                    f"A chunk of {path} does not fit the dtypes, send in the dtypes: {e}"
+                ) from e
+            if filters:
+                chunk = chunk[_filters_mask(chunk, filters)]
+            yield chunk
+
+
+def _sas_batch_dtypes(chunk: pd.DataFrame) -> dict[str, Any]:
+    """Finds dtypes for all the chunks of a sas7bdat-file, from the types of the columns in the file.
+
+    Text is kept as strings, even if the first chunk only has digits, and numbers as Float64,
+    as sas7bdat-files do not tell integers from floats.
+
+    Args:
+        chunk (pd.DataFrame): The first chunk, as read from the file.
+
+    Returns:
+        dict[str, Any]: The dtypes of the columns, by the lowercased names auto_dtype gives them.
+    """
+    dtypes: dict[str, Any] = {}
+    for col, dtype in chunk.dtypes.items():
+        if pd.api.types.is_object_dtype(dtype):
+            dtypes[str(col).lower()] = "string[pyarrow]"
+        elif pd.api.types.is_numeric_dtype(dtype):
+            dtypes[str(col).lower()] = "Float64"
+        else:
+            dtypes[str(col).lower()] = dtype
+    return dtypes
+
+
+def _select_columns(df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    """Picks columns from data read from a sas7bdat-file, ignoring case, as auto_dtype lowercases the names after.
+
+    Args:
+        df (pd.DataFrame): The data as read from the file.
+        columns (list[str]): The columns to pick.
+
+    Returns:
+        pd.DataFrame: The picked columns.
+    """
+    by_lower = {str(col).lower(): col for col in df.columns}
+    return df[[by_lower.get(col.lower(), col) for col in columns]]
+
+
+def _lowercase_filters(filters: FILTERS_TYPE) -> FILTERS_TYPE:
+    """Lowercases the column names in row-filters, as auto_dtype lowercases the names of columns read from sas7bdat-files.
+
+    Args:
+        filters (list): A list of (column, operator, value), or a list of such lists.
+
+    Returns:
+        list: The same filters, with the column names in lowercase.
+    """
+    if isinstance(filters[0], list):
+        return [
+            [(col.lower(), operator, value) for col, operator, value in group]
+            for group in filters
+        ]
+    return [(col.lower(), operator, value) for col, operator, value in filters]
+
+
+def _filters_mask(df: pd.DataFrame, filters: FILTERS_TYPE) -> pd.Series:
+    """Finds the rows matching row-filters, in the form pyarrow takes them.
+
+    Args:
+        df (pd.DataFrame): The data to filter.
+        filters (list): A list of (column, operator, value) that must all match,
+            or a list of such lists, of which one must match.
+
+    Returns:
+        pd.Series: True for the rows matching the filters.
+
+    Raises:
+        ValueError: If an operator is not one of the ones pyarrow takes.
+    """
+    groups: list[list[tuple[str, str, Any]]]
+    if isinstance(filters[0], list):
+        groups = filters
+    else:
+        groups = [filters]
+    mask = pd.Series(False, index=df.index)
+    for group in groups:
+        group_mask = pd.Series(True, index=df.index)
+        for col, operator, value in group:
+            if operator in ("=", "=="):
+                group_mask &= df[col] == value
+            elif operator == "!=":
+                group_mask &= df[col] != value
+            elif operator == "<":
+                group_mask &= df[col] < value
+            elif operator == "<=":
+                group_mask &= df[col] <= value
+            elif operator == ">":
+                group_mask &= df[col] > value
+            elif operator == ">=":
+                group_mask &= df[col] >= value
+            elif operator == "in":
+                group_mask &= df[col].isin(value)
+            elif operator == "not in":
+                group_mask &= ~df[col].isin(value)
+            else:
+                raise ValueError(f"Dont know the filter-operator {operator}.")
+        mask |= group_mask
+    return mask
@@ -3,20 +3,42 @@
 Usually done pre views.
 """
 
+from ssb_utdanning.format.formats import FORMAT_REGISTRY
+from ssb_utdanning.format.formats import ColumnarUtdFormat
+from ssb_utdanning.format.formats import FormatRegistry
+from ssb_utdanning.format.formats import FrozenUtdFormat
 from ssb_utdanning.format.formats import UtdFormat
+from ssb_utdanning.format.formats import apply_formats
+from ssb_utdanning.format.formats import get_columnar_format
 from ssb_utdanning.format.formats import get_format
+from ssb_utdanning.format.formats import get_paths_for
 from ssb_utdanning.format.formats import info_stored_formats
 from ssb_utdanning.format.formats import store_format_prod
+from ssb_utdanning.format.sas_catalog import batch_process_folder_sascatalogs
+from ssb_utdanning.format.sas_catalog import read_sas_catalog
+from ssb_utdanning.format.sas_catalog import store_sas_catalog
 from ssb_utdanning.format.sas_format_parsing import batch_process_folder_sasfiles
+from ssb_utdanning.format.sas_format_parsing import iter_sas_formats
 from ssb_utdanning.format.sas_format_parsing import parse_sas_script
 from ssb_utdanning.format.sas_format_parsing import process_single_sasfile
 
 __all__ = [
+    "FORMAT_REGISTRY",
+    "ColumnarUtdFormat",
+    "FormatRegistry",
+    "FrozenUtdFormat",
     "UtdFormat",
+    "apply_formats",
+    "get_columnar_format",
     "get_format",
+    "get_paths_for",
     "info_stored_formats",
     "store_format_prod",
+    "batch_process_folder_sascatalogs",
+    "read_sas_catalog",
+    "store_sas_catalog",
     "batch_process_folder_sasfiles",
+    "iter_sas_formats",
     "parse_sas_script",
     "process_single_sasfile",
 ]
@@ -0,0 +1,135 @@
+"""Columnar files for big formats, stored next to their json-files.
+
+The json-file stays the source of truth. The columnar file holds the same keys and values as two columns,
+with the bounds of the range-keys already parsed into two more, as an uncompressed Arrow IPC-file.
+It can be memory mapped, and applied to columns as arrays without building a dict first, see ColumnarUtdFormat.
+"""
+
+import os
+import tempfile
+from collections.abc import Mapping
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+COLUMNAR_SUFFIX = ".arrow"
+COLUMNAR_SCHEMA = pa.schema(
+    [
+        ("key", pa.string()),
+        ("value", pa.string()),
+        ("range_bottom", pa.float64()),
+        ("range_top", pa.float64()),
+    ]
+)
+
+
+def columnar_path(json_path: str | Path) -> Path:
+    """The path of the columnar file belonging to the json-file of a format.
+
+    Args:
+        json_path (str | Path): The path to the json-file.
+
+    Returns:
+        Path: The same path, with the COLUMNAR_SUFFIX.
+    """
+    return Path(json_path).with_suffix(COLUMNAR_SUFFIX)
+
+
+def write_format_table(
+    path: str | Path,
+    keys: Sequence[Any],
+    values: Sequence[Any],
+    range_bounds: Mapping[str, tuple[float, float]],
+) -> None:
+    """Writes the keys and values of a format as a columnar file, atomically.
+
+    Args:
+        path (str | Path): The path of the columnar file to write.
+        keys (Sequence): The keys of the format, must be strings, like they are in the json-files.
+        values (Sequence): The values of the format, in the same order, must be strings or None.
+        range_bounds (Mapping[str, tuple[float, float]]): The bottom and top of the keys that are ranges.
+
+    Raises:
+        TypeError: If a key or value is not a string.
+    """
+    bounds = [range_bounds.get(key, (None, None)) for key in keys]
+    try:
+        table = pa.table(
+            [
+                pa.array(keys, type=pa.string()),
+                pa.array(values, type=pa.string()),
+                pa.array([bottom for bottom, _ in bounds], type=pa.float64()),
+                pa.array([top for _, top in bounds], type=pa.float64()),
+            ],
+            schema=COLUMNAR_SCHEMA,
+        )
+    except (pa.ArrowTypeError, pa.ArrowInvalid) as e:
+        raise TypeError(
+            f"Only formats of strings can be stored as columnar files: {e}"
+        ) from e
+    if pc.any(pc.is_null(table.column("key"))).as_py():
+        raise TypeError("Only formats of strings can be stored as columnar files.")
+
+    file_descriptor, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp"
+    )
+    os.close(file_descriptor)
+    try:
+        with pa.OSFile(temp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, COLUMNAR_SCHEMA) as writer:
+                writer.write_table(table)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_format_table(
+    path: str | Path, memory_map: bool = True
+) -> tuple[pa.Array, pa.Array, dict[str, tuple[float, float]]]:
+    """Reads the keys and values of a format from a columnar file.
+
+    The keys and values are not copied, when memory mapped they point into the file.
+
+    Args:
+        path (str | Path): The path of the columnar file.
+        memory_map (bool): Memory map the file, instead of reading it into memory first. Defaults to True.
+
+    Returns:
+        tuple[pa.Array, pa.Array, dict[str, tuple[float, float]]]: The string-arrays of the keys and the values,
+            and the bottom and top of the keys that are ranges.
+    """
+    source = pa.memory_map(str(path), "r") if memory_map else pa.OSFile(str(path))
+    with source:
+        table = pa.ipc.open_file(source).read_all()
+        keys = _single_array(table.column("key"))
+        values = _single_array(table.column("value"))
+        ranges = table.filter(pc.is_valid(table.column("range_bottom")))
+        range_bounds = dict(
+            zip(
+                ranges.column("key").to_pylist(),
+                zip(
+                    ranges.column("range_bottom").to_pylist(),
+                    ranges.column("range_top").to_pylist(),
+                ),
+            )
+        )
+    return keys, values, range_bounds
+
+
+def _single_array(column: pa.ChunkedArray) -> pa.Array:
+    """The column as one array, without copying it when it is in a single chunk, as the files are written.
+
+    Args:
+        column (pa.ChunkedArray): The column of the table.
+
+    Returns:
+        pa.Array: The values of the column.
+    """
+    if column.num_chunks == 1:
+        return column.chunk(0)
+    return column.combine_chunks()
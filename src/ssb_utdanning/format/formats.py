@@ -1,64 +1,595 @@
+import bisect
+import concurrent.futures
 import datetime
-import glob
 import json
 import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Mapping
 from pathlib import Path
 from typing import Any
+from typing import TypeVar
+from typing import cast
 
 import dateutil.parser
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from pandas._libs.missing import NAType
 
+from ssb_utdanning import config
 from ssb_utdanning import utdanning_logger
 from ssb_utdanning.config import DATETIME_FORMAT
 from ssb_utdanning.config import FORMATS_PATH
+from ssb_utdanning.format.columnar import columnar_path
+from ssb_utdanning.format.columnar import read_format_table
+from ssb_utdanning.format.columnar import write_format_table
+from ssb_utdanning.format.manifest import MANIFEST_TYPE
+from ssb_utdanning.format.manifest import content_hash
+from ssb_utdanning.format.manifest import read_manifest
+from ssb_utdanning.format.manifest import stored_content_hash
+from ssb_utdanning.format.manifest import update_manifest
 
 UTDFORMAT_INPUT_TYPE = dict[str | int, Any] | dict[str, Any]
+_NOT_FOUND = object()
+_FormatT = TypeVar("_FormatT", "FrozenUtdFormat", "UtdFormat", "ColumnarUtdFormat")
+# Up to this many keys are found in a ColumnarUtdFormat by scanning its keys, instead of hashing them all
+_SCAN_MAX_KEYS = 8
+NA_STRINGS = frozenset([".", "none", "None", "", "NA", "<NA>", "<NaN>", "nan", "NaN"])
 
 
-class UtdFormat(dict[Any, Any]):
+class _FormatLookups:
+    """The lookups shared by the formats kept as a dict, and the formats kept as arrays, see ColumnarUtdFormat.
+
+    Resolves many keys at once as array operations, subclasses give the declared keys and the special values.
+    """
+
+    na_value: Any
+    _range_bounds: dict[str, tuple[float, float, Any]]
+    _range_index_dirty: bool
+
+    def _declared_arrays(self) -> tuple[pd.Index, np.ndarray]:
+        """The declared keys that are not NA, as an index, and their values as an array in the same order.
+
+        Returns:
+            tuple[pd.Index, np.ndarray]: The object-index of the keys, and the object-array of the values.
+
+        Raises:
+            NotImplementedError: Subclasses give the declared keys.
+        """
+        raise NotImplementedError
+
+    def _find_declared(self, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Finds keys among the declared keys, like the dict would find them.
+
+        Args:
+            keys (np.ndarray): Object-array of the keys to find.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Boolean array telling which keys were found,
+                and the object-array of the values of the found keys, in the same order.
+        """
+        declared_index, declared_values = self._declared_arrays()
+        positions = declared_index.get_indexer(pd.Index(keys, dtype=object))
+        found = positions >= 0
+        return found, declared_values[positions[found]]
+
+    def set_na_value(self) -> bool:
+        """Sets the value for NA (Not Available) keys, see UtdFormat.set_na_value.
+
+        Returns:
+            bool: True if NA value is successfully set, False otherwise.
+
+        Raises:
+            NotImplementedError: Subclasses give the NA-value.
+        """
+        raise NotImplementedError
+
+    def _other_value(self) -> Any:
+        """The value of the "other"-key, given to keys not found in any other way.
+
+        Returns:
+            Any: The value of the "other"-key, an empty string if there is none.
+
+        Raises:
+            NotImplementedError: Subclasses give the "other"-value.
+        """
+        raise NotImplementedError
+
+    def _lookup(self, key: Any) -> Any:
+        """Looks up a single key like the dict would, without caching the result.
+
+        Args:
+            key: The key to look up.
+
+        Returns:
+            Any: The value the format gives the key.
+
+        Raises:
+            NotImplementedError: Subclasses look up single keys.
+        """
+        raise NotImplementedError
+
+    def apply(self, series: pd.Series) -> pd.Series:
+        """Maps a whole column through the format in one pass.
+
+        Gives the same values as series.map(format), but every distinct value in the column is only looked up once,
+        and exact hits, int/str-confusion, NA-values, ranges and "other" are resolved as array operations.
+        Values are looked up as the python objects of the column, like the dict-lookup would see them.
+        Unlike mapping through the dict, the resolved keys are not added to the cache of looked up keys.
+        If the column is categorical, only the categories are looked up, and the result is categorical too.
+
+        Args:
+            series (pd.Series): The column to apply the format to.
+
+        Returns:
+            pd.Series: The formatted column, with the same index and name as the column sent in.
+        """
+        if not len(series):
+            return series.copy()
+        series = _as_mapped_values(series)
+        codes, keys = self._distinct_keys(series)
+        return self._from_mapped(series, codes, self._map_keys(keys))
+
+    @staticmethod
+    def _distinct_keys(series: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+        """Splits a column into the codes of its rows and the distinct, non-NA values the codes point to.
+
+        For categorical columns these are the existing codes and categories, other columns are factorized.
+        Columns mixing types are factorized by type and value, as True and 1 are equal, but not looked up the same way.
+
+        Args:
+            series (pd.Series): The column to split.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The codes of the rows (-1 for NA), and the object-array of the distinct values.
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return (
+                series.cat.codes.to_numpy(),
+                series.cat.categories.astype(object).to_numpy(),
+            )
+        if pd.api.types.is_object_dtype(series.dtype) and pd.api.types.infer_dtype(
+            series, skipna=True
+        ).startswith("mixed"):
+            return _factorize_by_type(series.to_numpy())
+        codes, uniques = pd.factorize(series)
+        return codes, uniques.astype(object).to_numpy()
+
+    def _from_mapped(
+        self, series: pd.Series, codes: np.ndarray, mapped: np.ndarray
+    ) -> pd.Series:
+        """Builds the formatted column from the codes of the rows and the formatted distinct values.
+
+        Args:
+            series (pd.Series): The column the codes were made from, see the _distinct_keys-method.
+            codes (np.ndarray): The codes of the rows, -1 for NA.
+            mapped (np.ndarray): The formatted distinct values, in the order the codes point to.
+
+        Returns:
+            pd.Series: The formatted column, with the same index and name as the column sent in.
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return self._from_mapped_categorical(series, codes, mapped)
+
+        # NA-values are not factorized, but different NA-objects might map to different values
+        na_rows = codes == -1
+        if na_rows.any():
+            na_objects = series[na_rows].astype(object).to_numpy()
+            na_objects = np.array(
+                [np.nan if isinstance(x, float) else x for x in na_objects],
+                dtype=object,
+            )
+            na_keys = list({type(x): x for x in na_objects}.values())
+            na_mapped = np.empty(len(na_keys), dtype=object)
+            for i, na_key in enumerate(na_keys):
+                na_mapped[i] = self._lookup(na_key)
+            if len(na_keys) == 1:
+                codes[na_rows] = len(mapped)
+            else:
+                na_types = [type(x) for x in na_keys]
+                codes[na_rows] = [
+                    len(mapped) + na_types.index(type(x)) for x in na_objects
+                ]
+            mapped = np.concatenate([mapped, na_mapped])
+
+        mapped_converted = pd.Series(mapped, dtype=object).infer_objects().to_numpy()
+        return pd.Series(
+            mapped_converted.take(codes), index=series.index, name=series.name
+        )
+
+    def _from_mapped_categorical(
+        self, series: pd.Series, codes: np.ndarray, mapped: np.ndarray
+    ) -> pd.Series:
+        """Builds a formatted categorical column, the rows keep their codes, pointing into the formatted categories instead.
+
+        Categories formatted to the same value are merged into one category.
+
+        Args:
+            series (pd.Series): The categorical column the codes are from.
+            codes (np.ndarray): The codes of the rows, -1 for NA.
+            mapped (np.ndarray): The formatted categories.
+
+        Returns:
+            pd.Series: The formatted categorical column, with the same index and name as the column sent in.
+        """
+        # Code -1 (NA) picks the last element, so the value NA formats to goes at the end
+        na_mapped = self._lookup(np.nan) if (codes == -1).any() else np.nan
+        mapped = np.append(mapped, np.array([na_mapped], dtype=object))
+        mapped_codes, new_categories = pd.factorize(mapped)
+        if len(new_categories) < np.iinfo(codes.dtype).max:
+            mapped_codes = mapped_codes.astype(codes.dtype)
+        return pd.Series(
+            pd.Categorical.from_codes(
+                mapped_codes[codes], categories=pd.Index(new_categories)
+            ),
+            index=series.index,
+            name=series.name,
+        )
+
+    def apply_frame(
+        self, df: pd.DataFrame, cols: list[str] | str | None = None
+    ) -> pd.DataFrame:
+        """Applies the format to several columns of a DataFrame, see the apply-method.
+
+        Args:
+            df (pd.DataFrame): The DataFrame containing the columns to format.
+            cols (list[str] | str | None): The columns to apply the format to. Defaults to all columns.
+
+        Returns:
+            pd.DataFrame: A copy of the DataFrame, with the formatted columns replaced.
+        """
+        if cols is None:
+            cols = list(df.columns)
+        elif isinstance(cols, str):
+            cols = [cols]
+        df = df.copy()
+        for col in cols:
+            df[col] = self.apply(df[col])
+        return df
+
+    def _map_keys(self, keys: np.ndarray) -> np.ndarray:
+        """Resolves an array of distinct, non-NA keys in the same order as the '__missing__'-method.
+
+        Args:
+            keys (np.ndarray): Object-array of the distinct keys to map.
+
+        Returns:
+            np.ndarray: Object-array of the values for the keys.
+
+        Raises:
+            ValueError: If a key is not found in the format and no 'other' key is specified.
+        """
+        result = np.empty(len(keys), dtype=object)
+
+        # Exact hits
+        resolved, values = self._find_declared(keys)
+        result[resolved] = values
+
+        # Confusion between int and str
+        todo = np.flatnonzero(~resolved)
+        confused_keys = np.empty(len(todo), dtype=object)
+        confused_keys[:] = [_int_str_alternative(k) for k in keys[todo]]
+        hits, values = self._find_declared(confused_keys)
+        truthy = np.array([bool(v) for v in values], dtype=bool)
+        result[todo[hits][truthy]] = values[truthy]
+        resolved[todo[hits][truthy]] = True
+
+        # Keys recognized as NA, like "."
+        if self.set_na_value():
+            na_like = ~resolved & pd.Index(keys, dtype=object).isin(NA_STRINGS)
+            result[na_like] = self.na_value
+            resolved |= na_like
+
+        # Ranges
+        todo = np.flatnonzero(~resolved)
+        numeric = np.array([_range_float(k) for k in keys[todo]], dtype=np.float64)
+        in_range = self._look_in_ranges_many(numeric)
+        truthy = np.array([bool(v) for v in in_range], dtype=bool)
+        result[todo[truthy]] = in_range[truthy]
+        resolved[todo[truthy]] = True
+
+        if not resolved.all():
+            other = self._other_value()
+            if not other:
+                key = keys[~resolved][0]
+                raise ValueError(f"{key} not in format, and no other-key is specified.")
+            result[~resolved] = other
+        return result
+
+    def _build_range_index(self) -> None:
+        """Builds a sorted index of the range boundaries, so a lookup is a binary search.
+
+        The ranges are split into non-overlapping segments, each starting at one of the sorted edges.
+        Where ranges overlap, the range defined first in the format wins, like a linear scan would give.
+        The index is rebuilt after every change to the ranges, so overlaps are warned about separately,
+        see the _warn_overlapping_ranges-method.
+        """
+        bounds = list(self._range_bounds.items())
+        edges = sorted(
+            {bottom for _, (bottom, _, _) in bounds}
+            | {float(np.nextafter(top, np.inf)) for _, (_, top, _) in bounds}
+        )
+        lookup: list[Any] = [None] * len(edges)
+        for _, (bottom, top, value) in reversed(bounds):
+            start = bisect.bisect_left(edges, bottom)
+            if top == float("inf"):
+                end = len(edges)
+            else:
+                end = bisect.bisect_left(edges, float(np.nextafter(top, np.inf)))
+            lookup[start:end] = [value] * (end - start)
+        self._range_edges = edges
+        self._range_edges_array = np.array(edges, dtype=np.float64)
+        self._range_lookup = lookup
+        # The last element stays None, for keys outside all the ranges
+        self._range_lookup_array = np.empty(len(lookup) + 1, dtype=object)
+        self._range_lookup_array[:-1] = lookup
+        self._range_index_dirty = False
+
+    def _warn_overlapping_ranges(self) -> None:
+        """Logs a warning if ranges in the format overlap.
+
+        Only called when a format is built from its content or loaded from a file,
+        not when the range index is rebuilt, so changing a format key by key does not flood the log.
+        """
+        overlapping = []
+        highest_top: float | None = None
+        highest_key = ""
+        for key, (bottom, top, _) in sorted(
+            self._range_bounds.items(), key=lambda x: x[1][0]
+        ):
+            if highest_top is not None and bottom <= highest_top:
+                overlapping.append(f"{highest_key} and {key}")
+            if highest_top is None or top > highest_top:
+                highest_top, highest_key = top, key
+        if overlapping:
+            utdanning_logger.logger.warning(
+                "Overlapping ranges in format, the first defined range is used: %s",
+                ", ".join(overlapping),
+            )
+
+    def _look_in_ranges_many(self, keys: np.ndarray) -> np.ndarray:
+        """Looks for an array of floats within the stored ranges, using a single search of the sorted index.
+
+        Args:
+            keys (np.ndarray): Float-array of the keys to search for, NaN never matches a range.
+
+        Returns:
+            np.ndarray: Object-array with the value of the range containing each key, None if not in any range.
+        """
+        if self._range_index_dirty:
+            self._build_range_index()
+        positions = np.searchsorted(self._range_edges_array, keys, side="right") - 1
+        positions[(positions < 0) | np.isnan(keys)] = -1
+        result: np.ndarray = self._range_lookup_array[positions]
+        return result
+
+
+class UtdFormat(dict[Any, Any], _FormatLookups):
     """Custom dictionary class designed to handle specific formatting conventions."""
 
-    def __init__(self, start_dict: UTDFORMAT_INPUT_TYPE | None = None) -> None:
+    def __init__(
+        self,
+        start_dict: UTDFORMAT_INPUT_TYPE | None = None,
+        cache_maxsize: int | None = None,
+    ) -> None:
         """Initializes the UtdFormat instance.
 
         Args:
             start_dict (dict, optional): Initial dictionary to populate UtdFormat.
+            cache_maxsize (int | None): Max number of looked up keys to remember when cached is True.
+                Defaults to FORMAT_CACHE_MAXSIZE from the config.
         """
         super(dict, self).__init__()
-        self.cached = True  # Switching the default to False, will f-up __setitem__
+        self.cached = True
+        if cache_maxsize is None:
+            cache_maxsize = config.FORMAT_CACHE_MAXSIZE
+        self.cache_maxsize = cache_maxsize
+        self._cache: OrderedDict[Any, Any] = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._range_bounds: dict[str, tuple[float, float, Any]] = {}
+        self._na_keys: dict[Any, None] = {}
+        self.na_value: Any = None
         if start_dict:
             for k, v in start_dict.items():
                 dict.__setitem__(self, k, v)
 
         self.update_format()
+        # Made from another format, like by freeze(), it was warned about when that one was built
+        if not isinstance(start_dict, _FormatLookups):
+            self._warn_overlapping_ranges()
 
     def update_format(self) -> None:
-        """Update method to set special instance attributes."""
+        """Update method to set special instance attributes, rebuilding them from all the keys in the format."""
+        self.set_other_as_lowercase()
+        self._na_keys = {key: None for key in self if self.check_if_na(key)}
         self.set_na_value()
         self.store_ranges()
-        self.set_other_as_lowercase()
+        self.cache_clear()
+
+    def update_many(
+        self, items: UTDFORMAT_INPUT_TYPE | Iterable[tuple[Any, Any]]
+    ) -> None:
+        """Sets many keys at once, rebuilding the ranges, NA-value and "other" only once at the end.
+
+        Args:
+            items (dict | Iterable[tuple[Any, Any]]): The keys and values to set, as a dict or as pairs.
+        """
+        if isinstance(items, Mapping):
+            items = items.items()
+        for key, value in items:
+            dict.__setitem__(self, key, value)
+        self.update_format()
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        """Overrides the 'update' method of dictionary, to keep the ranges, NA-value and "other" up to date.
+
+        Args:
+            *args: A dict or an iterable of key-value pairs, like dict.update takes.
+            **kwargs: Keys and values to set.
+        """
+        self.update_many(dict(*args, **kwargs))
 
     def __setitem__(self, key: str | int | float | NAType | None, value: Any) -> None:
         """Overrides the '__setitem__' method of dictionary to perform custom actions on setting items.
 
+        The ranges, NA-value and "other" are updated for the single key, not rebuilt from the whole format.
+
         Args:
             key: Key of the item to be set.
             value: Value to be set for the corresponding key.
         """
-        if self.cached:
-            dict.__setitem__(self, key, value)
-            if isinstance(key, str):
-                if "-" in key and key.count("-") == 1:
-                    self.store_ranges()
-                if key.lower() == "other" and key != "other":
-                    self.set_other_as_lowercase()
-            if self.check_if_na(key):
-                self.set_na_value()
+        if isinstance(key, str) and key != "other" and key.lower() == "other":
+            key = "other"
+        dict.__setitem__(self, key, value)
+        if isinstance(key, str) and "-" in key and key.count("-") == 1:
+            self._range_to_floats(key, value)
+            self._range_index_dirty = True
+        if self.check_if_na(key):
+            self._na_keys[key] = None
+            self.set_na_value()
+        self.cache_clear()
+
+    def __delitem__(self, key: str | int | float | NAType | None) -> None:
+        """Overrides the '__delitem__' method of dictionary, to keep the ranges and NA-value up to date.
+
+        Args:
+            key: Key of the item to delete.
+        """
+        dict.__delitem__(self, key)
+        if isinstance(key, str) and key in self._range_bounds:
+            del self._range_bounds[key]
+            self._range_index_dirty = True
+        if key in self._na_keys:
+            del self._na_keys[key]
+            self.set_na_value()
+        self.cache_clear()
+
+    def pop(self, key: Any, *default: Any) -> Any:
+        """Overrides the 'pop' method of dictionary, to keep the ranges and NA-value up to date.
+
+        Args:
+            key: Key of the item to remove.
+            *default: Returned if the key is not in the format.
+
+        Returns:
+            Any: The value of the removed key, or the default.
+
+        Raises:
+            KeyError: If the key is not in the format, and no default is given.
+        """
+        if not dict.__contains__(self, key):
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = dict.__getitem__(self, key)
+        del self[key]
+        return value
+
+    def popitem(self) -> tuple[Any, Any]:
+        """Overrides the 'popitem' method of dictionary, to keep the ranges and NA-value up to date.
+
+        Returns:
+            tuple[Any, Any]: The last inserted key and its value.
+
+        Raises:
+            KeyError: If the format is empty.
+        """
+        if not self:
+            raise KeyError("popitem(): format is empty")
+        key = next(reversed(self.keys()))
+        return key, self.pop(key)
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        """Overrides the 'setdefault' method of dictionary, to keep the ranges and NA-value up to date.
+
+        Args:
+            key: Key to look for.
+            default: Value to set, if the key is not in the format.
+
+        Returns:
+            Any: The value of the key.
+        """
+        if not dict.__contains__(self, key):
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def clear(self) -> None:
+        """Overrides the 'clear' method of dictionary, to reset the ranges and NA-value."""
+        dict.clear(self)
+        self.update_format()
 
     def __missing__(self, key: str | int | float | NAType | None) -> Any:
         """Overrides the '__missing__' method of dictionary to handle missing keys.
 
+        If cached is True, the looked up keys are remembered in a separate cache, that never holds more than cache_maxsize keys.
+        The least recently used key is evicted first. The declared keys of the format are not part of the cache.
+
+        Args:
+            key (str | int | float | NAType | None): Key that is missing in the dictionary.
+
+        Returns:
+            Any: Value of key in any special conditions: confusion int/str, in one of the ranges, NA or if other is defined.
+        """
+        if not self.cached:
+            return self._resolve_missing(key)
+        # Keys like 1, 1.0 and True are equal in a dict, but are not resolved the same way
+        cache_key = (key.__class__, key)
+        if cache_key in self._cache:
+            self.cache_hits += 1
+            self._cache.move_to_end(cache_key)
+            return self._cache[cache_key]
+        self.cache_misses += 1
+        value = self._resolve_missing(key)
+        if self.cache_maxsize > 0:
+            self._cache[cache_key] = value
+            while len(self._cache) > self.cache_maxsize:
+                self._cache.popitem(last=False)
+        return value
+
+    def cache_info(self) -> dict[str, int]:
+        """Statistics on the cache of looked up keys.
+
+        Returns:
+            dict[str, int]: The hits, misses, maxsize and current size of the cache.
+        """
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "maxsize": self.cache_maxsize,
+            "currsize": len(self._cache),
+        }
+
+    def cache_clear(self) -> None:
+        """Empties the cache of looked up keys, the declared keys of the format are kept."""
+        self._cache.clear()
+
+    def copy(self) -> "UtdFormat":
+        """Makes a shallow copy of the format, reusing its ranges and NA-keys instead of rebuilding them.
+
+        The copy starts with an empty cache of looked up keys.
+
+        Returns:
+            UtdFormat: The copy of the format.
+        """
+        new = self.__class__.__new__(self.__class__)
+        dict.update(new, self)
+        new.__dict__.update(self.__dict__)
+        new._cache = OrderedDict()
+        new.cache_hits = 0
+        new.cache_misses = 0
+        new._range_bounds = dict(self._range_bounds)
+        new._na_keys = dict(self._na_keys)
+        return new
+
+    def _resolve_missing(self, key: str | int | float | NAType | None) -> Any:
+        """Resolves a key that is not in the dictionary, without caching the result.
+
         Args:
             key (str | int | float | NAType | None): Key that is missing in the dictionary.
 
@@ -70,35 +601,72 @@ class UtdFormat(dict[Any, Any]):
         """
         int_str_confuse = self.int_str_confuse(key)
         if int_str_confuse:
-            if self.cached:
-                self[key] = int_str_confuse
             return int_str_confuse
 
         if self.check_if_na(key) and self.set_na_value():
-            if self.cached:
-                self[key] = self.na_value
             return self.na_value
 
         key_in_range = self.look_in_ranges(key)
         if key_in_range:
-            if self.cached:
-                self[key] = key_in_range
             return key_in_range
 
         other = self.get("other", "")
         if other:
-            if self.cached:
-                self[key] = other
             return other
 
         raise ValueError(f"{key} not in format, and no other-key is specified.")
 
+    def _lookup(self, key: Any) -> Any:
+        """Looks up a single key like the dict would, without caching the result.
+
+        Args:
+            key: The key to look up.
+
+        Returns:
+            Any: The value the format gives the key.
+        """
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        return self._resolve_missing(key)
+
+    def _other_value(self) -> Any:
+        """The value of the "other"-key, given to keys not found in any other way.
+
+        Returns:
+            Any: The value of the "other"-key, an empty string if there is none.
+        """
+        return self.get("other", "")
+
+    def _declared_arrays(self) -> tuple[pd.Index, np.ndarray]:
+        """The declared keys that are not NaN or None, as an index, and their values as an array in the same order.
+
+        NA-like strings, like "." and "", are kept, as the dict finds them when they are declared.
+
+        Returns:
+            tuple[pd.Index, np.ndarray]: The object-index of the keys, and the object-array of the values.
+        """
+        declared = [
+            (k, v) for k, v in self.items() if isinstance(k, str) or not pd.isna(k)
+        ]
+        declared_index = pd.Index([k for k, _ in declared], dtype=object)
+        declared_values = np.empty(len(declared), dtype=object)
+        declared_values[:] = [v for _, v in declared]
+        return declared_index, declared_values
+
     def store_ranges(self) -> None:
-        """Stores ranges based on specified keys in the dictionary."""
-        self.ranges: dict[str, tuple[float, float]] = {}
+        """Stores ranges based on specified keys in the dictionary, and builds the index used to look in them."""
+        self._range_bounds = {}
         for key, value in self.items():
             if isinstance(key, str) and "-" in key and key.count("-") == 1:
                 self._range_to_floats(key, value)
+        self._build_range_index()
+
+    @property
+    def ranges(self) -> dict[Any, tuple[float, float]]:
+        """The stored ranges, with the value of the range as key, and the bounds as a tuple of floats."""
+        return {
+            value: (bottom, top) for bottom, top, value in self._range_bounds.values()
+        }
 
     def _range_to_floats(self, key: str, value: str) -> None:
         """Converts a range key to a tuple of floats.
@@ -119,7 +687,7 @@ class UtdFormat(dict[Any, Any]):
                 top_float = float("inf")
             else:
                 top_float = float(top)
-            self.ranges[value] = (bottom_float, top_float)
+            self._range_bounds[key] = (bottom_float, top_float, value)
 
     def look_in_ranges(self, key: str | int | float | NAType | None) -> None | str:
         """Looks for the specified key within the stored ranges.
@@ -130,15 +698,16 @@ class UtdFormat(dict[Any, Any]):
         Returns:
             The value associated with the range containing the key, if found; otherwise, None.
         """
-        if isinstance(key, str | int | float):
-            try:
-                key = float(key)
-            except ValueError:
-                return None
-            for range_key, (bottom, top) in self.ranges.items():
-                if key >= bottom and key <= top:
-                    return range_key
-        return None
+        key_float = _range_float(key)
+        if np.isnan(key_float):
+            return None
+        if self._range_index_dirty:
+            self._build_range_index()
+        position = bisect.bisect_right(self._range_edges, key_float) - 1
+        if position < 0:
+            return None
+        result: str | None = self._range_lookup[position]
+        return result
 
     def int_str_confuse(self, key: str | int | float | NAType | None) -> None | Any:
         """Handles conversion between integer and string keys.
@@ -164,26 +733,26 @@ class UtdFormat(dict[Any, Any]):
 
     def set_other_as_lowercase(self) -> None:
         """Sets the key 'other' to lowercase if mixed cases are found."""
-        found = False
-        for key in self:
-            if isinstance(key, str) and key.lower() == "other":
-                found = True
-                break
-        if found:
-            value = self[key]
-            del self[key]
-            self["other"] = value
+        mixed_case = [
+            key
+            for key in self
+            if isinstance(key, str) and key != "other" and key.lower() == "other"
+        ]
+        for key in mixed_case:
+            value = dict.pop(self, key)
+            dict.__setitem__(self, "other", value)
 
     def set_na_value(self) -> bool:
         """Sets the value for NA (Not Available) keys in the UtdFormat.
 
+        The value of the first NA-key in the format is used.
+
         Returns:
             bool: True if NA value is successfully set, False otherwise.
         """
-        for key, value in self.items():
-            if self.check_if_na(key):
-                self.na_value = value
-                return True
+        for key in self._na_keys:
+            self.na_value = dict.__getitem__(self, key)
+            return True
         self.na_value = None
         return False
 
@@ -200,7 +769,7 @@ class UtdFormat(dict[Any, Any]):
         if pd.isna(key):
             return True
         if isinstance(key, str):
-            if key in [".", "none", "None", "", "NA", "<NA>", "<NaN>", "nan", "NaN"]:
+            if key in NA_STRINGS:
                 return True
         return False
 
@@ -212,115 +781,747 @@ class UtdFormat(dict[Any, Any]):
     ) -> None:
         """Stores the UtdFormat instance in a specified output path.
 
+        Only the declared keys are stored, keys remembered by the cache of looked up keys are never stored.
+
         Args:
             format_name (str): Name of the format to be stored.
             output_path (str): Path where the format will be stored.
-            force (bool): Flag to force storing even for cached instances.
-
-        Raises:
-            ValueError: If storing a cached UtdFormat might lead to an unexpectedly large number of keys.
+            force (bool): Not in use anymore, as the cached keys are kept apart from the format. Kept for backwards compatibility.
         """
         if not isinstance(output_path, Path):
             output_path = Path(output_path)
-        if self.cached and not force:
-            error_msg = """Storing a cached UtdFormat might lead to many more keys than you want.
-            Please check the amount of keys before storing.
-            You can reopen the dict, set it as False on .cached, then store again, or send force=True to the store method."""
-            raise ValueError(error_msg)
         store_format_prod({format_name: self}, output_path)
 
+    def freeze(self) -> "FrozenUtdFormat":
+        """Makes an immutable, compiled copy of the format, for fast lookups when the format will not change anymore.
 
-def info_stored_formats(
-    select_name: str = "", path_prod: str | Path = FORMATS_PATH
-) -> pd.DataFrame:
-    """In Prodsone, list all json-format-files in format folder.
-
-    Does not look at file content, only what can be extracted from the filesystem.
-    Date is parsed from filename, converting datetime strings to true datetimes as well.
-    Sorts descending by name and date.
+        Returns:
+            FrozenUtdFormat: The frozen format, giving the same values as this format.
+        """
+        return FrozenUtdFormat(self)
 
-    Args:
-        select_name (str): Name of the specific format to select information for.
-        path_prod (str): Path to the directory containing stored format files. Set to a default of "/ssb/stamme01/utd/utd-felles/formater/"
 
-    Returns:
-        pd.DataFrame: Information extracted from the path names.
+class FrozenUtdFormat(UtdFormat):
+    """An immutable UtdFormat, with the lookups of missing keys compiled ahead of time.
 
-    Raises:
-        OSError: If the specified path_prod directory does not exist.
+    Gives the same values as the UtdFormat it was made from, and is safe to share between threads.
+    It remembers the missing keys it has resolved, in a dict that is only ever added to, up to a max size.
+    The writes are not locked: a single get or set on a dict is atomic in CPython,
+    and two threads resolving the same key both store the same value, so no lookup can see a wrong one.
+    It is hashable, and pickles as a plain dict, so it is cheap to send to worker processes.
+    Usually made by calling freeze() on a UtdFormat.
     """
-    if not isinstance(path_prod, Path):
-        path_prod = Path(path_prod)
-    if not os.path.isdir(path_prod):
-        raise OSError(f"Cant find folder {path_prod}")
-    all_paths = glob.glob(str(path_prod) + "/*.json")
-    all_names = [
-        "_".join(os.path.split(p)[1].split(".")[0].split("_")[:-1]) for p in all_paths
-    ]
-    all_dates_original = [
-        os.path.split(p)[1].split(".")[0].split("_")[-1] for p in all_paths
-    ]
-    all_dates_datetime = [
-        datetime.datetime.strptime(d, DATETIME_FORMAT) for d in all_dates_original
-    ]
-    df_info = pd.DataFrame(
-        {
-            "name": all_names,
-            "date_original": all_dates_original,
-            "date_datetime": all_dates_datetime,
-            "path": all_paths,
-        }
-    ).sort_values(["name", "date_datetime"])
-
-    if select_name:
-        df_info = df_info[df_info["name"] == select_name]
-    return df_info
 
+    def __init__(self, start_dict: UTDFORMAT_INPUT_TYPE | None = None) -> None:
+        """Initializes the FrozenUtdFormat instance, and compiles the lookups.
 
-def get_path(name: str, date: str = "latest") -> str | None:
-    """Retrieves the path for a specific format on a given date.
+        Args:
+            start_dict (dict, optional): The format content, usually a UtdFormat.
+        """
+        super().__init__(start_dict, cache_maxsize=0)
+        self.cached = False
+        self._str_keys_by_int: dict[int, Any] = {}
+        for key, value in self.items():
+            if isinstance(key, str) and value:
+                try:
+                    int_key = int(key)
+                except ValueError:
+                    continue
+                if str(int_key) == key:
+                    self._str_keys_by_int[int_key] = value
+        self._has_na_value = bool(self._na_keys)
+        self._other = dict.get(self, "other", "")
+        self._declared = UtdFormat._declared_arrays(self)
+        self._hash: int | None = None
+        self._memo: dict[Any, Any] = {}
+        self._memo_maxsize = config.FORMAT_CACHE_MAXSIZE
 
-    Args:
-        name (str): Name of the format.
-        date (str): Date string to find the path for. Defaults to "latest". If a datetime string, the format with the closest date will be returned.
+    def __missing__(self, key: str | int | float | NAType | None) -> Any:
+        """Resolves a key not in the format, remembering up to FORMAT_CACHE_MAXSIZE of the resolved keys.
 
-    Returns:
-        str: The path associated with the specified format and date, if found; otherwise, None.
-    """
-    utdanning_logger.logger.info("Finding path from date: %s", date)
-    if date != "latest":
-        date_time = dateutil.parser.parse(date)
-    elif date == "latest":
-        date_time = datetime.datetime.now()
-    df_info = info_stored_formats(name)
-    df_info = df_info.sort_values("date_datetime", ascending=False)
-    if len(df_info):
-        for _, row in df_info.iterrows():
-            utdanning_logger.logger.info(
-                "%s %s", str(row["date_datetime"]), str(date_time)
-            )
-            if row["date_datetime"] < date_time:
-                format_date = row["date_datetime"]
-                break
-        get_path: str = df_info[df_info["date_datetime"] == format_date]["path"].iloc[0]
-        return get_path
-    return None
+        The remembered keys are never evicted or reordered, so looking up keys from several threads is safe.
 
+        Args:
+            key (str | int | float | NAType | None): Key that is missing in the dictionary.
 
-def get_format(
-    name: str = "", date: str = "latest", filepath: str | Path | None = ""
-) -> UtdFormat | None:
-    """Retrieves the format from a json-format-file, dependent on the name (start of filename).
+        Returns:
+            Any: Value of key in any special conditions: confusion int/str, in one of the ranges, NA or if other is defined.
+        """
+        # Keys like 1, 1.0 and True are equal in a dict, but are not resolved the same way
+        memo_key = (key.__class__, key)
+        value = self._memo.get(memo_key, _NOT_FOUND)
+        if value is _NOT_FOUND:
+            value = self._resolve_missing(key)
+            if len(self._memo) < self._memo_maxsize:
+                self._memo[memo_key] = value
+        return value
 
-    Args:
-        name (str): Name of the format.
-        date (str): Date string to find the format for. Defaults to "latest". If a datetime string, the format with the closest date will be returned.
-        filepath (str): Send in the full path to the format directly, this will ignore the name and date args.
+    def _resolve_missing(self, key: str | int | float | NAType | None) -> Any:
+        """Resolves a key not in the format, in the same order as UtdFormat, using the precompiled lookups.
 
-    Returns:
-        dict or defaultdict: The formatted dictionary or defaultdict for the specified format and date. If the format contains a "other" key, a defaultdict will be returned. If the
-            format contains the SAS-value for missing: ".", or another recognized "empty-datatype":
-            Many known keys for empty values, will be inserted in the dict, to hopefully map these correctly.
+        Args:
+            key (str | int | float | NAType | None): Key that is missing in the dictionary.
+
+        Returns:
+            Any: Value of key in any special conditions: confusion int/str, in one of the ranges, NA or if other is defined.
+
+        Raises:
+            ValueError: If the key is not found in the format and no 'other' key is specified.
+        """
+        if isinstance(key, str):
+            try:
+                int_key = int(key)
+            except ValueError:
+                pass
+            else:
+                if dict.__contains__(self, int_key):
+                    value = dict.__getitem__(self, int_key)
+                    if value:
+                        return value
+        elif type(key) is int:
+            value = self._str_keys_by_int.get(key)
+            if value:
+                return value
+        elif isinstance(key, int):
+            value = dict.get(self, str(key))
+            if value:
+                return value
+
+        if self._has_na_value and self.check_if_na(key):
+            return self.na_value
+
+        key_in_range = self.look_in_ranges(key)
+        if key_in_range:
+            return key_in_range
+
+        if self._other:
+            return self._other
+
+        raise ValueError(f"{key} not in format, and no other-key is specified.")
+
+    def _declared_arrays(self) -> tuple[pd.Index, np.ndarray]:
+        """The precompiled declared keys and values, see UtdFormat._declared_arrays.
+
+        Returns:
+            tuple[pd.Index, np.ndarray]: The object-index of the keys, and the object-array of the values.
+        """
+        return self._declared
+
+    def _other_value(self) -> Any:
+        """The precompiled value of the "other"-key.
+
+        Returns:
+            Any: The value of the "other"-key, an empty string if there is none.
+        """
+        return self._other
+
+    def freeze(self) -> "FrozenUtdFormat":
+        """The format is already frozen.
+
+        Returns:
+            FrozenUtdFormat: The format itself.
+        """
+        return self
+
+    def copy(self) -> "FrozenUtdFormat":
+        """The format can not be changed, so there is no need to copy it.
+
+        Returns:
+            FrozenUtdFormat: The format itself.
+        """
+        return self
+
+    def __hash__(self) -> int:  # type: ignore[override]
+        """Hashes the content of the format, calculated once.
+
+        Returns:
+            int: The hash of the keys and values in the format.
+        """
+        if self._hash is None:
+            self._hash = hash(frozenset(self.items()))
+        return self._hash
+
+    def __reduce__(self) -> tuple[type["FrozenUtdFormat"], tuple[dict[Any, Any]]]:
+        """Pickles the format as a plain dict, the lookups are compiled again when unpickled.
+
+        Returns:
+            tuple: The class and the arguments to recreate the format.
+        """
+        return (self.__class__, (dict(self),))
+
+    def _immutable(self, *args: Any, **kwargs: Any) -> None:
+        """Stops any changes to the format.
+
+        Args:
+            *args: Ignored.
+            **kwargs: Ignored.
+
+        Raises:
+            TypeError: Always, the format is frozen.
+        """
+        raise TypeError(
+            "A FrozenUtdFormat can not be changed, make a new UtdFormat from it to change it."
+        )
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        """Stops any changes to the format.
+
+        Args:
+            key: Ignored.
+            value: Ignored.
+        """
+        self._immutable()
+
+    def __delitem__(self, key: Any) -> None:
+        """Stops any changes to the format.
+
+        Args:
+            key: Ignored.
+        """
+        self._immutable()
+
+    update = _immutable
+    update_many = _immutable
+    pop = _immutable
+    popitem = _immutable  # type: ignore[assignment]
+    setdefault = _immutable
+    clear = _immutable
+
+
+class ColumnarUtdFormat(_FormatLookups):
+    """A read-only format kept as arrays of its keys and values, instead of as a dict.
+
+    Gives the same values as the UtdFormat with the same content, when applied to columns or looking up single keys.
+    Usually read from the columnar file stored next to the json-file of a big format, see get_columnar_format,
+    which is much faster than parsing the json-file and building the dict.
+    """
+
+    def __init__(
+        self,
+        keys: pa.Array,
+        values: pa.Array,
+        range_bounds: Mapping[str, tuple[float, float]] | None = None,
+    ) -> None:
+        """Initializes the ColumnarUtdFormat from the keys and values of a format.
+
+        The arrays are kept as they are, so arrays from a memory mapped file stay in the file,
+        and the keys are looked up with Arrow compute-functions.
+
+        Args:
+            keys (pa.Array): String-array of the distinct keys of the format, in the order of the format.
+            values (pa.Array): Array of the values, in the same order.
+            range_bounds (Mapping[str, tuple[float, float]] | None): The bottom and top of the keys that are ranges,
+                as UtdFormat.store_ranges would parse them.
+        """
+        self._keys = keys
+        self._values = values
+        na_positions = pc.indices_nonzero(
+            pc.is_in(keys, value_set=pa.array(sorted(NA_STRINGS)))
+        )
+        self._na_keys: dict[Any, Any] = dict(
+            zip(
+                keys.take(na_positions).to_pylist(),
+                values.take(na_positions).to_pylist(),
+            )
+        )
+        self.na_value: Any = next(iter(self._na_keys.values()), None)
+        other_position = self._position("other")
+        self._other = "" if other_position is None else values[other_position].as_py()
+        self._range_bounds = {}
+        if range_bounds:
+            range_values = pc.take(
+                values, pc.index_in(pa.array(list(range_bounds), pa.string()), keys)
+            ).to_pylist()
+            for (key, (bottom, top)), value in zip(range_bounds.items(), range_values):
+                self._range_bounds[key] = (bottom, top, value)
+        self._build_range_index()
+
+    @classmethod
+    def from_file(
+        cls, filepath: str | Path, memory_map: bool = True
+    ) -> "ColumnarUtdFormat":
+        """Reads the format from a columnar file.
+
+        Args:
+            filepath (str | Path): The path to the columnar file.
+            memory_map (bool): Memory map the file, instead of reading it into memory first. Defaults to True.
+
+        Returns:
+            ColumnarUtdFormat: The format stored in the file.
+        """
+        keys, values, range_bounds = read_format_table(filepath, memory_map)
+        columnar = cls(keys, values, range_bounds)
+        columnar._warn_overlapping_ranges()
+        return columnar
+
+    @classmethod
+    def from_format(cls, utd_format: UtdFormat) -> "ColumnarUtdFormat":
+        """Makes the columnar version of a UtdFormat.
+
+        Args:
+            utd_format (UtdFormat): The format to copy the keys and values of.
+
+        Returns:
+            ColumnarUtdFormat: The format kept as arrays.
+
+        Raises:
+            TypeError: If the keys are not all strings, or the values are not all of one type, like in the json-files.
+        """
+        try:
+            keys = pa.array(list(utd_format.keys()), type=pa.string())
+            values = pa.array(list(utd_format.values()))
+        except (pa.ArrowTypeError, pa.ArrowInvalid) as e:
+            raise TypeError(
+                f"Only formats with string keys, and values of one type, can be kept as arrays: {e}"
+            ) from e
+        range_bounds = {
+            key: (bottom, top)
+            for key, (bottom, top, _) in utd_format._range_bounds.items()
+        }
+        return cls(keys, values, range_bounds)
+
+    def to_utdformat(self) -> UtdFormat:
+        """Builds the UtdFormat with the same content, when the format should be changed or used as a dict.
+
+        Returns:
+            UtdFormat: The format as a dict.
+        """
+        return UtdFormat(dict(zip(self._keys.to_pylist(), self._values.to_pylist())))
+
+    def _position(self, key: str) -> int | None:
+        """Finds the position of a single key, scanning the keys instead of hashing them all.
+
+        Args:
+            key (str): The key to find.
+
+        Returns:
+            int | None: The position of the key, None if it is not declared.
+        """
+        position: int = pc.index(self._keys, pa.scalar(key, pa.string())).as_py()
+        return None if position < 0 else position
+
+    def _find_declared(self, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Finds keys among the declared keys with Arrow, only the string keys can be declared.
+
+        A few keys are found by scanning the declared keys, more by hashing them, see pyarrow.compute.index_in.
+
+        Args:
+            keys (np.ndarray): Object-array of the keys to find.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Boolean array telling which keys were found,
+                and the object-array of the values of the found keys, in the same order.
+        """
+        found = np.zeros(len(keys), dtype=bool)
+        str_rows = np.flatnonzero([isinstance(key, str) for key in keys])
+        if len(str_rows) <= _SCAN_MAX_KEYS:
+            positions = pa.array(
+                [self._position(key) for key in keys[str_rows]], pa.int64()
+            )
+        else:
+            positions = pc.index_in(
+                pa.array(keys[str_rows], pa.string()), value_set=self._keys
+            )
+        found[str_rows[positions.is_valid().to_numpy(zero_copy_only=False)]] = True
+        values: np.ndarray = pc.take(self._values, positions.drop_null()).to_numpy(
+            zero_copy_only=False
+        )
+        return found, values.astype(object, copy=False)
+
+    def set_na_value(self) -> bool:
+        """Tells if the format has a NA-key, the na_value is set when the format is made.
+
+        Returns:
+            bool: True if the format has a NA-key, False otherwise.
+        """
+        return bool(self._na_keys)
+
+    def _other_value(self) -> Any:
+        """The value of the "other"-key.
+
+        Returns:
+            Any: The value of the "other"-key, an empty string if there is none.
+        """
+        return self._other
+
+    def _lookup(self, key: Any) -> Any:
+        """Looks up a single key, in the same order as UtdFormat.
+
+        Args:
+            key: The key to look up.
+
+        Returns:
+            Any: The value the format gives the key.
+
+        Raises:
+            ValueError: If the key is not found in the format and no 'other' key is specified.
+        """
+        if UtdFormat.check_if_na(key):
+            if isinstance(key, str) and key in self._na_keys:
+                return self._na_keys[key]
+            if self.set_na_value():
+                return self.na_value
+            if self._other:
+                return self._other
+            raise ValueError(f"{key} not in format, and no other-key is specified.")
+        keys = np.empty(1, dtype=object)
+        keys[0] = key
+        return self._map_keys(keys)[0]
+
+    def __getitem__(self, key: Any) -> Any:
+        """Looks up a single key, like the UtdFormat would.
+
+        Args:
+            key: The key to look up.
+
+        Returns:
+            Any: The value the format gives the key.
+        """
+        return self._lookup(key)
+
+    def __len__(self) -> int:
+        """The number of declared keys in the format.
+
+        Returns:
+            int: The number of declared keys, including the NA-keys.
+        """
+        return len(self._keys)
+
+
+class FormatRegistry:
+    """Process-wide cache of the formats read from json-files and columnar files, so every file is only parsed once.
+
+    The formats are kept per absolute path, and revalidated by the modification time and size of the file on every lookup.
+    The least recently used formats are dropped when there are more than maxsize.
+    """
+
+    def __init__(self, maxsize: int | None = None) -> None:
+        """Initializes the empty FormatRegistry.
+
+        Args:
+            maxsize (int | None): Max number of formats to keep. Defaults to FORMAT_REGISTRY_MAXSIZE from the config.
+        """
+        if maxsize is None:
+            maxsize = config.FORMAT_REGISTRY_MAXSIZE
+        self.maxsize = maxsize
+        self._formats: OrderedDict[
+            str, tuple[tuple[int, int], UtdFormat | ColumnarUtdFormat]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, filepath: str | Path) -> FrozenUtdFormat:
+        """Gets the format stored in a json-file, only reading the file if it is new or changed since last time.
+
+        The same FrozenUtdFormat is returned to every caller, make a new UtdFormat from it to change it.
+
+        Args:
+            filepath (str | Path): The path to the json-file of the format.
+
+        Returns:
+            FrozenUtdFormat: The format stored in the file.
+        """
+        return self._get(filepath, _read_json_format)
+
+    def get_columnar(self, filepath: str | Path) -> "ColumnarUtdFormat":
+        """Gets the format stored in a columnar file, only reading the file if it is new or changed since last time.
+
+        Args:
+            filepath (str | Path): The path to the columnar file of the format.
+
+        Returns:
+            ColumnarUtdFormat: The format stored in the file.
+        """
+        return self._get(filepath, ColumnarUtdFormat.from_file)
+
+    def _get(self, filepath: str | Path, read: Callable[[str], _FormatT]) -> _FormatT:
+        """Gets the format stored in a file, reading it with the function sent in if it is new or changed.
+
+        Args:
+            filepath (str | Path): The path to the file of the format.
+            read (Callable[[str], UtdFormat | ColumnarUtdFormat]): Reads the format from the absolute path.
+
+        Returns:
+            UtdFormat | ColumnarUtdFormat: The format stored in the file.
+        """
+        path = os.path.abspath(filepath)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._formats.get(path)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                self._formats.move_to_end(path)
+                return cast(_FormatT, entry[1])
+            self.misses += 1
+
+        utd_format = read(path)
+
+        with self._lock:
+            if self.maxsize > 0:
+                self._formats[path] = (signature, utd_format)
+                self._formats.move_to_end(path)
+                while len(self._formats) > self.maxsize:
+                    self._formats.popitem(last=False)
+        return utd_format
+
+    def clear(self) -> None:
+        """Drops all the formats kept, and resets the statistics."""
+        with self._lock:
+            self._formats.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> dict[str, int]:
+        """Statistics on the formats kept.
+
+        Returns:
+            dict[str, int]: The hits, misses, maxsize and current size of the registry.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "maxsize": self.maxsize,
+            "currsize": len(self._formats),
+        }
+
+    def __len__(self) -> int:
+        """The number of formats kept.
+
+        Returns:
+            int: The number of formats kept.
+        """
+        return len(self._formats)
+
+
+FORMAT_REGISTRY = FormatRegistry()
+
+
+def _read_json_format(filepath: str) -> FrozenUtdFormat:
+    """Reads the format stored in a json-file.
+
+    Args:
+        filepath (str): The path to the json-file.
+
+    Returns:
+        FrozenUtdFormat: The format stored in the file, frozen so it can be shared by every caller.
+    """
+    with open(filepath) as format_json:
+        return FrozenUtdFormat(json.load(format_json))
+
+
+def _int_str_alternative(key: Any) -> Any:
+    """The key the int/str-confusion of UtdFormat would look for instead of the key sent in.
+
+    Args:
+        key: The original key.
+
+    Returns:
+        Any: The int-version of a str-key, the str-version of an int-key, otherwise None.
+    """
+    if isinstance(key, str):
+        try:
+            return int(key)
+        except ValueError:
+            return None
+    if isinstance(key, int):
+        return str(key)
+    return None
+
+
+def _as_mapped_values(series: pd.Series) -> pd.Series:
+    """The column as the values Series.map looks up, which for extension-columns are their numpy-values, like NaN for a missing Int64.
+
+    Categorical columns are kept as they are, only their categories are looked up.
+
+    Args:
+        series (pd.Series): The column to format.
+
+    Returns:
+        pd.Series: The column with the values to look up, with the same index and name.
+    """
+    if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and not isinstance(
+        series.dtype, pd.CategoricalDtype
+    ):
+        return pd.Series(series.to_numpy(), index=series.index, name=series.name)
+    return series
+
+
+def _factorize_by_type(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Factorizes an object-array by the type and value of its elements, so True, 1 and 1.0 get different codes.
+
+    Args:
+        values (np.ndarray): The object-array to factorize.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The codes of the elements (-1 for NA), and the object-array of the distinct values.
+    """
+    codes = np.full(len(values), -1, dtype=np.intp)
+    not_na = ~pd.isna(values)
+    typed = np.empty(int(not_na.sum()), dtype=object)
+    typed[:] = [(type(x), x) for x in values[not_na]]
+    codes[not_na], typed_uniques = pd.factorize(typed)
+    uniques = np.empty(len(typed_uniques), dtype=object)
+    uniques[:] = [x for _, x in typed_uniques]
+    return codes, uniques
+
+
+def _range_float(key: Any) -> float:
+    """Converts a key to a float the way the range-lookup of UtdFormat does.
+
+    Args:
+        key: The key to convert.
+
+    Returns:
+        float: The key as a float, NaN if it cant be compared to the ranges.
+    """
+    if isinstance(key, str | int | float):
+        try:
+            return float(key)
+        except ValueError:
+            return float("nan")
+    return float("nan")
+
+
+def info_stored_formats(
+    select_name: str = "", path_prod: str | Path = FORMATS_PATH
+) -> pd.DataFrame:
+    """In Prodsone, list all json-format-files in format folder.
+
+    Does not look at file content, only what can be extracted from the filesystem.
+    Reads the manifest of the folder instead of scanning it, see the manifest module.
+    Date is parsed from filename, converting datetime strings to true datetimes as well.
+    Sorts ascending by name and date.
+
+    Args:
+        select_name (str): Name of the specific format to select information for.
+        path_prod (str): Path to the directory containing stored format files. Set to a default of "/ssb/stamme01/utd/utd-felles/formater/"
+
+    Returns:
+        pd.DataFrame: Information extracted from the path names, and the hash of the content of each file,
+            None where the manifest does not know it yet.
+
+    Raises:
+        OSError: If the specified path_prod directory does not exist.
+    """
+    if not isinstance(path_prod, Path):
+        path_prod = Path(path_prod)
+    if not os.path.isdir(path_prod):
+        raise OSError(f"Cant find folder {path_prod}")
+    manifest = read_manifest(path_prod)
+    if select_name:
+        names = [select_name] if select_name in manifest else []
+    else:
+        names = sorted(manifest)
+    df_info = pd.DataFrame(
+        [
+            (
+                name,
+                date_original,
+                os.path.join(str(path_prod), filename),
+                hash_ or None,
+            )
+            for name in names
+            for date_original, filename, hash_ in manifest[name]
+        ],
+        columns=["name", "date_original", "path", "content_hash"],
+    )
+    df_info.insert(
+        2,
+        "date_datetime",
+        pd.to_datetime(df_info["date_original"], format=DATETIME_FORMAT),
+    )
+    return df_info
+
+
+def _date_from_arg(date: str) -> datetime.datetime:
+    """Parses the date argument of get_path and get_paths_for.
+
+    Args:
+        date (str): Date string, or "latest" for now.
+
+    Returns:
+        datetime.datetime: The parsed date.
+    """
+    if date == "latest":
+        return datetime.datetime.now()
+    date_time: datetime.datetime = dateutil.parser.parse(date)
+    return date_time
+
+
+def get_path(name: str, date: str = "latest") -> str | None:
+    """Retrieves the path for a specific format on a given date.
+
+    Args:
+        name (str): Name of the format.
+        date (str): Date string to find the path for. Defaults to "latest". If a datetime string, the format with the closest date before it will be returned.
+
+    Returns:
+        str: The path associated with the specified format and date, if found; otherwise, None.
+    """
+    utdanning_logger.logger.info("Finding path from date: %s", date)
+    return get_paths_for([name], date)[name]
+
+
+def get_paths_for(
+    names: Iterable[str], date: str = "latest", path_prod: str | Path = FORMATS_PATH
+) -> dict[str, str | None]:
+    """Retrieves the paths for many formats on a given date, all from the same snapshot of the formats folder.
+
+    Args:
+        names (Iterable[str]): Names of the formats.
+        date (str): Date string to find the paths for. Defaults to "latest". If a datetime string, the format with the closest date before it will be returned.
+        path_prod (str | Path): Path to the directory containing stored format files.
+
+    Returns:
+        dict[str, str | None]: The path for each name, None for the names with no format stored before the date.
+
+    Raises:
+        OSError: If the specified path_prod directory does not exist.
+    """
+    if not os.path.isdir(path_prod):
+        raise OSError(f"Cant find folder {path_prod}")
+    date_time = _date_from_arg(date)
+    manifest = read_manifest(path_prod)
+    # The timestamps in the manifest are sorted strings with whole seconds.
+    # A timestamp equal to the date in whole seconds is only before it, if the date has a fraction of a second.
+    date_original = date_time.strftime(DATETIME_FORMAT)
+    search = bisect.bisect_right if date_time.microsecond else bisect.bisect_left
+
+    paths: dict[str, str | None] = {}
+    for name in names:
+        versions = manifest.get(name, [])
+        position = search(versions, date_original, key=lambda version: version[0]) - 1
+        if position < 0:
+            paths[name] = None
+        else:
+            paths[name] = os.path.join(str(path_prod), versions[position][1])
+    return paths
+
+
+def get_format(
+    name: str = "",
+    date: str = "latest",
+    filepath: str | Path | None = "",
+    frozen: bool = False,
+) -> UtdFormat | None:
+    """Retrieves the format from a json-format-file, dependent on the name (start of filename).
+
+    The format is parsed once per process and kept in the FORMAT_REGISTRY, every caller gets a UtdFormat of their own made from it.
+    Callers that only look up values can ask for the shared FrozenUtdFormat instead, which is not copied.
+
+    Args:
+        name (str): Name of the format.
+        date (str): Date string to find the format for. Defaults to "latest". If a datetime string, the format with the closest date will be returned.
+        filepath (str): Send in the full path to the format directly, this will ignore the name and date args.
+        frozen (bool): Get the shared FrozenUtdFormat, that can not be changed, instead of a UtdFormat of your own.
+            Skips copying, which takes time for big formats. Defaults to False.
+
+    Returns:
+        dict or defaultdict: The formatted dictionary or defaultdict for the specified format and date. If the format contains a "other" key, a defaultdict will be returned. If the
+            format contains the SAS-value for missing: ".", or another recognized "empty-datatype":
+            Many known keys for empty values, will be inserted in the dict, to hopefully map these correctly.
 
     Raises:
         ValueError: If no name or filepath is specified.
@@ -330,17 +1531,167 @@ def get_format(
     if not filepath:
         filepath = get_path(name, date)
     utdanning_logger.logger.info("Getting format from %s", filepath)
-    if filepath:
-        with open(filepath) as format_json:
-            ord_dict = json.load(format_json)
-        return UtdFormat(ord_dict)
-    return None
+    if not filepath:
+        return None
+    shared = FORMAT_REGISTRY.get(filepath)
+    if frozen:
+        return shared
+    return UtdFormat(shared)
+
+
+def get_columnar_format(
+    name: str = "", date: str = "latest", filepath: str | Path | None = ""
+) -> ColumnarUtdFormat | None:
+    """Retrieves the format as a ColumnarUtdFormat, from the columnar file next to its json-file.
+
+    The columnar file is memory mapped, and kept in the FORMAT_REGISTRY like the formats from get_format.
+    If the format was stored without a columnar file, it is made from the json-file instead, see store_format_prod.
+
+    Args:
+        name (str): Name of the format.
+        date (str): Date string to find the format for, see get_format. Defaults to "latest".
+        filepath (str): Send in the full path to the json-file or the columnar file directly, this will ignore the name and date args.
+
+    Returns:
+        ColumnarUtdFormat | None: The format for the name and date, None if there is no format for them.
+
+    Raises:
+        ValueError: If no name or filepath is specified.
+        TypeError: If there is no columnar file, and the values in the json-file are not all of one type.
+    """
+    if not name and not filepath:
+        raise ValueError("Please specify a name or filepath.")
+    if not filepath:
+        filepath = get_path(name, date)
+    if not filepath:
+        return None
+    columnar_filepath = columnar_path(filepath)
+    if columnar_filepath.exists():
+        utdanning_logger.logger.info("Getting format from %s", columnar_filepath)
+        return FORMAT_REGISTRY.get_columnar(columnar_filepath)
+    json_filepath = columnar_filepath.with_suffix(".json")
+    utdanning_logger.logger.info(
+        "No columnar file for %s, making the columnar format from the json-file",
+        json_filepath,
+    )
+    return ColumnarUtdFormat.from_format(FORMAT_REGISTRY.get(json_filepath))
+
+
+def apply_formats(
+    df: pd.DataFrame,
+    formats: Mapping[str, str | UtdFormat | ColumnarUtdFormat],
+    date: str = "latest",
+    inplace: bool = False,
+    max_workers: int | None = None,
+    return_timings: bool = False,
+    columnar: bool = False,
+) -> pd.DataFrame | tuple[pd.DataFrame, dict[str, float]]:
+    """Applies many formats to many columns of a DataFrame in one call, see UtdFormat.apply.
+
+    Every format name is only loaded once with get_format, or get_columnar_format if columnar is True.
+    Columns using the same format share the lookups: the distinct values of all of them are formatted together, once.
+    The columns are split into distinct values and rebuilt on a thread pool.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the columns to format.
+        formats (Mapping[str, str | UtdFormat | ColumnarUtdFormat]): The column names as keys, and the format names or formats to apply to them as values.
+        date (str): Date string to find the formats by name for, see get_format. Defaults to "latest".
+        inplace (bool): Replace the columns in the DataFrame sent in, instead of in a copy of it. Defaults to False.
+        max_workers (int | None): Maximum number of threads to use, passed on to ThreadPoolExecutor.
+        return_timings (bool): Also return the seconds spent on each column, including the lookups shared with other columns. Defaults to False.
+        columnar (bool): Load the format names from their columnar files, which is faster for big formats. Defaults to False.
+
+    Returns:
+        pd.DataFrame | tuple[pd.DataFrame, dict[str, float]]: The DataFrame with the formatted columns,
+            and the timings per column if return_timings is True.
+
+    Raises:
+        KeyError: If a column is not in the DataFrame.
+        ValueError: If no format is found for a format name.
+    """
+    missing_cols = [col for col in formats if col not in df.columns]
+    if missing_cols:
+        raise KeyError(f"Columns not in the DataFrame: {missing_cols}")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Load every format name once
+        names = {fmt for fmt in formats.values() if isinstance(fmt, str)}
+
+        def load(name: str) -> UtdFormat | ColumnarUtdFormat | None:
+            if columnar:
+                return get_columnar_format(name, date)
+            # Only looked up, so the shared format does not need copying
+            return get_format(name, date, frozen=True)
+
+        loaded: dict[str, UtdFormat | ColumnarUtdFormat] = {}
+        for name, loaded_format in zip(names, executor.map(load, names)):
+            if loaded_format is None:
+                raise ValueError(f"No format found for {name} at {date}.")
+            loaded[name] = loaded_format
+        col_formats: dict[str, UtdFormat | ColumnarUtdFormat] = {
+            col: loaded[fmt] if isinstance(fmt, str) else fmt
+            for col, fmt in formats.items()
+        }
+        cols_by_format: dict[int, list[str]] = {}
+        for col, fmt in col_formats.items():
+            cols_by_format.setdefault(id(fmt), []).append(col)
+
+        timings: dict[str, float] = {}
+
+        lookup_cols = {col: _as_mapped_values(df[col]) for col in col_formats}
+
+        def split_col(col: str) -> tuple[np.ndarray, np.ndarray]:
+            start = time.perf_counter()
+            result = UtdFormat._distinct_keys(lookup_cols[col])
+            timings[col] = time.perf_counter() - start
+            return result
+
+        split = dict(zip(col_formats, executor.map(split_col, col_formats)))
+
+        def map_shared(cols: list[str]) -> tuple[pd.Index, np.ndarray]:
+            start = time.perf_counter()
+            shared_keys = pd.Index(
+                np.concatenate([split[col][1] for col in cols]), dtype=object
+            ).unique()
+            mapped = col_formats[cols[0]]._map_keys(shared_keys.to_numpy())
+            elapsed = time.perf_counter() - start
+            for col in cols:
+                timings[col] += elapsed
+            return shared_keys, mapped
+
+        shared = dict(
+            zip(cols_by_format, executor.map(map_shared, cols_by_format.values()))
+        )
+
+        def build_col(col: str) -> pd.Series:
+            if not len(df):
+                return df[col].copy()
+            start = time.perf_counter()
+            codes, keys = split[col]
+            shared_keys, shared_mapped = shared[id(col_formats[col])]
+            mapped = shared_mapped.take(
+                shared_keys.get_indexer(pd.Index(keys, dtype=object))
+            )
+            result = col_formats[col]._from_mapped(lookup_cols[col], codes, mapped)
+            timings[col] += time.perf_counter() - start
+            return result
+
+        results = dict(zip(col_formats, executor.map(build_col, col_formats)))
+
+    if not inplace:
+        df = df.copy(deep=False)
+    for col, result in results.items():
+        df[col] = result
+    if return_timings:
+        return df, timings
+    return df
 
 
 def store_format_prod(
     formats: dict[str, UtdFormat] | UtdFormat,
     output_path: str | Path = FORMATS_PATH,
-) -> None:
+    columnar: bool | None = None,
+) -> list[str]:
     """Takes a nested or unnested dictionary and saves it to prodsone-folder as a timestamped json.
 
     Args:
@@ -349,6 +1700,11 @@ def store_format_prod(
             The values of the dictionary are the dict contents of the formats.¨
             If unnested, we assume, this is a single format, and we ask for the name using input().
         output_path (str): Path to store the format data. Not including the filename itself, only the base folder. Defaults to FORMATS_PATH.
+        columnar (bool | None): Also store a columnar file next to the json-file, for get_columnar_format.
+            Defaults to None, storing it for formats with at least FORMAT_COLUMNAR_MIN_KEYS keys.
+
+    Returns:
+        list[str]: The names of the formats stored, the ones that were not different from last time are left out.
 
     Raises:
         NotImplementedError: If the provided formats structure is neither nested nor unnested dictionaries of strings.
@@ -364,44 +1720,87 @@ def store_format_prod(
         raise NotImplementedError("Expecting a nested or unnested dict of strings.")
 
     now = datetime.datetime.now().isoformat("T", "seconds").replace(":", "-")
+    to_store: dict[str, UtdFormat] = {}
     if nested:
-        formats_nested: dict[str, UtdFormat] = formats
-        for format_name, format_content in formats_nested.items():
-            if is_different_from_last_time(format_name, format_content):
-                with open(
-                    output_path / (format_name + "_" + now + ".json"), "w"
-                ) as json_file:
-                    json.dump(format_content, json_file)
+        to_store = formats
     elif not nested and isinstance(formats, UtdFormat):
-        format_not_nested: UtdFormat = formats
-        if is_different_from_last_time(format_name, format_not_nested):
-            with open(
-                output_path / (format_name + "_" + now + ".json"), "w"
-            ) as json_file:
-                json.dump(format_not_nested, json_file)
+        to_store = {format_name: formats}
+    # All the formats are checked against the same snapshot of the folder
+    manifest = read_manifest(output_path)
+    stored_hashes: dict[str, str] = {}
+    stored_names: list[str] = []
+    for format_name, format_content in to_store.items():
+        if is_different_from_last_time(
+            format_name, format_content, output_path, manifest
+        ):
+            filename = format_name + "_" + now + ".json"
+            with open(output_path / filename, "w") as json_file:
+                json.dump(format_content, json_file)
+            if columnar or (
+                columnar is None
+                and len(format_content) >= config.FORMAT_COLUMNAR_MIN_KEYS
+            ):
+                _store_columnar(output_path / filename)
+            stored_hashes[filename] = content_hash(format_content)
+            stored_names.append(format_name)
+    if stored_hashes:
+        update_manifest(output_path, stored_hashes)
+    return stored_names
 
 
-def is_different_from_last_time(format_name: str, format_content: UtdFormat) -> bool:
+def _store_columnar(json_path: Path) -> None:
+    """Stores the columnar file of a format next to its json-file, from the content as it was stored in the json-file.
+
+    Formats that are not all strings can not be stored as columnar files, and are logged as a warning.
+
+    Args:
+        json_path (Path): The path to the json-file of the format.
+    """
+    stored = _read_json_format(str(json_path))
+    range_bounds = {
+        key: (bottom, top) for key, (bottom, top, _) in stored._range_bounds.items()
+    }
+    try:
+        write_format_table(
+            columnar_path(json_path),
+            list(stored.keys()),
+            list(stored.values()),
+            range_bounds,
+        )
+    except TypeError as e:
+        utdanning_logger.logger.warning(
+            "Not storing a columnar file for %s: %s", json_path.name, str(e)
+        )
+
+
+def is_different_from_last_time(
+    format_name: str,
+    format_content: UtdFormat,
+    path_prod: str | Path = FORMATS_PATH,
+    manifest: MANIFEST_TYPE | None = None,
+) -> bool:
     """Checks if the current format content differs from the last saved version.
 
+    Compares the content hash with the one of the last saved version in the manifest of the folder.
+    The saved format is only read if the manifest does not know its hash yet, see stored_content_hash.
+
     Args:
         format_name (str): The short name of the format (first part of json-filename).
         format_content (UtdFormat): Content of the format in dictionary format to be compared against the content stored on disk.
+        path_prod (str | Path): The folder the formats are stored in. Defaults to FORMATS_PATH.
+        manifest (dict | None): A manifest of the folder already read, to check many formats against the same snapshot.
 
     Returns:
         bool: True if the current format content is different from the last saved version; otherwise, False.
     """
-    path_latest = get_path(format_name, date="latest")
-    utdanning_logger.logger.info("Latest path: %s", str(path_latest))
-    if path_latest:
-        path = get_path(format_name, date="latest")
-        if path:
-            with open(path) as format_json:
-                content = json.load(format_json)
-            if content != format_content:
-                return True
+    if manifest is None:
+        manifest = read_manifest(path_prod)
+    versions = manifest.get(format_name)
     # No previous format found
-    else:
+    if not versions:
+        return True
+    utdanning_logger.logger.info("Latest path: %s", str(versions[-1][1]))
+    if stored_content_hash(path_prod, versions[-1]) != content_hash(format_content):
         return True
     utdanning_logger.logger.info(
         "Content of format looks the same as previous version, not saving."
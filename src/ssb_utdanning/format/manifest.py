@@ -0,0 +1,325 @@
+"""A manifest file in the formats folder, indexing the stored formats without scanning the folder.
+
+The manifest maps every format name to its stored versions, sorted by timestamp, as
+[timestamp, filename, content hash]. The timestamps are the ones in the filenames, in the DATETIME_FORMAT.
+
+The manifest is stale when the folder has changed after it was written, which is detected from the modification times:
+after writing the manifest, its modification time is set to the folder's, and adding or removing files later moves the folder's forward.
+A stale manifest is rebuilt from the names of the files alone, the files are not opened.
+The content hashes are only known for the files stored through store_format_prod, the others are an empty string,
+and are calculated when they are needed to compare a format with the stored one, see stored_content_hash.
+
+Like the version index of the paths, a manifest built from a folder changed in the last couple of seconds is marked as racy,
+as a file added in the same tick of a coarse filesystem clock would not move the modification time of the folder.
+A racy manifest is only kept in memory for a moment, for the calls made right after each other,
+and is built again from the files after that, and written again once the folder has settled.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+from ssb_utdanning import utdanning_logger
+from ssb_utdanning.config import DATETIME_FORMAT
+
+MANIFEST_FILENAME = ".manifest.json"
+MANIFEST_ENTRY = list[str]
+MANIFEST_TYPE = dict[str, list[MANIFEST_ENTRY]]
+
+# Folders changed more recently than this, in nanoseconds, give racy manifests
+_RACY_NS = 2 * 10**9
+# Racy manifests are kept in memory this long, in nanoseconds
+_RACY_KEEP_NS = 2 * 10**8
+# Per folder: the modification time of the folder and of the manifest it was read at, the manifest,
+# and when to stop using it, None if it is used until the folder changes
+_manifests: dict[str, tuple[int, int | None, MANIFEST_TYPE, int | None]] = {}
+_manifests_lock = threading.Lock()
+# Per path: the modification time of the file the content hash was calculated at, and the hash
+_file_hashes: dict[str, tuple[int, str]] = {}
+
+
+def content_hash(content: Mapping[Any, Any]) -> str:
+    """Hashes the content of a format, as it would be stored in a json-file.
+
+    The keys are sorted, and int-keys are turned into strings like json does, so equal contents give equal hashes.
+
+    Args:
+        content (Mapping): The content of the format.
+
+    Returns:
+        str: The sha256 hexdigest of the content.
+    """
+    as_stored = json.loads(json.dumps(content))
+    canonical = json.dumps(
+        as_stored, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def split_format_filename(filename: str) -> tuple[str, str]:
+    """Splits the filename of a stored format into the format name and the timestamp.
+
+    Args:
+        filename (str): The filename, like "name_2024-01-15T12-00-00.json".
+
+    Returns:
+        tuple[str, str]: The name and the original timestamp string.
+
+    Raises:
+        ValueError: If the timestamp in the filename does not match the DATETIME_FORMAT.
+    """
+    parts = filename.split(".")[0].split("_")
+    date_original = parts[-1]
+    datetime.datetime.strptime(date_original, DATETIME_FORMAT)
+    return "_".join(parts[:-1]), date_original
+
+
+def read_manifest(folder: str | Path) -> MANIFEST_TYPE:
+    """Gets the manifest of a formats folder, rebuilding it if it is missing or stale.
+
+    The manifest is kept in memory, and only read again if the folder or the manifest file has changed.
+    A manifest written within a couple of seconds of the last change to the folder is built again from the files,
+    at most once every _RACY_KEEP_NS.
+
+    Args:
+        folder (str | Path): The formats folder.
+
+    Returns:
+        dict[str, list[list[str]]]: The format names, with their [timestamp, filename, content hash] sorted by timestamp.
+            Do not change it, it is shared with other callers.
+    """
+    folder = os.path.abspath(folder)
+    folder_mtime = os.stat(folder).st_mtime_ns
+    manifest_mtime = _manifest_mtime(folder)
+    with _manifests_lock:
+        kept = _manifests.get(folder)
+    if (
+        kept is not None
+        and kept[:2] == (folder_mtime, manifest_mtime)
+        and (kept[3] is None or time.time_ns() < kept[3])
+    ):
+        return kept[2]
+
+    if manifest_mtime is None or manifest_mtime < folder_mtime:
+        return update_manifest(folder)
+    stored = _load_manifest_file(folder)
+    if stored is None:
+        return update_manifest(folder)
+    manifest, racy = stored
+    if racy and time.time_ns() - folder_mtime > _RACY_NS:
+        return update_manifest(folder)
+    if racy:
+        # Still racy, scanning without writing, as writing would change the folder again
+        manifest, racy = _scan_folder(folder, _stored_hashes(manifest))
+    _keep_manifest(folder, folder_mtime, manifest_mtime, manifest, racy)
+    return manifest
+
+
+def update_manifest(
+    folder: str | Path, known_hashes: Mapping[str, str] | None = None
+) -> MANIFEST_TYPE:
+    """Rebuilds the manifest from the names of the json-files in the folder, and writes it atomically.
+
+    The content hashes are taken from the old manifest, from known_hashes, or from the ones calculated by stored_content_hash.
+    If the folder is not writable, like for most users of the prod-folder, the rebuilt manifest is only kept in memory.
+
+    Args:
+        folder (str | Path): The formats folder.
+        known_hashes (Mapping[str, str] | None): Content hashes of files, by filename, that the caller already knows.
+
+    Returns:
+        dict[str, list[list[str]]]: The rebuilt manifest.
+    """
+    folder = os.path.abspath(folder)
+    stored = _load_manifest_file(folder)
+    hashes = _stored_hashes(stored[0]) if stored is not None else {}
+    if known_hashes:
+        hashes.update(known_hashes)
+
+    manifest, racy = _scan_folder(folder, hashes)
+    if os.access(folder, os.W_OK):
+        try:
+            _write_manifest_file(folder, manifest, racy)
+        except OSError as e:
+            utdanning_logger.logger.warning(
+                "Couldnt write the format manifest in %s, keeping it in memory: %s",
+                folder,
+                str(e),
+            )
+    _keep_manifest(
+        folder, os.stat(folder).st_mtime_ns, _manifest_mtime(folder), manifest, racy
+    )
+    return manifest
+
+
+def stored_content_hash(folder: str | Path, entry: MANIFEST_ENTRY) -> str:
+    """The content hash of a stored format, reading the file if the manifest does not know it.
+
+    Calculated hashes are remembered in memory, and written to the manifest the next time it is rebuilt.
+
+    Args:
+        folder (str | Path): The formats folder.
+        entry (list[str]): The [timestamp, filename, content hash] of the stored format, from the manifest.
+
+    Returns:
+        str: The sha256 hexdigest of the content of the file.
+    """
+    if entry[2]:
+        return entry[2]
+    path = os.path.join(os.path.abspath(folder), entry[1])
+    mtime = os.stat(path).st_mtime_ns
+    with _manifests_lock:
+        known = _file_hashes.get(path)
+    if known is not None and known[0] == mtime:
+        return known[1]
+    with open(path) as format_json:
+        hash_ = content_hash(json.load(format_json))
+    with _manifests_lock:
+        _file_hashes[path] = (mtime, hash_)
+    return hash_
+
+
+def clear_manifest_cache() -> None:
+    """Forgets the manifests and content hashes kept in memory, they are read from disk again on next use."""
+    with _manifests_lock:
+        _manifests.clear()
+        _file_hashes.clear()
+
+
+def _keep_manifest(
+    folder: str,
+    folder_mtime: int,
+    manifest_mtime: int | None,
+    manifest: MANIFEST_TYPE,
+    racy: bool,
+) -> None:
+    """Keeps a manifest in memory, a racy one only for _RACY_KEEP_NS.
+
+    Args:
+        folder (str): The formats folder.
+        folder_mtime (int): The modification time of the folder the manifest was built or read at.
+        manifest_mtime (int | None): The modification time of the manifest file, None if there is none.
+        manifest (dict[str, list[list[str]]]): The manifest.
+        racy (bool): If the folder was changed right before the manifest was built.
+    """
+    expires = time.time_ns() + _RACY_KEEP_NS if racy else None
+    with _manifests_lock:
+        _manifests[folder] = (folder_mtime, manifest_mtime, manifest, expires)
+
+
+def _scan_folder(folder: str, hashes: dict[str, str]) -> tuple[MANIFEST_TYPE, bool]:
+    """Builds the manifest from the names of the json-files in the folder, without opening them.
+
+    Args:
+        folder (str): The formats folder.
+        hashes (dict[str, str]): Content hashes of files, by filename, already known.
+            The files without one get the hash calculated by stored_content_hash, if any, otherwise an empty string.
+
+    Returns:
+        tuple[dict[str, list[list[str]]], bool]: The manifest, and if it is racy,
+            because the folder was changed right before it was scanned.
+    """
+    folder_mtime = os.stat(folder).st_mtime_ns
+    scan_start = time.time_ns()
+    manifest: MANIFEST_TYPE = {}
+    with os.scandir(folder) as dir_entries:
+        filenames = [
+            entry.name
+            for entry in dir_entries
+            if entry.name.endswith(".json") and not entry.name.startswith(".")
+        ]
+    with _manifests_lock:
+        calculated = {
+            os.path.basename(path): hash_
+            for path, (_, hash_) in _file_hashes.items()
+            if os.path.dirname(path) == folder
+        }
+    for filename in filenames:
+        name, date_original = split_format_filename(filename)
+        hash_ = hashes.get(filename) or calculated.get(filename, "")
+        manifest.setdefault(name, []).append([date_original, filename, hash_])
+    for entries in manifest.values():
+        entries.sort()
+    return manifest, scan_start - folder_mtime <= _RACY_NS
+
+
+def _stored_hashes(manifest: MANIFEST_TYPE) -> dict[str, str]:
+    """The content hashes in a manifest, by filename.
+
+    Args:
+        manifest (dict[str, list[list[str]]]): The manifest.
+
+    Returns:
+        dict[str, str]: The content hash of every file in the manifest.
+    """
+    return {
+        filename: hash_
+        for entries in manifest.values()
+        for _, filename, hash_ in entries
+        if hash_
+    }
+
+
+def _manifest_mtime(folder: str) -> int | None:
+    """The modification time of the manifest file in the folder.
+
+    Args:
+        folder (str): The formats folder.
+
+    Returns:
+        int | None: The modification time in nanoseconds, None if there is no manifest.
+    """
+    try:
+        return os.stat(os.path.join(folder, MANIFEST_FILENAME)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _load_manifest_file(folder: str) -> tuple[MANIFEST_TYPE, bool] | None:
+    """Reads the manifest file in the folder.
+
+    Args:
+        folder (str): The formats folder.
+
+    Returns:
+        tuple[dict[str, list[list[str]]], bool] | None: The manifest, and if it is racy. None if it is missing or unreadable.
+    """
+    try:
+        with open(os.path.join(folder, MANIFEST_FILENAME)) as manifest_json:
+            stored = json.load(manifest_json)
+        manifest: MANIFEST_TYPE = stored["formats"]
+        return manifest, bool(stored.get("racy", False))
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def _write_manifest_file(folder: str, manifest: MANIFEST_TYPE, racy: bool) -> None:
+    """Writes the manifest to a temporary file, and moves it into place, so readers never see a half written manifest.
+
+    Args:
+        folder (str): The formats folder.
+        manifest (dict[str, list[list[str]]]): The manifest to write.
+        racy (bool): If the folder was changed right before it was scanned, so the manifest is built again when read.
+    """
+    file_descriptor, temp_path = tempfile.mkstemp(
+        dir=folder, prefix=MANIFEST_FILENAME, suffix=".tmp"
+    )
+    try:
+        with os.fdopen(file_descriptor, "w") as manifest_json:
+            json.dump({"formats": manifest, "racy": racy}, manifest_json)
+        manifest_path = os.path.join(folder, MANIFEST_FILENAME)
+        os.replace(temp_path, manifest_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    # Moving the manifest in changed the folder, the manifest is up to date with that change
+    folder_mtime = os.stat(folder).st_mtime_ns
+    os.utime(manifest_path, ns=(folder_mtime, folder_mtime))
@@ -0,0 +1,270 @@
+"""Reads the formats in compiled SAS format catalogs into UtdFormats, without going through the .sas scripts.
+
+A catalog (formats.sas7bcat) is read with the optional dependency pyreadstat, which gives the label of every value,
+but not the ranges. For the ranges, export the catalog in SAS with "proc format library=... cntlout=...",
+and read that dataset (.sas7bdat or .xpt) instead. It has a row per value or range, with the columns
+FMTNAME, START, END, LABEL, TYPE, HLO, SEXCL and EEXCL, which are mapped to the low/high-ranges of UtdFormat.
+
+The format names are lowercased, as SAS stores them in uppercase in the catalogs.
+"""
+
+import glob
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from ssb_utdanning import utdanning_logger
+from ssb_utdanning.config import FORMATS_PATH
+from ssb_utdanning.format.formats import UtdFormat
+from ssb_utdanning.format.formats import store_format_prod
+from ssb_utdanning.format.sas_format_parsing import _store_batch
+
+CATALOG_SUFFIX = ".sas7bcat"
+CNTLOUT_SUFFIXES = (".sas7bdat", ".xpt")
+# Format types in CNTLOUT that map values to labels, informats and picture-formats are skipped
+_CNTLOUT_LABEL_TYPES = ("N", "C")
+
+
+def read_sas_catalog(path: str | Path) -> dict[str, UtdFormat]:
+    """Reads all the formats in a SAS format catalog, or in a CNTLOUT-dataset exported from one.
+
+    Args:
+        path (str | Path): The path to the .sas7bcat catalog, or the .sas7bdat / .xpt CNTLOUT-dataset.
+
+    Returns:
+        dict[str, UtdFormat]: The format names as keys, and the formats as values.
+
+    Raises:
+        ImportError: If reading a .sas7bcat catalog, and pyreadstat is not installed.
+        ValueError: If the file is neither a catalog nor a CNTLOUT-dataset.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == CATALOG_SUFFIX:
+        try:
+            import pyreadstat
+        except ImportError as e:
+            raise ImportError(
+                "Reading .sas7bcat catalogs needs pyreadstat, install it with the extra ssb-utdanning[sas], "
+                "or export the catalog with proc format cntlout= and read that dataset instead."
+            ) from e
+        _, meta = pyreadstat.read_sas7bcat(str(path))
+        return formats_from_value_labels(meta.value_labels)
+    if suffix in CNTLOUT_SUFFIXES:
+        return formats_from_cntlout(pd.read_sas(path, encoding="latin1"))
+    raise ValueError(
+        f"Can only read {CATALOG_SUFFIX} catalogs and {CNTLOUT_SUFFIXES} CNTLOUT-datasets, you gave me {path.suffix}"
+    )
+
+
+def formats_from_value_labels(
+    value_labels: Mapping[str, Mapping[Any, str]],
+) -> dict[str, UtdFormat]:
+    """Makes UtdFormats from the value labels pyreadstat reads from a catalog.
+
+    Numeric values are read as floats, the whole numbers are turned into keys like "1", like in the .sas scripts.
+
+    Args:
+        value_labels (Mapping[str, Mapping[Any, str]]): The format names, with their values and labels.
+
+    Returns:
+        dict[str, UtdFormat]: The format names as keys, and the formats as values.
+    """
+    formats: dict[str, UtdFormat] = {}
+    for format_name, labels in value_labels.items():
+        content: dict[str, Any] = {}
+        for value, label in labels.items():
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            content[str(value).strip()] = label
+        formats[format_name.lstrip("$").lower()] = UtdFormat(content)
+    return formats
+
+
+def formats_from_cntlout(cntlout: pd.DataFrame) -> dict[str, UtdFormat]:
+    """Makes UtdFormats from a CNTLOUT-dataset, made by "proc format cntlout=" in SAS.
+
+    Ranges get keys like "1-10", with "low" and "high" for open ends, like in the .sas scripts.
+    Bounds excluded from a range ("1<-10" or "1-<10" in SAS) are moved to the next whole number,
+    as the ranges of UtdFormat include their bounds. The "other"-range gets the key "other".
+    UtdFormat only reads ranges between whole, non-negative numbers, so ranges with decimal or negative bounds
+    are left out, and logged as a warning.
+
+    Args:
+        cntlout (pd.DataFrame): The CNTLOUT-dataset, with the columns FMTNAME, START, END, LABEL and TYPE,
+            and optionally HLO, SEXCL and EEXCL.
+
+    Returns:
+        dict[str, UtdFormat]: The format names as keys, and the formats as values.
+    """
+    cntlout = cntlout.rename(columns=str.upper)
+    rows = cntlout[cntlout["TYPE"].map(_cntlout_text).isin(_CNTLOUT_LABEL_TYPES)]
+    skipped = sorted(
+        set(cntlout["FMTNAME"].map(_cntlout_text))
+        - set(rows["FMTNAME"].map(_cntlout_text))
+    )
+    if skipped:
+        utdanning_logger.logger.info(
+            "Skipping informats and picture-formats: %s", ", ".join(skipped)
+        )
+
+    def column(name: str) -> pd.Series:
+        if name not in rows.columns:
+            return pd.Series("", index=rows.index)
+        return rows[name].map(_cntlout_text)
+
+    names = column("FMTNAME").str.lstrip("$").str.lower()
+    hlo = column("HLO").str.upper()
+    other = hlo.str.contains("O", regex=False)
+    start = column("START").where(~hlo.str.contains("L", regex=False), "low")
+    end = column("END").where(~hlo.str.contains("H", regex=False), "high")
+    is_range = (start != end) & ~other
+    unsupported = is_range & ~(_whole_bound(start) & _whole_bound(end))
+    if unsupported.any():
+        utdanning_logger.logger.warning(
+            "Leaving out ranges with decimal or negative bounds, UtdFormat can not look in them: %s",
+            ", ".join(
+                names[unsupported] + ": " + start[unsupported] + "-" + end[unsupported]
+            ),
+        )
+    start = _move_excluded_bounds(start, is_range & (column("SEXCL") == "Y"), 1)
+    end = _move_excluded_bounds(end, is_range & (column("EEXCL") == "Y"), -1)
+    keys = np.where(start == end, start, start + "-" + end)
+    keys = np.where(other, "other", keys)
+
+    formats: dict[str, UtdFormat] = {}
+    for format_name, group in pd.DataFrame(
+        {"name": names, "key": keys, "label": column("LABEL")}
+    )[~unsupported].groupby("name", sort=False):
+        formats[str(format_name)] = UtdFormat(dict(zip(group["key"], group["label"])))
+    return formats
+
+
+def _cntlout_text(value: Any) -> str:
+    """Reads a cell of a CNTLOUT-dataset as text, SAS pads the values with spaces.
+
+    Args:
+        value: The cell, bytes if the dataset was read without an encoding.
+
+    Returns:
+        str: The stripped text, empty for missing cells.
+    """
+    if isinstance(value, bytes):
+        value = value.decode("latin1")
+    if pd.isna(value):
+        return ""
+    return str(value).strip()
+
+
+def _whole_bound(bounds: pd.Series) -> pd.Series:
+    """Tells which bounds of ranges UtdFormat can read, whole non-negative numbers, "low" and "high".
+
+    Args:
+        bounds (pd.Series): The bounds of the ranges, as text.
+
+    Returns:
+        pd.Series: True where the bound can be read.
+    """
+    return bounds.str.isdigit() | bounds.isin(["low", "high"])
+
+
+def _move_excluded_bounds(
+    bounds: pd.Series, excluded: pd.Series, step: int
+) -> pd.Series:
+    """Moves the excluded whole number bounds of ranges to the next whole number inside the range.
+
+    Args:
+        bounds (pd.Series): The bounds of the ranges, as text.
+        excluded (pd.Series): True where the bound is excluded from the range.
+        step (int): 1 for the bottom bounds, -1 for the top bounds.
+
+    Returns:
+        pd.Series: The bounds, with the excluded ones moved.
+    """
+    movable = excluded & bounds.str.isdigit()
+    if not excluded.equals(movable):
+        utdanning_logger.logger.warning(
+            "Excluded bounds that are not whole numbers are kept as included: %s",
+            ", ".join(bounds[excluded & ~movable]),
+        )
+    bounds = bounds.copy()
+    bounds[movable] = (bounds[movable].astype(int) + step).astype(str)
+    return bounds
+
+
+def store_sas_catalog(
+    path: str | Path, output_path: str | Path = FORMATS_PATH
+) -> list[str]:
+    """Reads all the formats in a SAS format catalog, and stores them as timestamped json-files.
+
+    Args:
+        path (str | Path): The path to the catalog or CNTLOUT-dataset, see read_sas_catalog.
+        output_path (str | Path): The path to the folder where the formats will be stored.
+            Not including the filename itself, only the base folder.
+
+    Returns:
+        list[str]: The names of the formats stored, the ones that were not different from last time are left out.
+    """
+    formats = read_sas_catalog(path)
+    if not formats:
+        return []
+    return store_format_prod(formats, output_path)
+
+
+def batch_process_folder_sascatalogs(
+    sas_catalogs_path: str | Path,
+    output_path: str | Path = FORMATS_PATH,
+    include_cntlout: bool = False,
+) -> dict[str, Any]:
+    """Finds all .sas7bcat catalogs in a folder, and stores the formats in them, like batch_process_folder_sasfiles.
+
+    All the catalogs are read first, then the formats are checked against one snapshot of the output folder,
+    and the changed ones are stored together. Catalogs that fail to read are logged and skipped.
+    Only the .sas7bcat catalogs are read by default, as folders often hold other .sas7bdat datasets too.
+
+    Args:
+        sas_catalogs_path (str | Path): The path to the folder containing the .sas7bcat catalogs.
+        output_path (str | Path): The path to the folder where the formats will be stored.
+            Not including the filename itself, only the base folder.
+        include_cntlout (bool): Also read the .sas7bdat and .xpt files in the folder, as CNTLOUT-datasets. Defaults to False.
+
+    Returns:
+        dict[str, Any]: Summary of the batch, with the same keys as batch_process_folder_sasfiles.
+    """
+    start_total = time.perf_counter()
+    suffixes = (
+        (CATALOG_SUFFIX, *CNTLOUT_SUFFIXES) if include_cntlout else (CATALOG_SUFFIX,)
+    )
+    files = sorted(
+        file
+        for suffix in suffixes
+        for file in glob.glob(str(Path(sas_catalogs_path) / f"*{suffix}"))
+    )
+    formats: dict[str, UtdFormat] = {}
+    failed: dict[str, str] = {}
+    timings: dict[str, float] = {}
+    for file in files:
+        start = time.perf_counter()
+        try:
+            formats_in_file = read_sas_catalog(file)
+        except ImportError:
+            raise
+        except Exception as e:
+            utdanning_logger.logger.warning("Couldnt read %s: %s", file, e)
+            failed[file] = f"{type(e).__name__}: {e}"
+            continue
+        finally:
+            timings[file] = time.perf_counter() - start
+        for format_name, utd_format in formats_in_file.items():
+            if format_name in formats:
+                utdanning_logger.logger.warning(
+                    "Format %s is in several catalogs, keeping the one in %s.",
+                    format_name,
+                    file,
+                )
+            formats[format_name] = utd_format
+    return _store_batch(formats, failed, timings, output_path, start_total, "catalogs")
@@ -1,31 +1,142 @@
+import concurrent.futures
 import glob
 import re
+import time
+from collections.abc import Iterator
 from pathlib import Path
+from typing import Any
+from typing import TextIO
 
 from ssb_utdanning import utdanning_logger
 from ssb_utdanning.config import FORMATS_PATH
-from ssb_utdanning.format.formats import UTDFORMAT_INPUT_TYPE
 from ssb_utdanning.format.formats import UtdFormat
+from ssb_utdanning.format.formats import store_format_prod
 
 
 def batch_process_folder_sasfiles(
-    sas_files_path: str | Path, output_path: str | Path = FORMATS_PATH
-) -> None:
+    sas_files_path: str | Path,
+    output_path: str | Path = FORMATS_PATH,
+    parallel: bool = False,
+    max_workers: int | None = None,
+) -> dict[str, Any]:
     """Finds all .sas files in folder, tries to extract formats from these.
 
+    All the scripts are parsed first, then all the formats are checked against one snapshot of the output folder,
+    and the changed ones are stored together.
+    Scripts that fail to parse are logged and skipped, the rest are still stored.
+
     Args:
         sas_files_path (str): The path to the folder containing the .sas files.
         output_path (str): The path to the folder where the formats will be stored.
             Not including the filename itself, only the base folder.
+        parallel (bool): Parse the scripts in a process pool. Defaults to False.
+        max_workers (int | None): Maximum number of processes when parallel, passed on to ProcessPoolExecutor.
+
+    Returns:
+        dict[str, Any]: Summary of the batch, with the keys:
+            "parsed", "changed" and "skipped": Lists of the format names parsed, stored because they changed, and not stored because they did not.
+            "failed": The scripts that failed to parse, with the error.
+            "timings": Seconds spent parsing each script, and in total on "parse", "store" and "total".
     """
+    start_total = time.perf_counter()
     if not isinstance(sas_files_path, Path):
         sas_files_path = Path(sas_files_path)
     if not isinstance(output_path, Path):
         output_path = Path(output_path)
 
-    for file in glob.glob(str(sas_files_path) + "/*.sas"):
-        utdanning_logger.logger.info("Processing %s.", file)
-        process_single_sasfile(file, output_path)
+    files = sorted(glob.glob(str(sas_files_path) + "/*.sas"))
+    if parallel:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_parse_sas_file, files))
+    else:
+        results = [_parse_sas_file(file) for file in files]
+
+    formats: dict[str, UtdFormat] = {}
+    failed: dict[str, str] = {}
+    timings: dict[str, float] = {}
+    for file, formats_in_file, error, seconds in results:
+        timings[file] = seconds
+        if error:
+            utdanning_logger.logger.warning("Couldnt parse %s: %s", file, error)
+            failed[file] = error
+            continue
+        for format_name, format_content in formats_in_file.items():
+            if format_name in formats:
+                utdanning_logger.logger.warning(
+                    "Format %s is in several scripts, keeping the one in %s.",
+                    format_name,
+                    file,
+                )
+            formats[format_name] = UtdFormat(format_content)
+    return _store_batch(formats, failed, timings, output_path, start_total, "scripts")
+
+
+def _store_batch(
+    formats: dict[str, UtdFormat],
+    failed: dict[str, str],
+    timings: dict[str, float],
+    output_path: str | Path,
+    start_total: float,
+    source: str,
+) -> dict[str, Any]:
+    """Stores the formats read in a batch, and sums up the batch, for the batch_process_folder_-functions.
+
+    Args:
+        formats (dict[str, UtdFormat]): The formats read from all the files.
+        failed (dict[str, str]): The files that failed to read, with the error.
+        timings (dict[str, float]): Seconds spent reading each file, one entry per file, "parse", "store" and "total" are added.
+        output_path (str | Path): The path to the folder where the formats will be stored.
+        start_total (float): The time.perf_counter() at the start of the batch.
+        source (str): What the files are, for the log, like "scripts" or "catalogs".
+
+    Returns:
+        dict[str, Any]: Summary of the batch, see batch_process_folder_sasfiles.
+    """
+    files_read = len(timings)
+    timings["parse"] = time.perf_counter() - start_total
+
+    start_store = time.perf_counter()
+    changed = store_format_prod(formats, Path(output_path)) if formats else []
+    timings["store"] = time.perf_counter() - start_store
+    timings["total"] = time.perf_counter() - start_total
+
+    changed_set = set(changed)
+    utdanning_logger.logger.info(
+        "Parsed %s formats from %s %s, stored %s changed, %s %s failed.",
+        len(formats),
+        files_read,
+        source,
+        len(changed),
+        len(failed),
+        source,
+    )
+    return {
+        "parsed": list(formats),
+        "changed": changed,
+        "skipped": [name for name in formats if name not in changed_set],
+        "failed": failed,
+        "timings": timings,
+    }
+
+
+def _parse_sas_file(file: str) -> tuple[str, dict[str, dict[str, str]], str, float]:
+    """Reads and parses a single .sas file, catching the errors, so it can be run in a process pool.
+
+    Args:
+        file (str): The path to the .sas file.
+
+    Returns:
+        tuple[str, dict[str, dict[str, str]], str, float]: The path, the formats in the file,
+            the error message if parsing failed (empty otherwise), and the seconds spent.
+    """
+    start = time.perf_counter()
+    utdanning_logger.logger.info("Processing %s.", file)
+    try:
+        with open(file, encoding="latin1") as sas_file:
+            formats_in_file = parse_sas_script(sas_file)
+    except Exception as e:
+        return file, {}, f"{type(e).__name__}: {e}", time.perf_counter() - start
+    return file, formats_in_file, "", time.perf_counter() - start
 
 
 def process_single_sasfile(
@@ -49,57 +160,190 @@ def process_single_sasfile(
     if not str(file).endswith(".sas"):
         raise ValueError("Dude, you gotta send in a .sas file.")
     with open(file, encoding="latin1") as sas_file:
-        content = sas_file.read()
-    format_content: UTDFORMAT_INPUT_TYPE
-    for format_name, format_content in parse_sas_script(content).items():
-        form = UtdFormat(format_content)
-        form.cached = False
-        form.store(format_name, output_path)
+        # Storing the formats of the script together checks them against the same snapshot of the folder
+        formats = {
+            format_name: UtdFormat(format_content)
+            for format_name, format_content in parse_sas_script(sas_file).items()
+        }
+    if formats:
+        store_format_prod(formats, output_path)
+
+
+# Patterns for the parts of a SAS script, quoted strings and comments can contain semicolons and equal-signs.
+# Written as "normal* (special normal*)*", and with comments that can not stretch past their end,
+# so a statement that is not complete yet fails fast instead of backtracking.
+# A statement starting with "*" is a comment to the next semicolon, quotes in it do not start strings.
+_COMMENT = r"/\*[^*]*\*+(?:[^/*][^*]*\*+)*/"
+_COMMENT_PATTERN = re.compile(_COMMENT)
+_LEADING_COMMENTS = r"\s*(?:" + _COMMENT + r"\s*)*"
+_STATEMENT_PATTERN = re.compile(
+    _LEADING_COMMENTS
+    + r"""\*[^;]*;|(?!"""
+    + _LEADING_COMMENTS
+    + r"""\*)[^;'"/]*(?:(?:'[^']*'|"[^"]*"|"""
+    + _COMMENT
+    + r"""|/(?!\*))[^;'"/]*)*;"""
+)
+_PROC_FORMAT_PATTERN = re.compile(_LEADING_COMMENTS + r"proc\s+format\b", re.I)
+_STATEMENT_WORD_PATTERN = re.compile(_LEADING_COMMENTS + r"(?P<word>[a-z]+)\b", re.I)
+_VALUE_HEADER_PATTERN = re.compile(
+    _LEADING_COMMENTS + r"""value\s+\$?\s*(?P<name>[^\s;=()'"/]+)\s*(?:\([^)]*\))?""",
+    re.I,
+)
+_PAIR_PATTERN = re.compile(
+    r"(?:\s+|" + _COMMENT + r")*"
+    r"""(?P<key>[^='"/]*(?:(?:'[^']*'|"[^"]*"|"""
+    + _COMMENT
+    + r"""|/(?!\*))[^='"/]*)*)=[ \t]*"""
+    r"""(?P<value>'[^']*(?:''[^']*)*'|"[^"]*(?:""[^"]*)*"|[^\n]*)"""
+)
+_STREAM_CHUNK_SIZE = 1 << 16
 
 
-def parse_sas_script(sas_script_content: str) -> dict[str, dict[str, str]]:
+def parse_sas_script(
+    sas_script_content: str | TextIO,
+) -> dict[str, dict[str, str]]:
     """Extract a format as a Python dictionary from a SAS script.
 
     Args:
-        sas_script_content (str): The content of the SAS script.
+        sas_script_content (str | TextIO): The content of the SAS script, or an open file to stream it from.
 
     Returns:
         dict[str, dict[str, str]]: A nested dictionary containing the format-name as key,
             and the format-content as value.
     """
     formats_in_file: dict[str, dict[str, str]] = {}
-    for proc_step in sas_script_content.split("proc format;")[1:]:
-        proc_step = proc_step.split("run;")[0]
-        for value_part in proc_step.split("value ")[1:]:
-            format_name, format_content = parse_value_part(value_part)
-            formats_in_file[format_name] = format_content
-    if not formats_in_file:
+    for format_name, format_content, _ in iter_sas_formats(sas_script_content):
+        formats_in_file[format_name] = format_content
+    if not formats_in_file and isinstance(sas_script_content, str):
         utdanning_logger.logger.info("%s", str(sas_script_content))
     return formats_in_file
 
 
+def iter_sas_formats(
+    sas_script: str | TextIO,
+) -> Iterator[tuple[str, dict[str, str], int]]:
+    """Reads the formats in a SAS script in a single pass, yielding them as they are found.
+
+    Only the value-statements inside proc format are read.
+    Comments, and semicolons or equal-signs inside quoted labels, are handled like SAS does.
+
+    Args:
+        sas_script (str | TextIO): The content of the SAS script, or an open file to stream it from.
+
+    Yields:
+        tuple[str, dict[str, str], int]: The format-name, the format-content, and the line number of the value-statement.
+    """
+    in_proc_format = False
+    for statement, line in _iter_statements(sas_script):
+        word_match = _STATEMENT_WORD_PATTERN.match(statement)
+        if word_match is None:
+            continue
+        word = word_match.group("word").lower()
+        if word in ("proc", "data", "run", "quit"):
+            in_proc_format = _PROC_FORMAT_PATTERN.match(statement) is not None
+        elif in_proc_format and word == "value":
+            value_line = line + statement.count("\n", 0, word_match.start("word"))
+            format_name, format_content = _parse_value_statement(statement)
+            yield format_name, format_content, value_line
+
+
 def parse_value_part(value_part: str) -> tuple[str, dict[str, str]]:
     """Parse a single "format value part" of a sas-script.
 
     Args:
-        value_part (str): The value part to parse.
+        value_part (str): The value part to parse, the text after "value " in the value-statement.
 
     Returns:
         tuple[str, dict[str, str]]: A tuple containing the format-name and the format-content.
     """
-    value_part = value_part.split(";")[0]
-    value_part = re.sub(re.compile("/\*.*?\*/", re.DOTALL), "", value_part)
-    format_content = {}
-    for line in value_part.split("\n"):
-        line = line.strip(" ")
-        if line.startswith("$") and "=" not in line and line:
-            format_name = line[1:]
-        elif line.startswith("$") is False and "=" not in line and line:
-            format_name = line
-        elif not line:
+    return _parse_value_statement("value " + value_part.split(";")[0])
+
+
+def _iter_statements(sas_script: str | TextIO) -> Iterator[tuple[str, int]]:
+    """Splits a SAS script into statements, reading an open file in chunks.
+
+    Args:
+        sas_script (str | TextIO): The content of the SAS script, or an open file to stream it from.
+
+    Yields:
+        tuple[str, int]: The text of each statement, without the semicolon, and the line number it starts on.
+    """
+    if isinstance(sas_script, str):
+        buffer = sas_script
+        more_text = False
+    else:
+        buffer = sas_script.read(_STREAM_CHUNK_SIZE)
+        more_text = bool(buffer)
+    line = 1
+    position = 0
+    while True:
+        match = _STATEMENT_PATTERN.match(buffer, position)
+        if match is not None:
+            yield buffer[position : match.end() - 1], line
+            line += buffer.count("\n", position, match.end())
+            position = match.end()
             continue
+        if not more_text:
+            break
+        # The statement continues in the text not read yet, read at least as much as is buffered to not rescan too often
+        chunk = sas_script.read(max(_STREAM_CHUNK_SIZE, len(buffer) - position))  # type: ignore[union-attr]
+        more_text = bool(chunk)
+        buffer = buffer[position:] + chunk
+        position = 0
+    # The script might end without a semicolon
+    rest = buffer[position:]
+    if not rest.strip():
+        return
+    if _STATEMENT_PATTERN.fullmatch(rest + ";") is None:
+        utdanning_logger.logger.warning(
+            "Unclosed quote or comment in the statement on line %s, the rest of the script is not read: %s",
+            line + rest.count("\n", 0, len(rest) - len(rest.lstrip())),
+            rest.strip()[:80],
+        )
+        return
+    yield rest, line
+
+
+def _parse_value_statement(statement: str) -> tuple[str, dict[str, str]]:
+    """Reads the format-name and -content of a value-statement.
+
+    Args:
+        statement (str): The text of the statement, starting with "value", without the semicolon.
+
+    Returns:
+        tuple[str, dict[str, str]]: The format-name and the format-content.
+
+    Raises:
+        ValueError: If the statement does not contain a format-name.
+    """
+    header = _VALUE_HEADER_PATTERN.match(statement)
+    if header is None:
+        raise ValueError(f"Value-statement without a format-name: {statement[:80]}")
+    format_content: dict[str, str] = {}
+    for key, value in _PAIR_PATTERN.findall(statement, header.end()):
+        # Cleaned like the format-files have always had them, see _clean_label, inlined as this is the hot loop
+        if "/*" in key:
+            key = _COMMENT_PATTERN.sub("", key)
+        key = key.replace("\t", "").strip().strip("'").strip('"')
+        if value[:1] in ("'", '"'):
+            value = value[1:-1].replace(value[0] * 2, value[0])
         else:
-            key = line.split("=")[0].replace("\t", "").strip().strip("'").strip('"')
-            value = line.split("=")[1].replace("\t", "").strip().strip("'").strip('"')
+            value = _clean_label(value)
+        if key:
             format_content[key] = value
-    return format_name, format_content
+    return header.group("name"), format_content
+
+
+def _clean_label(text: str) -> str:
+    """Cleans a key or unquoted label like the format-files have always had them, without comments, tabs, whitespace and outer quotes.
+
+    Args:
+        text (str): The raw text of the key or label.
+
+    Returns:
+        str: The cleaned text.
+    """
+    if "/*" in text:
+        text = _COMMENT_PATTERN.sub("", text)
+    return text.replace("\t", "").strip().strip("'").strip('"')
@@ -15,11 +15,15 @@ View "katalog" as an umbrella-term above these.
 from pathlib import Path
 
 # External packages
+import numpy as np
 import pandas as pd
 from cloudpathlib import GSPath
 
 # Local imports
 from ssb_utdanning import utdanning_logger
+from ssb_utdanning.data.utd_data import FILTERS_TYPE
+from ssb_utdanning.data.utd_data import OverwriteMode
+from ssb_utdanning.data.utd_data import ReadEngine
 from ssb_utdanning.data.utd_data import UtdData
 
 REQUIRED_COLS = ["username", "edited_time", "expiry_date", "validity"]
@@ -35,6 +39,11 @@ class UtdKatalog(UtdData):
         path: Path | GSPath | str = "",
         glob_pattern_latest: str = "",
         exclude_keywords: list[str] | None = None,
+        columns: list[str] | None = None,
+        filters: FILTERS_TYPE | None = None,
+        read_only: bool = False,
+        engine: str | ReadEngine = ReadEngine.pandas,
+        memory_map: bool = False,
     ) -> None:
         """Initializes a UtdKatalog instance with specified key columns and optional data parameters.
 
@@ -44,12 +53,15 @@ class UtdKatalog(UtdData):
             path (Union[Path, GSPath, str]): File path for data loading.
             glob_pattern_latest (str): Glob pattern to identify data files if path is not specific.
             exclude_keywords (list[str] | None): Keywords to exclude when searching for data files using the glob pattern.
+            columns (list[str] | None): Only load these columns, the key columns are always loaded. Defaults to all the columns.
+            filters (list | None): Only load the rows matching these filters, see UtdData.get_data.
+            read_only (bool): Skip the metadata entirely, and refuse to save, see UtdData.
+            engine (str | ReadEngine): "arrow" keeps the data read as pd.ArrowDtype columns, see UtdData.
+            memory_map (bool): Memory map local parquet-files read with the arrow engine, see UtdData.
 
         Raises:
             TypeError: If any non-string type is found within key_cols when it's provided as a list.
         """
-        super().__init__(data, path, glob_pattern_latest, exclude_keywords)
-
         if isinstance(key_cols, str):
             self.key_cols: list[str] = [key_cols]
         else:
@@ -57,6 +69,62 @@ class UtdKatalog(UtdData):
                 error_msg = "Excpecting all key_cols in iterable to be strings."
                 raise TypeError(error_msg)
             self.key_cols = key_cols
+        # The catalog cant be merged on without its key columns
+        if columns is not None:
+            columns = self.key_cols + [
+                col for col in columns if col not in self.key_cols
+            ]
+
+        super().__init__(
+            data,
+            path,
+            glob_pattern_latest,
+            exclude_keywords,
+            columns,
+            filters,
+            read_only,
+            engine,
+            memory_map,
+        )
+
+    def save(
+        self,
+        path: str | Path | GSPath = "",
+        bump_version: bool = True,
+        overwrite_mode: str | OverwriteMode = OverwriteMode.NONE,
+        save_metadata: bool = True,
+        sort_by: list[str] | None = None,
+        compression: str | None = None,
+        compression_level: int | None = None,
+        row_group_size: int | None = None,
+        use_dictionary: bool | list[str] | None = None,
+    ) -> None:
+        """Saves the catalog like UtdData.save, sorted by the key columns unless told otherwise.
+
+        Sorting by the key columns lets lookups of single keys, with filters on them, skip most of the row groups.
+
+        Args:
+            path (str | Path | GSPath): The file path where the catalog should be saved, see UtdData.save.
+            bump_version (bool): Whether to automatically increment the file version, see UtdData.save.
+            overwrite_mode (str | OverwriteMode): How to handle existing files at the target path, see UtdData.save.
+            save_metadata (bool): Whether to save metadata along with the catalog.
+            sort_by (list[str] | None): Sort the rows written by these columns. Defaults to the key columns, pass [] to not sort.
+            compression (str | None): The compression codec, see UtdData.save.
+            compression_level (int | None): The compression level of the codec, see UtdData.save.
+            row_group_size (int | None): Max rows per row group, see UtdData.save.
+            use_dictionary (bool | list[str] | None): Which columns to dictionary-encode, see UtdData.save.
+        """
+        super().save(
+            path,
+            bump_version,
+            overwrite_mode,
+            save_metadata,
+            self.key_cols if sort_by is None else sort_by,
+            compression,
+            compression_level,
+            row_group_size,
+            use_dictionary,
+        )
 
     def merge_on(
         self,
@@ -217,12 +285,33 @@ class UtdKatalog(UtdData):
             col=catalog_col_name, level=level, key_col=catalog_key_col_name
         )
         mapping_unique_vals = list(set(mapping.values()))
-        df[new_col_data_name] = df[data_key_col_name].map(mapping)
-        try:
-            series = df[new_col_data_name].copy()
-            series = series.astype(
-                pd.CategoricalDtype(categories=mapping_unique_vals, ordered=ordered)
+        key_series = df[data_key_col_name]
+        categorical_keys = isinstance(key_series.dtype, pd.CategoricalDtype)
+        if categorical_keys:
+            # Only the categories are mapped, the rows keep their codes.
+            # Code -1 (NA) picks the appended NaN at the end.
+            codes = key_series.cat.codes.to_numpy()
+            mapped_categories = np.append(
+                key_series.cat.categories.to_series().map(mapping).to_numpy(object),
+                np.nan,
             )
+        else:
+            df[new_col_data_name] = key_series.map(mapping)
+        try:
+            dtype = pd.CategoricalDtype(categories=mapping_unique_vals, ordered=ordered)
+            if categorical_keys:
+                series = pd.Series(
+                    pd.Categorical.from_codes(
+                        dtype.categories.get_indexer(
+                            pd.Index(mapped_categories, dtype=object)
+                        )[codes],
+                        categories=dtype.categories,
+                        ordered=ordered,
+                    ),
+                    index=df.index,
+                )
+            else:
+                series = df[new_col_data_name].astype(dtype)
             if remove_unused:
                 series = series.cat.remove_unused_categories()
             df[new_col_data_name] = series
@@ -232,5 +321,9 @@ class UtdKatalog(UtdData):
                 str(new_col_data_name),
                 str(e),
             )
+            if categorical_keys:
+                df[new_col_data_name] = pd.Series(
+                    mapped_categories[codes], index=df.index
+                ).infer_objects()
 
         return df
@@ -0,0 +1,101 @@
+"""An in-memory index of the versions of the datasets in a folder, so finding the latest version does not glob the folder every time.
+
+The index maps the name of every dataset, without its version number, and its suffix, to its versions sorted by number,
+as (version, filename). Like in get_similar_paths, the version is the digits the filename ends with before the suffix,
+so "data_p2024_v10.parquet" is version 10 of "data_p2024_v" with the suffix ".parquet".
+
+The index is built from one os.scandir of the folder, and kept until the modification time of the folder changes,
+which happens when files are added, removed or renamed in it.
+Folders changed in the last couple of seconds are scanned again next time,
+as a file added in the same tick of a coarse filesystem clock would not move the modification time.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from string import digits
+
+VERSION_INDEX_TYPE = dict[tuple[str, str], list[tuple[int, str]]]
+
+# Folders changed more recently than this, in nanoseconds, are not kept in memory
+_RACY_NS = 2 * 10**9
+# Per folder: the modification time of the folder it was scanned at, and the index
+_indexes: dict[str, tuple[int, VERSION_INDEX_TYPE]] = {}
+_indexes_lock = threading.Lock()
+
+
+def read_version_index(folder: str | Path) -> VERSION_INDEX_TYPE:
+    """Gets the version index of a folder, scanning the folder if it has changed since last time.
+
+    Args:
+        folder (str | Path): The folder of the datasets.
+
+    Returns:
+        dict[tuple[str, str], list[tuple[int, str]]]: The names without version numbers and the suffixes,
+            with the (version, filename) of the files sorted by version.
+            Do not change it, it is shared with other callers.
+    """
+    folder = os.path.abspath(folder)
+    folder_mtime = os.stat(folder).st_mtime_ns
+    with _indexes_lock:
+        kept = _indexes.get(folder)
+    if kept is not None and kept[0] == folder_mtime:
+        return kept[1]
+
+    scan_start = time.time_ns()
+    index: VERSION_INDEX_TYPE = {}
+    with os.scandir(folder) as dir_entries:
+        for entry in dir_entries:
+            stem, suffix = os.path.splitext(entry.name)
+            name = stem.rstrip(digits)
+            if not suffix or name == stem:
+                continue
+            index.setdefault((name, suffix), []).append(
+                (int(stem[len(name) :]), entry.name)
+            )
+    for versions in index.values():
+        versions.sort()
+    if scan_start - folder_mtime > _RACY_NS:
+        with _indexes_lock:
+            _indexes[folder] = (folder_mtime, index)
+    return index
+
+
+def similar_paths(path: str | Path) -> list[str]:
+    """Finds the other versions of a file in its folder, using the version index.
+
+    Args:
+        path (str | Path): The path to a version of the file, it does not need to exist.
+
+    Returns:
+        list[str]: The paths of all the versions of the file, sorted by version, so v10 comes after v9.
+    """
+    path = Path(path)
+    index = read_version_index(path.parent)
+    versions = index.get((path.stem.rstrip(digits), path.suffix), [])
+    return [str(path.parent / filename) for _, filename in versions]
+
+
+def latest_version_path(path: str | Path) -> str:
+    """Finds the latest version of a file in its folder, using the version index.
+
+    Args:
+        path (str | Path): The path to a version of the file, it does not need to exist.
+
+    Returns:
+        str: The path of the version with the highest number.
+
+    Raises:
+        FileNotFoundError: If there are no versions of the file in the folder.
+    """
+    paths = similar_paths(path)
+    if not paths:
+        raise FileNotFoundError(f"No versions of {path} in its folder.")
+    return paths[-1]
+
+
+def clear_version_index_cache() -> None:
+    """Forgets the version indexes kept in memory, the folders are scanned again on next use."""
+    with _indexes_lock:
+        _indexes.clear()
@@ -0,0 +1,80 @@
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from ssb_utdanning.data.dtypes import compact_dtypes
+from ssb_utdanning.data.dtypes import low_cardinality_columns
+from ssb_utdanning.data.dtypes import memory_report
+from ssb_utdanning.data.dtypes import suggest_dtype
+
+
+def test_suggest_dtype() -> None:
+    assert suggest_dtype(pd.Series([1, 2, 300])) == "int16"
+    assert suggest_dtype(pd.Series([-1, 2**40])) == "int64"
+    assert suggest_dtype(pd.Series([1, None], dtype="Int64")) == "Int8"
+    assert suggest_dtype(pd.Series([None, None], dtype="Int64")) == "Int64"
+    assert suggest_dtype(pd.Series(["a", "b"] * 5)) == "category"
+    assert suggest_dtype(pd.Series(["0301", "1103", "5001", None])) == (
+        "string[pyarrow]"
+    )
+    # Without leading zeros, or not only digits, the strings are kept as they are
+    assert suggest_dtype(pd.Series(["301", "1103", "5001"])) == "object"
+    assert suggest_dtype(pd.Series(["0301", "oslo", "5001"])) == "object"
+    assert suggest_dtype(pd.Series([1.5, 2.5])) == "float64"
+    assert suggest_dtype(pd.Series(["a", 1, "c"])) == "object"
+
+
+def test_memory_report_and_compact() -> None:
+    df = pd.DataFrame(
+        {
+            "alder": [20, 30, 40, 50] * 25,
+            "kjoenn": ["1", "2"] * 50,
+            "kommnr": [f"0{i:03}" for i in range(100)],
+            "info": [{"a": 1}] * 100,
+        }
+    )
+    report = memory_report(df)
+    assert report.index[0] == "info"
+    assert report.loc["kjoenn", "cardinality"] == 2
+    assert pd.isna(report.loc["info", "cardinality"])
+    assert report["suggested_dtype"].to_dict() == {
+        "info": "object",
+        "kommnr": "string[pyarrow]",
+        "kjoenn": "category",
+        "alder": "int8",
+    }
+    compacted = compact_dtypes(df)
+    assert compacted["alder"].dtype == "int8"
+    pd.testing.assert_frame_equal(compacted.astype(df.dtypes), df)
+    assert compacted.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum()
+    assert compact_dtypes(compacted) is compacted
+
+
+def test_low_cardinality_columns() -> None:
+    df = pd.DataFrame(
+        {
+            "orgnr": [str(i) for i in range(100)],
+            "kjoenn": [1, 2] * 50,
+            "info": [{"a": 1}] * 100,
+            "kat": pd.Categorical([str(i) for i in range(100)]),
+        }
+    )
+    assert low_cardinality_columns(df) == ["kjoenn", "kat"]
+
+
+def test_few_distinct_in_long_column() -> None:
+    # Sorted, so an evenly spread sample would only have distinct values
+    ser = pd.Series(np.repeat([f"k{i}" for i in range(10_000)], 200))
+    assert suggest_dtype(ser) == "category"
+    assert low_cardinality_columns(pd.DataFrame({"kode": ser})) == ["kode"]
+
+
+def test_mostly_distinct_not_counted_in_full() -> None:
+    ser = pd.Series([f"k{i}" for i in range(100_000)])
+    with mock.patch.object(
+        pd.Series, "nunique", autospec=True, side_effect=pd.Series.nunique
+    ) as nunique:
+        assert suggest_dtype(ser) == "object"
+    # Only the sample is counted
+    assert [len(call.args[0]) for call in nunique.call_args_list] == [10_000]
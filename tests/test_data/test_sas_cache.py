@@ -0,0 +1,114 @@
+import os
+import shutil
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+from ssb_utdanning import config
+from ssb_utdanning.data import sas_cache
+from ssb_utdanning.data.utd_data import _read_sas
+
+
+class TestSasCache(unittest.TestCase):
+    def setUp(self) -> None:
+        template_dir = Path(os.getcwd())
+        self.path = template_dir / "mock_sas_cache"
+        self.tearDown()
+        os.makedirs(self.path / "cache", exist_ok=True)
+        self.sas_path = self.path / "data_p2024_v1.sas7bdat"
+        self.sas_path.write_bytes(b"not really sas")
+        self.df = pd.DataFrame({"fnr": ["1", "2", "3"], "alder": [10, 20, 30]})
+        patcher = mock.patch.multiple(
+            config,
+            SAS_PARQUET_CACHE_DIR=str(self.path / "cache"),
+            SAS_PARQUET_CACHE_MAX_BYTES=10**9,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_disabled(self) -> None:
+        with mock.patch.object(config, "SAS_PARQUET_CACHE_DIR", ""):
+            assert sas_cache.store_in_cache(self.sas_path, self.df) is None
+            assert sas_cache.cached_path(self.sas_path) is None
+
+    def test_store_and_read(self) -> None:
+        assert sas_cache.cached_path(self.sas_path) is None
+        stored = sas_cache.store_in_cache(self.sas_path, self.df)
+        assert stored is not None
+        assert sas_cache.cached_path(self.sas_path) == stored
+        pd.testing.assert_frame_equal(pd.read_parquet(stored), self.df)
+        info = sas_cache.cache_info()
+        assert info["source"].tolist() == [str(self.sas_path.absolute())]
+
+    def test_changed_file(self) -> None:
+        old = sas_cache.store_in_cache(self.sas_path, self.df)
+        stat = os.stat(self.sas_path)
+        os.utime(self.sas_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert sas_cache.cached_path(self.sas_path) is None
+        new = sas_cache.store_in_cache(self.sas_path, self.df)
+        assert new != old
+        assert old is not None and not old.exists()
+        assert len(sas_cache.cache_info()) == 1
+
+    def test_evict_least_recently_used(self) -> None:
+        other_sas_path = self.path / "other.sas7bdat"
+        other_sas_path.write_bytes(b"not really sas either")
+        first = sas_cache.store_in_cache(self.sas_path, self.df)
+        second = sas_cache.store_in_cache(other_sas_path, self.df)
+        assert first is not None and second is not None
+        os.utime(first, ns=(0, 10**9))
+        os.utime(second, ns=(0, 2 * 10**9))
+        # Reading the first marks it as used last
+        sas_cache.cached_path(self.sas_path)
+        assert sas_cache.evict(os.stat(first).st_size) == [second]
+        assert sas_cache.clear_cache() == 1
+        assert sas_cache.cache_info().empty
+
+    def test_larger_than_cache(self) -> None:
+        other_sas_path = self.path / "other.sas7bdat"
+        other_sas_path.write_bytes(b"not really sas either")
+        kept = sas_cache.store_in_cache(other_sas_path, self.df)
+        assert kept is not None
+        with mock.patch.object(
+            config, "SAS_PARQUET_CACHE_MAX_BYTES", os.stat(kept).st_size
+        ):
+            large = pd.concat([self.df] * 1000, ignore_index=True)
+            assert sas_cache.store_in_cache(self.sas_path, large) is None
+        # Not cached, and the copies already in the cache are kept
+        assert sas_cache.cached_path(self.sas_path) is None
+        assert kept.exists()
+        assert list((self.path / "cache").rglob("*.tmp")) == []
+
+    def test_read_sas_uses_cache(self) -> None:
+        raw = pd.DataFrame({"FNR": [b"1", b"2"], "ALDER": [10.0, 20.0]})
+        with mock.patch("pandas.read_sas", return_value=raw) as read_sas:
+            first = _read_sas(self.sas_path, ["ALDER"], cache=True)
+            second = _read_sas(
+                self.sas_path, ["ALDER"], [("alder", ">", 10)], cache=True
+            )
+        read_sas.assert_called_once()
+        assert first.columns.tolist() == ["alder"]
+        assert second["alder"].tolist() == [20]
+        assert len(sas_cache.cache_info()) == 1
+
+    def test_read_sas_uppercase_filters(self) -> None:
+        raw = pd.DataFrame({"FNR": [b"1", b"2"], "ALDER": [10.0, 20.0]})
+        with mock.patch("pandas.read_sas", return_value=raw):
+            uncached = _read_sas(self.sas_path, filters=[("ALDER", ">", 10)])
+            _read_sas(self.sas_path, cache=True)
+            cached = _read_sas(self.sas_path, filters=[("ALDER", ">", 10)], cache=True)
+        assert uncached["alder"].tolist() == [20]
+        assert cached["alder"].tolist() == [20]
+
+    def test_read_sas_empty_file(self) -> None:
+        reader = mock.MagicMock()
+        reader.__enter__.return_value = iter([])
+        with mock.patch("pandas.read_sas", return_value=reader):
+            df = _read_sas(self.sas_path, ["FNR", "ALDER"])
+        assert df.empty
+        assert df.columns.tolist() == ["fnr", "alder"]
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -4,8 +4,13 @@ from ssb_utdanning import config
 config.REGION = "ON_PREM"
 
 from ssb_utdanning import UtdData
+from ssb_utdanning.data.utd_data import _align_categories
+from ssb_utdanning.data.utd_data import _filters_mask
+from ssb_utdanning.data.utd_data import _iter_sas_batches
+from ssb_utdanning.data.utd_data import _statistic_subject_mapping
 from pathlib import Path
 import unittest
+from unittest import mock
 import pandas as pd
 from create_mock_data import create_mock_data
 import shutil
@@ -152,6 +157,202 @@ class TestUtdData(unittest.TestCase):
         with self.assertRaises(AttributeError):
             data.save(path=self.path_to_file, overwrite_mode="non_existant_mode")
 
+    def test_lazy_load(self):
+        data = UtdData(path=self.path_to_file)
+        self.assertFalse(data.is_loaded)
+        self.assertIn("Data not loaded yet", str(data))
+        self.assertTrue(self.data.equals(data.data))
+        self.assertTrue(data.is_loaded)
+
+        data = UtdData(path=self.path_to_file, columns=["alder"])
+        loaded = data.load()
+        self.assertTrue(data.is_loaded)
+        self.assertEqual(list(loaded.columns), ["alder"])
+        self.assertIs(data.load(), loaded)
+
+    def test_columns_filters(self):
+        data = UtdData(
+            path=self.path_to_file,
+            columns=["alder", "BU"],
+            filters=[("alder", ">=", 40), ("BU", "in", [1, 2])],
+        )
+        expected = self.data.loc[
+            (self.data["alder"] >= 40) & self.data["BU"].isin([1, 2]), ["alder", "BU"]
+        ].reset_index(drop=True)
+        pd.testing.assert_frame_equal(data.data.reset_index(drop=True), expected)
+        # Overridden when getting the data again
+        data.get_data(
+            columns=["kjoenn"], filters=[[("alder", "<", 20)], [("BU", "==", 7)]]
+        )
+        expected = self.data.loc[
+            (self.data["alder"] < 20) | (self.data["BU"] == 7), ["kjoenn"]
+        ].reset_index(drop=True)
+        pd.testing.assert_frame_equal(data.data.reset_index(drop=True), expected)
+
+    def test_iter_batches(self):
+        data = UtdData(path=self.path_to_file)
+        batches = list(data.iter_batches(chunksize=30, filters=[("alder", ">=", 40)]))
+        self.assertFalse(data.is_loaded)
+        result = pd.concat(batches, ignore_index=True)
+        expected = self.data[self.data["alder"] >= 40].reset_index(drop=True)
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_stream_to_parquet(self):
+        data = UtdData(path=self.path_to_file)
+        out_path = data.stream_to_parquet(
+            self.path / "streamed.parquet", chunksize=30, columns=["alder", "BU"]
+        )
+        pd.testing.assert_frame_equal(
+            pd.read_parquet(out_path), self.data[["alder", "BU"]]
+        )
+
+    def test_from_glob(self):
+        self.data.to_parquet(self.path / "data_p2023-10_v1.parquet")
+        self.data.to_parquet(self.path / "data_p2023-10_v2.parquet")
+        self.data.assign(BU=self.data["BU"].astype("category")).to_parquet(
+            self.path / "data_p2024-10_v2.parquet"
+        )
+        pattern = str(self.path / "data_p*_v*.parquet")
+        df = UtdData.from_glob(pattern, columns=["alder", "BU"])
+        # Only v2 of both periods, the file from setUp is v1 of 2024-10
+        assert df["periode"].value_counts().to_dict() == {
+            pd.Timestamp("2023-10-01"): 100,
+            pd.Timestamp("2024-10-01"): 100,
+        }
+        assert df["periode"].is_monotonic_increasing
+        df_all = UtdData.from_glob(
+            pattern, latest_version_only=False, filters=[("alder", "<", 30)]
+        )
+        assert len(df_all) == 4 * (self.data["alder"] < 30).sum()
+        with self.assertRaises(FileNotFoundError):
+            UtdData.from_glob(str(self.path / "nothing_p*_v*.parquet"))
+
+    def test_from_glob_skips_undated(self):
+        self.data.to_parquet(self.path / "data_p2023-10_v1.parquet")
+        self.data.to_parquet(self.path / "data.parquet")
+        self.data.to_parquet(self.path / "data_p2022-10.parquet")
+        with self.assertLogs("ssb_utdanning.utdanning_logger", level="WARNING") as logs:
+            df = UtdData.from_glob(str(self.path / "data*.parquet"))
+        assert len(logs.output) == 2
+        assert "data.parquet" in "".join(logs.output)
+        assert set(df["periode"]) == {
+            pd.Timestamp("2023-10-01"),
+            pd.Timestamp("2024-10-01"),
+        }
+        with self.assertRaises(FileNotFoundError):
+            UtdData.from_glob(str(self.path / "data.parquet"))
+
+    def test_align_categories(self):
+        frames = [
+            pd.DataFrame({"a": pd.Categorical(["x", "y"])}),
+            pd.DataFrame({"a": pd.Categorical(["z"])}),
+        ]
+        df = pd.concat(_align_categories(frames), ignore_index=True)
+        assert isinstance(df["a"].dtype, pd.CategoricalDtype)
+        assert df["a"].tolist() == ["x", "y", "z"]
+
+    @mock.patch("ssb_utdanning.data.utd_data.StatisticSubjectMapping")
+    @mock.patch("ssb_utdanning.data.utd_data.DataDocMetadata")
+    def test_lazy_metadata(self, mock_metadata, mock_mapping):
+        _statistic_subject_mapping.cache_clear()
+        self.addCleanup(_statistic_subject_mapping.cache_clear)
+        first = UtdData(path=self.path_to_file)
+        second = UtdData(path=self.path_to_file)
+        mock_metadata.assert_not_called()
+        assert first.metadata is first.metadata
+        second.metadata
+        assert mock_metadata.call_count == 2
+        # The subject mapping and its threads are shared
+        mock_mapping.assert_called_once()
+
+    def test_read_only(self):
+        data = UtdData(path=self.path_to_file, read_only=True)
+        self.assertTrue(data.data.equals(self.data))
+        with self.assertRaises(ValueError):
+            data.metadata
+        with self.assertRaises(ValueError):
+            data.save()
+
+    def test_arrow_engine(self):
+        strings = pd.DataFrame({"orgnr": ["971526920", "974760673", None]})
+        strings.to_parquet(self.path / "orgnr_p2024-10_v1.parquet")
+        data = UtdData(
+            path=self.path / "orgnr_p2024-10_v1.parquet",
+            engine="arrow",
+            memory_map=True,
+        )
+        assert isinstance(data.data["orgnr"].dtype, pd.ArrowDtype)
+        assert data.data["orgnr"].tolist()[:2] == ["971526920", "974760673"]
+        # The table handed on holds the same buffers as the column
+        table = data.to_arrow()
+        column = data.data["orgnr"].array.__arrow_array__()
+        assert (
+            table.column("orgnr").chunk(0).buffers()[2].address
+            == column.chunk(0).buffers()[2].address
+        )
+        filtered = UtdData(
+            path=self.path_to_file, engine="arrow", filters=[("alder", ">", 60)]
+        )
+        assert filtered.data["alder"].tolist() == [
+            alder for alder in self.data["alder"] if alder > 60
+        ]
+        with self.assertRaises(ValueError):
+            UtdData(path=self.path_to_file, engine="polars")
+
+    def test_compact(self):
+        data = UtdData(path=self.path_to_file)
+        report = data.memory_report()
+        assert set(report.index) == set(self.data.columns)
+        assert data.compact() > 0
+        assert data.data["alder"].dtype == "int8"
+        with mock.patch.object(config, "DATA_COMPACT_MIN_BYTES", 1):
+            compacted = UtdData(path=self.path_to_file)
+            assert compacted.data["alder"].dtype == "int8"
+
+    def test_iter_sas_batches(self):
+        chunks = [
+            pd.DataFrame({"KJOENN": [b"1", b"2"], "ALDER": [20.0, 30.0]}),
+            pd.DataFrame({"KJOENN": [b"2", b"1"], "ALDER": [300.0, 40.0]}),
+        ]
+        reader = mock.MagicMock()
+        reader.__enter__.return_value = iter(chunks)
+        with mock.patch("pandas.read_sas", return_value=reader):
+            batches = list(
+                _iter_sas_batches(
+                    "data.sas7bdat",
+                    chunksize=2,
+                    columns=["alder"],
+                    filters=[("alder", ">", 25)],
+                )
+            )
+        # The same dtypes for all the chunks, even if the values would fit a smaller integer
+        self.assertEqual([list(batch["alder"]) for batch in batches], [[30], [300, 40]])
+        self.assertTrue(all(batch["alder"].dtype == "Float64" for batch in batches))
+
+    def test_iter_sas_batches_later_chunks_differ(self):
+        chunks = [
+            pd.DataFrame({"KOMMNR": [b"301", b"1103"], "ALDER": [20.0, 30.0]}),
+            pd.DataFrame({"KOMMNR": [b"0301", b"1103"], "ALDER": [20.5, None]}),
+        ]
+        reader = mock.MagicMock()
+        reader.__enter__.return_value = iter(chunks)
+        with mock.patch("pandas.read_sas", return_value=reader):
+            batches = list(_iter_sas_batches("data.sas7bdat", chunksize=2))
+        # Digits in the first chunk do not turn the text into numbers, and later fractions still fit
+        self.assertEqual(list(batches[1]["kommnr"]), ["0301", "1103"])
+        self.assertTrue(all(batch["kommnr"].dtype == "string" for batch in batches))
+        self.assertEqual(batches[1]["alder"].iloc[0], 20.5)
+        self.assertTrue(batches[1]["alder"].isna().iloc[1])
+
+    def test_filters_mask(self):
+        mask = _filters_mask(
+            self.data, [[("alder", "<", 20)], [("BU", "not in", [0, 1, 2, 3, 4, 5])]]
+        )
+        expected = (self.data["alder"] < 20) | (self.data["BU"] >= 6)
+        self.assertTrue(mask.equals(expected))
+        with self.assertRaises(ValueError):
+            _filters_mask(self.data, [("alder", "~", 20)])
+
     def tearDown(self) -> None:
         # Clean up test files and folders after tests
         shutil.rmtree(self.path, ignore_errors=True)
@@ -1,15 +1,22 @@
+import json
 import unittest
 import numpy as np
 import pandas as pd
 from pathlib import Path
 import os
+import pickle
 import shutil
 from unittest import mock
 from ssb_utdanning import UtdFormat
+from ssb_utdanning.format import ColumnarUtdFormat
+from ssb_utdanning.format import FrozenUtdFormat
 
 
 def mock_is_different_from_last_time(
-    format_name: str, format_content: UtdFormat
+    format_name: str,
+    format_content: UtdFormat,
+    path_prod: Path | None = None,
+    manifest: dict[str, list[list[str]]] | None = None,
 ) -> bool:
     return True
 
@@ -33,6 +40,10 @@ class TestUtdFormat(unittest.TestCase):
         }
         self.str_nan = [".", "none", "None", "", "NA", "<NA>", "<NaN>", "nan", "NaN"]
 
+    def stored_files(self) -> list[str]:
+        # The manifest of the folder is not a stored format
+        return [file for file in os.listdir(self.path) if not file.startswith(".")]
+
     def test_initialization(self) -> None:
         utd_format = UtdFormat(self.test_dict)
         # Add assertions to verify the initialization of the UtdFormat instance
@@ -78,6 +89,98 @@ class TestUtdFormat(unittest.TestCase):
         assert utd_format.look_in_ranges("18") == "ungdommer"
         assert utd_format.look_in_ranges("110") == "voksne"
 
+    def test_look_in_ranges_bounds(self) -> None:
+        utd_format = UtdFormat(self.range_dict)
+        assert utd_format.look_in_ranges("-1000") == "barn"
+        assert utd_format.look_in_ranges("10") == "barn"
+        assert utd_format.look_in_ranges("10.5") is None
+        assert utd_format.look_in_ranges("11") == "ungdommer"
+        assert utd_format.look_in_ranges(float("inf")) == "voksne"
+        assert utd_format.look_in_ranges("nan") is None
+        assert utd_format.look_in_ranges("abc") is None
+
+    def test_ranges_same_value(self) -> None:
+        utd_format = UtdFormat({"0-5": "lav", "6-10": "hoy", "11-15": "lav"})
+        assert utd_format.look_in_ranges(3) == "lav"
+        assert utd_format.look_in_ranges(13) == "lav"
+
+    def test_overlapping_ranges(self) -> None:
+        with self.assertLogs("ssb_utdanning.utdanning_logger", level="WARNING") as logs:
+            utd_format = UtdFormat({"0-10": "first", "5-15": "second"})
+        assert len(logs.output) == 1
+        assert utd_format.look_in_ranges(7) == "first"
+        assert utd_format.look_in_ranges(12) == "second"
+        # Not warned again when the range index is rebuilt
+        with self.assertNoLogs("ssb_utdanning.utdanning_logger", level="WARNING"):
+            frozen = utd_format.freeze()
+            UtdFormat(frozen)
+            for i in range(3):
+                utd_format[f"{20 + i}-{30 + i}"] = "more"
+                utd_format.look_in_ranges(25)
+        assert frozen.look_in_ranges(7) == "first"
+
+    def test_cache_bounded(self) -> None:
+        utd_format = UtdFormat(self.range_dict, cache_maxsize=2)
+        for key in ["1", "2", "1", "3"]:
+            utd_format[key]
+        info = utd_format.cache_info()
+        assert info["hits"] == 1
+        assert info["misses"] == 3
+        assert info["currsize"] == 2
+        # "2" was the least recently used key, so it was evicted
+        assert list(utd_format._cache) == [(str, "1"), (str, "3")]
+        # Looked up keys are not declared keys, and declared keys are never evicted
+        assert "1" not in utd_format
+        assert utd_format == self.range_dict
+
+    def test_cache_cleared_on_setitem(self) -> None:
+        utd_format = UtdFormat(self.range_dict)
+        assert utd_format["5"] == "barn"
+        utd_format["5"] = "fem"
+        assert utd_format["5"] == "fem"
+        assert utd_format.cache_info()["currsize"] == 0
+
+    def test_not_cached(self) -> None:
+        utd_format = UtdFormat(self.range_dict)
+        utd_format.cached = False
+        assert utd_format["5"] == "barn"
+        assert utd_format.cache_info()["currsize"] == 0
+        utd_format["new_key"] = "new_value"
+        assert utd_format["new_key"] == "new_value"
+
+    def test_delitem_updates_ranges_and_na(self) -> None:
+        utd_format = UtdFormat(self.range_dict)
+        utd_format["."] = "NaN"
+        utd_format["NA"] = "NA-value"
+        assert utd_format[None] == "NaN"
+        del utd_format["11-20"]
+        assert utd_format.look_in_ranges("15") is None
+        del utd_format["."]
+        assert utd_format[None] == "NA-value"
+        assert utd_format.pop("NA") == "NA-value"
+        assert utd_format.na_value is None
+        assert utd_format.pop("not_here", "default") == "default"
+        with self.assertRaises(KeyError):
+            utd_format.pop("not_here")
+
+    def test_update_many(self) -> None:
+        utd_format = UtdFormat()
+        utd_format.update_many(self.range_dict)
+        utd_format.update_many([(".", "NaN"), ("OTHER", "rest")])
+        assert utd_format["5"] == "barn"
+        assert utd_format[None] == "NaN"
+        assert utd_format["not_here"] == "rest"
+        assert "OTHER" not in utd_format
+        utd_format.update({"31-high": "eldre"})
+        assert utd_format["45"] == "eldre"
+
+    def test_other_mixed_case(self) -> None:
+        utd_format = UtdFormat({"OtHeR": "rest"})
+        assert list(utd_format.keys()) == ["other"]
+        utd_format["OTHER"] = "new_rest"
+        assert list(utd_format.keys()) == ["other"]
+        assert utd_format["not_here"] == "new_rest"
+
     def test_int_str_confuse(self) -> None:
         utd_format = UtdFormat()
         utd_format["1"] = "value1"
@@ -112,15 +215,145 @@ class TestUtdFormat(unittest.TestCase):
 
         assert utd_format["nonexistent_key"] == "rest"
 
+    def test_apply_same_as_map(self) -> None:
+        utd_format = UtdFormat(self.range_dict)
+        utd_format["."] = "NaN"
+        utd_format["other"] = "rest"
+        series = pd.Series(
+            ["5", 15, "25", 40.5, ".", None, np.nan, "abc", "15"], name="alder"
+        )
+        expected = series.map(UtdFormat(utd_format))
+        result = utd_format.apply(series)
+        pd.testing.assert_series_equal(result, expected)
+        # apply should not cache the looked up keys
+        assert "abc" not in utd_format
+
+    def test_apply_same_as_map_edge_cases(self) -> None:
+        cases = [
+            # Declared NA-like strings are found as they are
+            ({".": "Missing", "": "Empty", "other": "rest"}, ["", ".", "x", None]),
+            ({"NA": "N", ".": "M"}, ["NA", ".", "", None]),
+            # True and 1 are equal, but not looked up the same way
+            (
+                {"1": "one", "True": "yes", "0": "zero", "other": "rest"},
+                [True, False, 1],
+            ),
+            ({1: "one", "1.5": "x", "other": "rest"}, [1, 1.0, 1.5, True]),
+        ]
+        for content, values in cases:
+            series = pd.Series(values, dtype=object)
+            pd.testing.assert_series_equal(
+                UtdFormat(content).apply(series), series.map(UtdFormat(content))
+            )
+            # Formats kept as arrays only have string keys, like the json-files
+            if all(isinstance(key, str) for key in content):
+                columnar = ColumnarUtdFormat.from_format(UtdFormat(content))
+                pd.testing.assert_series_equal(
+                    columnar.apply(series), series.map(UtdFormat(content))
+                )
+        utd_format = UtdFormat({"1": "one", "2": "two", ".": "na", "other": "rest"})
+        for series in [
+            pd.Series([1, 2, None, 3], dtype="Int64"),
+            pd.Series([1, 2, 2], dtype="Int64"),
+            pd.Series([True, False, None], dtype="boolean"),
+        ]:
+            pd.testing.assert_series_equal(
+                utd_format.apply(series), series.map(UtdFormat(utd_format))
+            )
+
+    def test_apply_int_str_confuse(self) -> None:
+        utd_format = UtdFormat({"1": "value1", 2: "value2", "other": "rest"})
+        result = utd_format.apply(pd.Series([1, "2", 3]))
+        assert result.tolist() == ["value1", "value2", "rest"]
+
+    def test_apply_missing_key(self) -> None:
+        utd_format = UtdFormat(self.test_dict)
+        with self.assertRaises(ValueError):
+            utd_format.apply(pd.Series(["key1", "nonexistent_key"]))
+
+    def test_apply_categorical(self) -> None:
+        utd_format = UtdFormat({**self.range_dict, "1": "en", ".": "mangler"})
+        series = pd.Series(
+            pd.Categorical([1, 15, None, 40, 15, 12]), index=list("abcdef"), name="x"
+        )
+        result = utd_format.apply(series)
+        self.assertIsInstance(result.dtype, pd.CategoricalDtype)
+        expected = series.astype(object).map(utd_format)
+        pd.testing.assert_series_equal(result.astype(object), expected)
+        # 15 and 12 are formatted to the same value, so they share a category
+        assert sorted(result.cat.categories) == ["en", "mangler", "ungdommer", "voksne"]
+
+    def test_apply_frame(self) -> None:
+        utd_format = UtdFormat(self.range_dict)
+        df = pd.DataFrame({"a": [1, 15], "b": [25, 50], "c": ["x", "y"]})
+        result = utd_format.apply_frame(df, ["a", "b"])
+        assert result["a"].tolist() == ["barn", "ungdommer"]
+        assert result["b"].tolist() == ["unge_voksne", "voksne"]
+        assert result["c"].tolist() == ["x", "y"]
+        assert df["a"].tolist() == [1, 15]
+
+    def test_copy(self) -> None:
+        utd_format = UtdFormat(self.range_dict)
+        copied = utd_format.copy()
+        self.assertIsInstance(copied, UtdFormat)
+        copied["31-high"] = "eldre"
+        assert copied[40] == "eldre"
+        assert utd_format[40] == "voksne"
+
+    def test_freeze_same_answers(self) -> None:
+        utd_format = UtdFormat({**self.range_dict, "1": "en", ".": "mangler"})
+        frozen = utd_format.freeze()
+        self.assertIsInstance(frozen, FrozenUtdFormat)
+        assert frozen == utd_format
+        for key in [1, "1", 5, "15", 25.5, 40, None, np.nan, "NA"]:
+            assert frozen[key] == utd_format[key]
+        series = pd.Series([1, "1", 15, None, 40])
+        pd.testing.assert_series_equal(frozen.apply(series), utd_format.apply(series))
+
+    def test_freeze_bool_not_int(self) -> None:
+        frozen = UtdFormat({"1": "en", "other": "annet"}).freeze()
+        assert frozen[1] == "en"
+        assert frozen[True] == "annet"
+
+    def test_freeze_immutable(self) -> None:
+        frozen = UtdFormat(self.range_dict).freeze()
+        with self.assertRaises(TypeError):
+            frozen["41-50"] = "eldre"
+        with self.assertRaises(TypeError):
+            del frozen["low-10"]
+        with self.assertRaises(TypeError):
+            frozen.update({"a": "b"})
+        assert frozen.freeze() is frozen
+
+    def test_freeze_hashable_and_picklable(self) -> None:
+        frozen = UtdFormat(self.range_dict).freeze()
+        assert hash(frozen) == hash(UtdFormat(self.range_dict).freeze())
+        unpickled = pickle.loads(pickle.dumps(frozen))
+        self.assertIsInstance(unpickled, FrozenUtdFormat)
+        assert unpickled == frozen
+        assert unpickled[15] == "ungdommer"
+
     @mock.patch(
         "ssb_utdanning.format.formats.is_different_from_last_time",
         side_effect=mock_is_different_from_last_time,
     )
     def test_store(self, mock_get: mock.MagicMock) -> None:
         utd_format = UtdFormat(self.range_dict)
-        assert len(os.listdir(self.path)) == 0
+        assert len(self.stored_files()) == 0
         utd_format.store(format_name="test", output_path=self.path, force=True)
-        assert len(os.listdir(self.path)) == 1
+        assert len(self.stored_files()) == 1
+
+    @mock.patch(
+        "ssb_utdanning.format.formats.is_different_from_last_time",
+        side_effect=mock_is_different_from_last_time,
+    )
+    def test_store_without_cached_keys(self, mock_get: mock.MagicMock) -> None:
+        utd_format = UtdFormat(self.range_dict)
+        utd_format["5"]
+        utd_format.store(format_name="test", output_path=self.path)
+        stored_file = self.path / self.stored_files()[0]
+        with open(stored_file) as format_json:
+            assert json.load(format_json) == self.range_dict
 
     def tearDown(self) -> None:
         # Clean up test files and folders after tests
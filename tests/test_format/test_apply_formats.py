@@ -0,0 +1,73 @@
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from ssb_utdanning import UtdFormat
+from ssb_utdanning.format import apply_formats
+
+AGE_FORMAT = {
+    "low-10": "barn",
+    "11-20": "ungdommer",
+    "21-high": "voksne",
+}
+SEX_FORMAT = {"1": "mann", "2": "kvinne", ".": "ukjent"}
+
+
+def mock_get_format(name: str, date: str, frozen: bool = False) -> UtdFormat:
+    return UtdFormat({"age": AGE_FORMAT, "sex": SEX_FORMAT}[name])
+
+
+class TestApplyFormats(unittest.TestCase):
+    def setUp(self) -> None:
+        self.df = pd.DataFrame(
+            {
+                "age_mother": [35, 8, 19, 42],
+                "age_child": [3, 8, 1, 14],
+                "sex": ["1", "2", None, "1"],
+                "other": ["a", "b", "c", "d"],
+            }
+        )
+
+    @mock.patch("ssb_utdanning.format.formats.get_format", side_effect=mock_get_format)
+    def test_apply_formats(self, mock_get: mock.MagicMock) -> None:
+        result = apply_formats(
+            self.df, {"age_mother": "age", "age_child": "age", "sex": "sex"}
+        )
+        # Each format is only loaded once
+        assert mock_get.call_count == 2
+        for col, name in [("age_mother", "age"), ("age_child", "age"), ("sex", "sex")]:
+            expected = self.df[col].map(mock_get_format(name, "latest"))
+            pd.testing.assert_series_equal(result[col], expected)
+        pd.testing.assert_series_equal(result["other"], self.df["other"])
+        # Not inplace
+        assert self.df["sex"].tolist() == ["1", "2", None, "1"]
+
+    def test_apply_formats_inplace_timings(self) -> None:
+        utd_format = UtdFormat(SEX_FORMAT)
+        result, timings = apply_formats(
+            self.df, {"sex": utd_format}, inplace=True, return_timings=True
+        )
+        assert result is self.df
+        assert self.df["sex"].tolist() == ["mann", "kvinne", "ukjent", "mann"]
+        assert list(timings) == ["sex"]
+        assert timings["sex"] >= 0
+
+    def test_apply_formats_extension_dtypes(self) -> None:
+        utd_format = UtdFormat(
+            {"1": "one", "2": "two", ".": "missing", "other": "rest"}
+        )
+        df = pd.DataFrame(
+            {
+                "nullable": pd.array([1, 2, None, 3], dtype="Int64"),
+                "arrow": pd.array([1, 2, None, 3], dtype="int64[pyarrow]"),
+            }
+        )
+        result = apply_formats(df, {"nullable": utd_format, "arrow": utd_format})
+        for col in df.columns:
+            pd.testing.assert_series_equal(result[col], utd_format.apply(df[col]))
+            pd.testing.assert_series_equal(result[col], df[col].map(utd_format))
+
+    def test_apply_formats_missing_col(self) -> None:
+        with self.assertRaises(KeyError):
+            apply_formats(self.df, {"not_a_col": UtdFormat(SEX_FORMAT)})
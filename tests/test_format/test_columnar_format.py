@@ -0,0 +1,110 @@
+import os
+import shutil
+import tracemalloc
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from ssb_utdanning import UtdFormat
+from ssb_utdanning.format import ColumnarUtdFormat
+from ssb_utdanning.format import apply_formats
+from ssb_utdanning.format import get_columnar_format
+from ssb_utdanning.format import store_format_prod
+from ssb_utdanning.format.columnar import COLUMNAR_SUFFIX
+from ssb_utdanning.format.columnar import write_format_table
+from ssb_utdanning.format.formats import FORMAT_REGISTRY
+from ssb_utdanning.format.manifest import clear_manifest_cache
+
+CONTENT = {
+    "1": "en",
+    "02": "to",
+    "low-10": "lav",
+    "100-high": "høy",
+    ".": "mangler",
+    "other": "annet",
+}
+KEYS = ["1", 1, "2", 2, "02", 5, "5", 7.0, 150, "x", None, np.nan, ".", "NA", True]
+
+
+class TestColumnarFormat(unittest.TestCase):
+    def setUp(self) -> None:
+        template_dir = Path(os.getcwd())
+        self.path = template_dir / "test_formats"
+        self.tearDown()
+        os.makedirs(self.path, exist_ok=True)
+        clear_manifest_cache()
+        FORMAT_REGISTRY.clear()
+
+    def test_same_as_utdformat(self) -> None:
+        utd_format = UtdFormat(CONTENT)
+        columnar = ColumnarUtdFormat.from_format(utd_format)
+        for key in KEYS:
+            assert columnar[key] == utd_format[key], key
+        series = pd.Series(KEYS * 3, dtype=object)
+        pd.testing.assert_series_equal(columnar.apply(series), utd_format.apply(series))
+        assert len(columnar) == len(utd_format)
+        assert columnar.to_utdformat() == utd_format
+
+    def test_missing_key(self) -> None:
+        columnar = ColumnarUtdFormat.from_format(UtdFormat({"1": "en"}))
+        with self.assertRaises(ValueError):
+            columnar["2"]
+
+    def test_store_and_get(self) -> None:
+        store_format_prod({"big": UtdFormat(CONTENT)}, self.path, columnar=True)
+        columnar_files = [
+            file for file in os.listdir(self.path) if file.endswith(COLUMNAR_SUFFIX)
+        ]
+        assert len(columnar_files) == 1
+        json_file = columnar_files[0].replace(COLUMNAR_SUFFIX, ".json")
+        columnar = get_columnar_format(filepath=self.path / json_file)
+        assert isinstance(columnar, ColumnarUtdFormat)
+        for key in KEYS:
+            assert columnar[key] == UtdFormat(CONTENT)[key], key
+        # Kept in the registry
+        assert get_columnar_format(filepath=self.path / json_file) is columnar
+        assert FORMAT_REGISTRY.info()["hits"] == 1
+
+    def test_memory_mapped_not_copied(self) -> None:
+        content = {f"{i:06}": f"value {i}" for i in range(20_000)}
+        path = self.path / f"big{COLUMNAR_SUFFIX}"
+        write_format_table(path, list(content), list(content.values()), {})
+        allocated = pa.total_allocated_bytes()
+        tracemalloc.start()
+        columnar = ColumnarUtdFormat.from_file(path)
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        # The keys and values stay in the file, they are not copied to Arrow or Python objects
+        assert pa.total_allocated_bytes() - allocated < 10_000
+        assert python_peak < 100_000
+        series = pd.Series(["000001", "019999", "000001"])
+        pd.testing.assert_series_equal(
+            columnar.apply(series), UtdFormat(content).apply(series)
+        )
+
+    def test_get_without_columnar_file(self) -> None:
+        store_format_prod({"small": UtdFormat(CONTENT)}, self.path)
+        assert not any(file.endswith(COLUMNAR_SUFFIX) for file in os.listdir(self.path))
+        json_file = next(
+            file for file in os.listdir(self.path) if not file.startswith(".")
+        )
+        columnar = get_columnar_format(filepath=self.path / json_file)
+        assert isinstance(columnar, ColumnarUtdFormat)
+        assert columnar.to_utdformat() == CONTENT
+
+    def test_not_strings(self) -> None:
+        store_format_prod({"ints": UtdFormat({"1": 1})}, self.path, columnar=True)
+        assert not any(file.endswith(COLUMNAR_SUFFIX) for file in os.listdir(self.path))
+
+    def test_apply_formats(self) -> None:
+        columnar = ColumnarUtdFormat.from_format(UtdFormat(CONTENT))
+        df = pd.DataFrame({"a": ["1", "5", None], "b": [150, 2, 1]})
+        result = apply_formats(df, {"a": columnar, "b": columnar})
+        assert result["a"].tolist() == ["en", "lav", "mangler"]
+        assert result["b"].tolist() == ["høy", "lav", "en"]
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -4,8 +4,11 @@ import shutil
 import unittest
 from pathlib import Path
 from unittest import mock
+from ssb_utdanning.format.formats import FORMAT_REGISTRY
+from ssb_utdanning.format.formats import FormatRegistry
 from ssb_utdanning.format.formats import get_format
 from ssb_utdanning import UtdFormat
+from ssb_utdanning.format import FrozenUtdFormat
 
 
 def mock_get_path(filename: str, var2: None) -> Path:
@@ -18,6 +21,7 @@ class TestGetFormat(unittest.TestCase):
         template_dir = Path(os.getcwd())
         self.path = template_dir / "test_formats"
         os.makedirs(self.path, exist_ok=True)
+        FORMAT_REGISTRY.clear()
 
         # Create test JSON files
         self.test_files = ["file_2023-05-10.json", "anotherfile_2024-01-09.json"]
@@ -48,6 +52,36 @@ class TestGetFormat(unittest.TestCase):
         assert isinstance(frmt, UtdFormat)
         assert frmt == self.dictionaries[0]
 
+    @mock.patch("ssb_utdanning.format.formats.get_path", side_effect=mock_get_path)
+    def test_get_format_registry(self, mock_get: mock.MagicMock) -> None:
+        own = get_format(self.test_files[1])
+        assert not isinstance(own, FrozenUtdFormat)
+        own["6"] = "category6"
+        # Changing the returned format does not change the one kept in the registry
+        assert get_format(self.test_files[1]) == self.dictionaries[1]
+        # Callers asking for the frozen format all get the same one
+        frmt = get_format(self.test_files[1], frozen=True)
+        assert isinstance(frmt, FrozenUtdFormat)
+        with self.assertRaises(TypeError):
+            frmt["6"] = "category6"
+        assert get_format(self.test_files[1], frozen=True) is frmt
+        assert FORMAT_REGISTRY.info()["hits"] == 3
+
+        # A changed file is read again
+        changed = {"1": "changed"}
+        with open(self.path / self.test_files[1], "w") as json_file:
+            json.dump(changed, json_file)
+        assert get_format(self.test_files[1]) == changed
+        assert FORMAT_REGISTRY.info()["misses"] == 2
+
+    def test_registry_bounded(self) -> None:
+        registry = FormatRegistry(maxsize=1)
+        for file_name in self.test_files:
+            registry.get(self.path / file_name)
+        assert len(registry) == 1
+        registry.clear()
+        assert len(registry) == 0
+
     def tearDown(self) -> None:
         # Clean up test files and folders after tests
         shutil.rmtree(self.path, ignore_errors=True)
@@ -1,32 +1,55 @@
+import json
+import os
+import shutil
+from pathlib import Path
 from unittest import mock
-import pandas as pd
-import datetime
-from ssb_utdanning.config import DATETIME_FORMAT
 from ssb_utdanning.format.formats import get_path
+from ssb_utdanning.format.formats import get_paths_for
 
 
-def mocked_info_stored_formats(var: str) -> pd.DataFrame:
-    df_info = pd.DataFrame(
-        {
-            "test_name": ["newest_format", "oldes_format"],
-            "date_original": ["2024-01-15T12-00-00", "2023-01-15T12-00-00"],
-            "date_datetime": [
-                datetime.datetime.strptime("2024-01-15T12-00-00", DATETIME_FORMAT),
-                datetime.datetime.strptime("2023-01-15T12-00-00", DATETIME_FORMAT),
-            ],
-            "path": ["newest_path", "oldest_path"],
-        }
-    )
-    return df_info
-
+def test_get_path() -> None:
+    path = Path(os.getcwd()) / "test_formats"
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    filenames = ["test_2023-01-15T12-00-00.json", "test_2024-01-15T12-00-00.json"]
+    for filename in filenames:
+        with open(path / filename, "w") as json_file:
+            json.dump({"a": "b"}, json_file)
+    try:
+        with mock.patch(
+            "ssb_utdanning.format.formats.get_paths_for",
+            side_effect=lambda names, date: get_paths_for(names, date, path),
+        ) as paths_for:
+            assert get_path("test") == str(path / filenames[1])
+            assert get_path("test", date="2023-01-16") == str(path / filenames[0])
+            assert get_path("test", date="2022-01-01") is None
+        paths_for.assert_called_with(["test"], "2022-01-01")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
 
-@mock.patch(
-    "ssb_utdanning.format.formats.info_stored_formats",
-    side_effect=mocked_info_stored_formats,
-)
-def test_get_path(mock_get: mock.MagicMock) -> None:
-    path = get_path("test")
-    assert path == "newest_path"
 
-    path = get_path("test", date="2023-01-16")
-    assert path == "oldest_path"
+def test_get_paths_for() -> None:
+    path = Path(os.getcwd()) / "test_formats"
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    filenames = [
+        "first_2023-01-15T12-00-00.json",
+        "first_2024-01-15T12-00-00.json",
+        "second_2024-01-15T12-00-00.json",
+    ]
+    for filename in filenames:
+        with open(path / filename, "w") as json_file:
+            json.dump({"a": "b"}, json_file)
+    try:
+        paths = get_paths_for(["first", "second", "third"], path_prod=path)
+        assert paths == {
+            "first": str(path / filenames[1]),
+            "second": str(path / filenames[2]),
+            "third": None,
+        }
+        paths = get_paths_for(["first", "second"], "2024-01-15T12:00", path)
+        assert paths == {"first": str(path / filenames[0]), "second": None}
+        paths = get_paths_for(["first"], "2024-01-15T12:00:00.5", path)
+        assert paths == {"first": str(path / filenames[1])}
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,164 @@
+import json
+import os
+import shutil
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from ssb_utdanning import UtdFormat
+from ssb_utdanning.format.formats import info_stored_formats
+from ssb_utdanning.format.formats import store_format_prod
+from ssb_utdanning.format import manifest as manifest_module
+from ssb_utdanning.format.manifest import MANIFEST_FILENAME
+from ssb_utdanning.format.manifest import clear_manifest_cache
+from ssb_utdanning.format.manifest import content_hash
+from ssb_utdanning.format.manifest import read_manifest
+from ssb_utdanning.format.manifest import stored_content_hash
+from write_test_formats import write_test_formats
+
+
+def mock_is_different_from_last_time(
+    format_name: str,
+    format_content: UtdFormat,
+    path_prod: Path | None = None,
+    manifest: dict[str, list[list[str]]] | None = None,
+) -> bool:
+    return True
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self) -> None:
+        template_dir = Path(os.getcwd())
+        self.path = template_dir / "test_formats"
+        self.tearDown()
+        os.makedirs(self.path, exist_ok=True)
+        clear_manifest_cache()
+        self.test_files = [
+            "anotherfile_2024-01-09T12-13-14.json",
+            "file_2023-05-10T12-13-14.json",
+        ]
+        _, _, dictionaries = write_test_formats(self.path, store=False)
+        self.contents = [dictionaries[1]["anotherfile"], dictionaries[0]["file"]]
+        for file_name, content in zip(self.test_files, self.contents):
+            with open(self.path / file_name, "w") as json_file:
+                json.dump(content, json_file)
+
+    def test_content_hash(self) -> None:
+        assert content_hash({1: "a", "2": "b"}) == content_hash({"2": "b", "1": "a"})
+        assert content_hash({"1": "a"}) != content_hash({"1": "b"})
+
+    def test_manifest_built(self) -> None:
+        with mock.patch(
+            "ssb_utdanning.format.manifest.content_hash", wraps=content_hash
+        ) as hashing:
+            manifest = read_manifest(self.path)
+        # Built from the filenames, without reading the files
+        hashing.assert_not_called()
+        assert (self.path / MANIFEST_FILENAME).exists()
+        assert manifest["file"] == [["2023-05-10T12-13-14", self.test_files[1], ""]]
+        # A calculated hash is written to the manifest when it is rebuilt
+        stored_content_hash(self.path, manifest["file"][0])
+        manifest = manifest_module.update_manifest(self.path)
+        assert manifest["file"][0][2] == content_hash(self.contents[1])
+        # Read again from disk, not rebuilt
+        clear_manifest_cache()
+        with mock.patch("ssb_utdanning.format.manifest.update_manifest") as rebuild:
+            assert read_manifest(self.path) == manifest
+            rebuild.assert_not_called()
+
+    def test_stored_content_hash(self) -> None:
+        entry = ["2023-05-10T12-13-14", self.test_files[1], ""]
+        with mock.patch(
+            "ssb_utdanning.format.manifest.content_hash", wraps=content_hash
+        ) as hashing:
+            assert stored_content_hash(self.path, entry) == content_hash(
+                self.contents[1]
+            )
+            # Calculated once, and only when the manifest does not know it
+            stored_content_hash(self.path, entry)
+            assert stored_content_hash(self.path, [*entry[:2], "known"]) == "known"
+        assert hashing.call_count == 1
+
+    def test_manifest_stale(self) -> None:
+        read_manifest(self.path)
+        new_file = "file_2024-05-10T12-13-14.json"
+        with open(self.path / new_file, "w") as json_file:
+            json.dump({"a": "b"}, json_file)
+        # Make sure the folder looks changed, even on filesystems with coarse timestamps
+        manifest_mtime = os.stat(self.path / MANIFEST_FILENAME).st_mtime_ns
+        os.utime(self.path, ns=(manifest_mtime + 10**9, manifest_mtime + 10**9))
+        manifest = read_manifest(self.path)
+        assert [entry[1] for entry in manifest["file"]] == [
+            self.test_files[1],
+            new_file,
+        ]
+
+    def test_manifest_racy(self) -> None:
+        read_manifest(self.path)
+        # Only kept for a moment, for the calls made right after each other
+        assert manifest_module._manifests[str(self.path.absolute())][3] is not None
+        with mock.patch(
+            "ssb_utdanning.format.manifest._scan_folder",
+            wraps=manifest_module._scan_folder,
+        ) as scan:
+            for _ in range(3):
+                read_manifest(self.path)
+            scan.assert_not_called()
+
+        # A file added in the same tick of the clock does not move the folder's modification time
+        folder_mtime = os.stat(self.path).st_mtime_ns
+        new_file = "file_2024-05-10T12-13-14.json"
+        with open(self.path / new_file, "w") as json_file:
+            json.dump({"a": "b"}, json_file)
+        os.utime(self.path, ns=(folder_mtime, folder_mtime))
+        # Built again once the moment has passed
+        later = time.time_ns() + manifest_module._RACY_KEEP_NS
+        with mock.patch("ssb_utdanning.format.manifest.time.time_ns") as time_ns:
+            time_ns.return_value = later
+            assert len(read_manifest(self.path)["file"]) == 2
+
+        # Written again, and kept, once the folder has settled
+        os.utime(self.path, ns=(10**9, 10**9))
+        os.utime(self.path / MANIFEST_FILENAME, ns=(10**9, 10**9))
+        with mock.patch("ssb_utdanning.format.manifest.time.time_ns") as time_ns:
+            time_ns.return_value = 10 * 10**9
+            assert len(read_manifest(self.path)["file"]) == 2
+        with open(self.path / MANIFEST_FILENAME) as manifest_file:
+            assert json.load(manifest_file)["racy"] is False
+        assert manifest_module._manifests[str(self.path.absolute())][3] is None
+
+    def test_manifest_read_only_folder(self) -> None:
+        with mock.patch("ssb_utdanning.format.manifest.os.access", return_value=False):
+            with self.assertNoLogs("ssb_utdanning.utdanning_logger", level="WARNING"):
+                manifest = read_manifest(self.path)
+        assert not (self.path / MANIFEST_FILENAME).exists()
+        assert set(manifest) == {"file", "anotherfile"}
+        assert read_manifest(self.path) is manifest
+
+    def test_manifest_corrupt(self) -> None:
+        read_manifest(self.path)
+        with open(self.path / MANIFEST_FILENAME, "w") as manifest_file:
+            manifest_file.write("{not json")
+        # Not stale, but unreadable
+        folder_mtime = os.stat(self.path).st_mtime_ns
+        os.utime(self.path / MANIFEST_FILENAME, ns=(folder_mtime, folder_mtime))
+        clear_manifest_cache()
+        assert set(read_manifest(self.path)) == {"file", "anotherfile"}
+
+    @mock.patch(
+        "ssb_utdanning.format.formats.is_different_from_last_time",
+        side_effect=mock_is_different_from_last_time,
+    )
+    def test_store_updates_manifest(self, mock_get: mock.MagicMock) -> None:
+        read_manifest(self.path)
+        store_format_prod({"newformat": UtdFormat({"1": "en"})}, self.path)
+        with open(self.path / MANIFEST_FILENAME) as manifest_file:
+            stored = json.load(manifest_file)["formats"]
+        assert stored["newformat"][0][2] == content_hash({"1": "en"})
+        df_info = info_stored_formats("newformat", path_prod=self.path)
+        assert len(df_info) == 1
+        assert df_info["content_hash"].iloc[0] == content_hash({"1": "en"})
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,123 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+from ssb_utdanning.format.sas_catalog import batch_process_folder_sascatalogs
+from ssb_utdanning.format.sas_catalog import formats_from_cntlout
+from ssb_utdanning.format.sas_catalog import formats_from_value_labels
+from ssb_utdanning.format.sas_catalog import read_sas_catalog
+
+
+def make_cntlout() -> pd.DataFrame:
+    # Like "proc format cntlout=", padded with spaces, the character columns as bytes
+    rows = [
+        ("ALDER", "N", "LOW", "       10", "barn", "L", "N", "N"),
+        ("ALDER", "N", "       10", "       20", "ungdom", "", "Y", "N"),
+        ("ALDER", "N", "       21", "HIGH", "voksen", "H", "N", "N"),
+        ("ALDER", "N", "        .", "        .", "ukjent", "", "N", "N"),
+        ("$KJONN", "C", "1", "1", "mann", "", "N", "N"),
+        ("$KJONN", "C", "2", "2", "kvinne", "", "N", "N"),
+        ("$KJONN", "C", "**OTHER**", "**OTHER**", "annet", "O", "N", "N"),
+        ("INNFMT", "I", "a", "a", "1", "", "N", "N"),
+        ("KARAKTER", "N", "        1", "        6", "bestått", "", "N", "Y"),
+        ("KARAKTER", "N", "      0.5", "      1.5", "halv", "", "N", "N"),
+        ("KARAKTER", "N", "       -5", "       -1", "negativ", "", "N", "N"),
+        ("KARAKTER", "N", "       -9", "       -9", "mangler", "", "N", "N"),
+    ]
+    columns = ["FMTNAME", "TYPE", "START", "END", "LABEL", "HLO", "SEXCL", "EEXCL"]
+    df = pd.DataFrame(rows, columns=columns)
+    df["FMTNAME"] = df["FMTNAME"].str.encode("latin1")
+    return df
+
+
+class TestSasCatalog(unittest.TestCase):
+    def test_formats_from_cntlout(self) -> None:
+        with self.assertLogs("ssb_utdanning.utdanning_logger", level="WARNING") as logs:
+            formats = formats_from_cntlout(make_cntlout())
+        assert "karakter: 0.5-1.5, karakter: -5--1" in logs.output[0]
+        assert list(formats) == ["alder", "kjonn", "karakter"]
+        assert formats["alder"] == {
+            "low-10": "barn",
+            "11-20": "ungdom",
+            "21-high": "voksen",
+            ".": "ukjent",
+        }
+        assert formats["alder"]["5"] == "barn"
+        assert formats["alder"][15] == "ungdom"
+        assert formats["alder"][None] == "ukjent"
+        assert formats["kjonn"] == {"1": "mann", "2": "kvinne", "other": "annet"}
+        assert formats["kjonn"]["9"] == "annet"
+        # Ranges with decimal or negative bounds are left out, single values are kept
+        assert formats["karakter"] == {"1-5": "bestått", "-9": "mangler"}
+
+    def test_formats_from_value_labels(self) -> None:
+        formats = formats_from_value_labels(
+            {"KOMMUNE": {301.0: "Oslo", 1.5: "halv"}, "$FYLKE": {"03": "Oslo"}}
+        )
+        assert formats["kommune"] == {"301": "Oslo", "1.5": "halv"}
+        assert formats["fylke"] == {"03": "Oslo"}
+
+    def test_batch_include_cntlout(self) -> None:
+        with tempfile.TemporaryDirectory() as folder:
+            for filename in ["a.sas7bcat", "b.sas7bdat", "c.xpt", "d.csv"]:
+                (Path(folder) / filename).touch()
+            with mock.patch(
+                "ssb_utdanning.format.sas_catalog.read_sas_catalog", return_value={}
+            ) as read:
+                batch_process_folder_sascatalogs(folder, folder)
+                assert [Path(call.args[0]).name for call in read.call_args_list] == [
+                    "a.sas7bcat"
+                ]
+                read.reset_mock()
+                batch_process_folder_sascatalogs(folder, folder, include_cntlout=True)
+                assert [Path(call.args[0]).name for call in read.call_args_list] == [
+                    "a.sas7bcat",
+                    "b.sas7bdat",
+                    "c.xpt",
+                ]
+
+    def test_read_sas_catalog_suffix(self) -> None:
+        with self.assertRaises(ValueError):
+            read_sas_catalog("formats.sas")
+
+    def test_read_sas7bcat(self) -> None:
+        meta = mock.Mock(value_labels={"$KJONN": {"1": "mann", "2": "kvinne"}})
+        pyreadstat = mock.Mock(**{"read_sas7bcat.return_value": (None, meta)})
+        with mock.patch.dict(sys.modules, {"pyreadstat": pyreadstat}):
+            formats = read_sas_catalog(Path("formats.sas7bcat"))
+        pyreadstat.read_sas7bcat.assert_called_once_with("formats.sas7bcat")
+        assert formats == {"kjonn": {"1": "mann", "2": "kvinne"}}
+
+    def test_read_sas7bcat_without_pyreadstat(self) -> None:
+        # None in sys.modules makes the import fail, even if pyreadstat is installed
+        with mock.patch.dict(sys.modules, {"pyreadstat": None}):
+            with self.assertRaisesRegex(ImportError, "ssb-utdanning\\[sas\\]"):
+                read_sas_catalog("formats.sas7bcat")
+
+    def test_batch_sascatalogs(self) -> None:
+        with tempfile.TemporaryDirectory() as folder:
+            for filename in ["a.sas7bcat", "b.sas7bcat"]:
+                (Path(folder) / filename).touch()
+            meta = mock.Mock(value_labels={"KOMMUNE": {301.0: "Oslo"}})
+            pyreadstat = mock.Mock(
+                **{"read_sas7bcat.side_effect": [(None, meta), OSError("ødelagt")]}
+            )
+            with mock.patch.dict(sys.modules, {"pyreadstat": pyreadstat}):
+                summary = batch_process_folder_sascatalogs(folder, folder)
+            assert summary["parsed"] == summary["changed"] == ["kommune"]
+            assert summary["skipped"] == []
+            assert list(summary["failed"].values()) == ["OSError: ødelagt"]
+            assert set(summary["timings"]) == {
+                str(Path(folder) / "a.sas7bcat"),
+                str(Path(folder) / "b.sas7bcat"),
+                "parse",
+                "store",
+                "total",
+            }
+            with mock.patch.dict(sys.modules, {"pyreadstat": None}):
+                with self.assertRaises(ImportError):
+                    batch_process_folder_sascatalogs(folder, folder)
@@ -1,3 +1,5 @@
+import io
+import re
 import unittest
 from unittest import mock
 import shutil
@@ -8,6 +10,8 @@ from create_folder_w_sasfiles import create_folder_w_sasfiles
 from ssb_utdanning import UtdFormat
 from ssb_utdanning.format.sas_format_parsing import process_single_sasfile
 from ssb_utdanning.format.sas_format_parsing import batch_process_folder_sasfiles
+from ssb_utdanning.format.sas_format_parsing import iter_sas_formats
+from ssb_utdanning.format.sas_format_parsing import parse_sas_script
 
 
 def local_get_format(path: Path, frmtname: str) -> UtdFormat:
@@ -25,8 +29,36 @@ def local_get_format(path: Path, frmtname: str) -> UtdFormat:
     return UtdFormat(ord_dict)
 
 
+def old_parse_sas_script(sas_script_content: str) -> dict[str, dict[str, str]]:
+    # The parser before the single-pass lexer, for comparing the output with
+    formats_in_file = {}
+    for proc_step in sas_script_content.split("proc format;")[1:]:
+        proc_step = proc_step.split("run;")[0]
+        for value_part in proc_step.split("value ")[1:]:
+            value_part = value_part.split(";")[0]
+            value_part = re.sub(re.compile(r"/\*.*?\*/", re.DOTALL), "", value_part)
+            format_content = {}
+            for line in value_part.split("\n"):
+                line = line.strip(" ")
+                if line.startswith("$") and "=" not in line and line:
+                    format_name = line[1:]
+                elif line.startswith("$") is False and "=" not in line and line:
+                    format_name = line
+                elif not line:
+                    continue
+                else:
+                    key = line.split("=")[0].replace("\t", "").strip().strip("'")
+                    value = line.split("=")[1].replace("\t", "").strip().strip("'")
+                    format_content[key.strip('"')] = value.strip('"')
+            formats_in_file[format_name] = format_content
+    return formats_in_file
+
+
 def mock_is_different_from_last_time(
-    format_name: str, format_content: UtdFormat
+    format_name: str,
+    format_content: UtdFormat,
+    path_prod: Path | None = None,
+    manifest: dict[str, list[list[str]]] | None = None,
 ) -> bool:
     return True
 
@@ -103,6 +135,91 @@ class TestSasFormatParsing(unittest.TestCase):
             frmt_j = local_get_format(self.path, self.frmt_shortnames[j])
             assert frmt_j == UtdFormat(self.formats[j])
 
+    def test_batch_process_parallel_summary(self) -> None:
+        with open(self.path / "broken.sas", "w") as broken:
+            broken.write("proc format;\nvalue ;\nrun;\n")
+
+        summary = batch_process_folder_sasfiles(
+            sas_files_path=self.path, output_path=self.path, parallel=True
+        )
+        assert sorted(summary["parsed"]) == self.frmt_shortnames
+        assert sorted(summary["changed"]) == self.frmt_shortnames
+        assert summary["skipped"] == []
+        assert list(summary["failed"]) == [str(self.path / "broken.sas")]
+        assert summary["timings"]["total"] >= summary["timings"]["store"]
+
+        # Nothing changed since last time
+        summary = batch_process_folder_sasfiles(
+            sas_files_path=self.path, output_path=self.path
+        )
+        assert summary["changed"] == []
+        assert sorted(summary["skipped"]) == self.frmt_shortnames
+
+    def test_parse_sas_script_quoted_and_lines(self) -> None:
+        script = (
+            "proc format;\n"
+            "/* value notaformat 1 = 'x'; */\n"
+            "value $labels (default=20)\n"
+            "  1 = 'a; b'\n"
+            '  2 = "x = y"  /* comment */\n'
+            "  3 = 'don''t' 4='p'\n"
+            ";\n"
+            "run;\n"
+            "data test; value = 1; run;\n"
+        )
+        assert parse_sas_script(script) == {
+            "labels": {"1": "a; b", "2": "x = y", "3": "don't", "4": "p"}
+        }
+        assert [(name, line) for name, _, line in iter_sas_formats(script)] == [
+            ("labels", 3)
+        ]
+
+    def test_parse_sas_script_star_comments(self) -> None:
+        script = (
+            "proc format;\n"
+            "* don't touch this one;\n"
+            "value $labels 1 = 'a';\n"
+            '  * it\'s "quoted" = 2;\n'
+            "value other 1 = 'b';\n"
+            "run;\n"
+        )
+        expected = {"labels": {"1": "a"}, "other": {"1": "b"}}
+        assert parse_sas_script(script) == expected
+        # Also when the comment is split between the chunks read from a file
+        with mock.patch(
+            "ssb_utdanning.format.sas_format_parsing._STREAM_CHUNK_SIZE", 7
+        ):
+            assert parse_sas_script(io.StringIO(script)) == expected
+
+    def test_parse_sas_script_unclosed_quote(self) -> None:
+        script = "proc format;\nvalue a 1 = 'x';\nvalue b 1 = 'unclosed;\nrun;\n"
+        with self.assertLogs("ssb_utdanning.utdanning_logger", level="WARNING") as logs:
+            assert parse_sas_script(script) == {"a": {"1": "x"}}
+        assert "line 3" in logs.output[0]
+        # A last statement without its semicolon is still read
+        assert parse_sas_script("proc format; value c 1 = 'a;b'") == {"c": {"1": "a;b"}}
+
+    def test_same_as_old_parser(self) -> None:
+        with open(self.path / "mixed_case.sas", "w") as sas_file:
+            sas_file.write(
+                "proc format;\n"
+                "value $NUS2000\n  '1' = 'en'\n  '2' = 'to'\n;\n"
+                "value Kommune\n  301 = 'Oslo'\n  /* gammel */\n  1103 = 'Stavanger'\n;\n"
+                "run;\n"
+            )
+        for filename in [*self.filenames, "mixed_case.sas"]:
+            with open(self.path / filename, encoding="latin1") as sas_file:
+                content = sas_file.read()
+            assert parse_sas_script(content) == old_parse_sas_script(content), filename
+        assert list(parse_sas_script(content)) == ["NUS2000", "Kommune"]
+
+    def test_parse_sas_script_streaming(self) -> None:
+        for filename in self.filenames:
+            with open(self.path / filename, encoding="latin1") as sas_file:
+                content = sas_file.read()
+            with open(self.path / filename, encoding="latin1") as sas_file:
+                assert parse_sas_script(sas_file) == parse_sas_script(content)
+
     def tearDown(self) -> None:
         # Clean up test files and folders after tests
         shutil.rmtree(self.path, ignore_errors=True)
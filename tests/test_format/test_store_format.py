@@ -7,15 +7,19 @@ from pathlib import Path
 from unittest import mock
 import numpy as np
 from ssb_utdanning import UtdFormat
+from ssb_utdanning.format.formats import is_different_from_last_time
 from ssb_utdanning.format.formats import store_format_prod
 from write_test_formats import write_test_formats
 
 
 def mock_is_different_from_last_time(
-    format_name: str, format_content: UtdFormat
+    format_name: str,
+    format_content: UtdFormat,
+    path_prod: Path | None = None,
+    manifest: dict[str, list[list[str]]] | None = None,
 ) -> bool:
     path = Path(os.getcwd()) / "test_formats"
-    files = os.listdir(path)
+    files = [file for file in os.listdir(path) if not file.startswith(".")]
     if not len(files):
         return True
     split_files = [files[i].split("_") for i in range(len(files))]
@@ -55,7 +59,7 @@ class TestStoreFormat(unittest.TestCase):
         )
 
     def shortname_files_in_path(self) -> list[str]:
-        files = os.listdir(self.path)
+        files = [file for file in os.listdir(self.path) if not file.startswith(".")]
         split_files = [files[i].split("_") for i in range(len(files))]
         if len(files):
             shortnames = list(np.array((split_files))[:, 0])
@@ -114,6 +118,15 @@ class TestStoreFormat(unittest.TestCase):
         n_file_files = len(shortnames)
         assert n_file_files == 3
 
+    def test_is_different_from_last_time(self) -> None:
+        store_format_prod({"file": UtdFormat({"1": "en", "2": "to"})}, self.path)
+        # The same content, with int-keys and in another order, is not different
+        assert not is_different_from_last_time(
+            "file", UtdFormat({2: "to", 1: "en"}), self.path
+        )
+        assert is_different_from_last_time("file", UtdFormat({"1": "én"}), self.path)
+        assert is_different_from_last_time("another", UtdFormat({"1": "en"}), self.path)
+
     def tearDown(self) -> None:
         # Clean up test files and folders after tests
         shutil.rmtree(self.path, ignore_errors=True)
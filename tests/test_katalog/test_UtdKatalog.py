@@ -2,6 +2,7 @@ from ssb_utdanning import UtdKatalog
 from ssb_utdanning import UtdData
 import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 import os
 import unittest
 from pathlib import Path
@@ -34,6 +35,35 @@ class TestUtdKatalog(unittest.TestCase):
         self.assertIsInstance(katalog, UtdKatalog)
         self.assertIsInstance(katalog.key_cols, list)
 
+    def test_init_columns(self):
+        katalog = UtdKatalog(
+            key_cols="ident",
+            path=self.katalog_path,
+            columns=["age"],
+            filters=[("age", "<", 30)],
+        )
+        self.assertEqual(list(katalog.data.columns), ["ident", "age"])
+        self.assertTrue((katalog.data["age"] < 30).all())
+
+    def test_save_sorted(self):
+        katalog = UtdKatalog(key_cols="ident", path=self.katalog_path)
+        katalog.save(save_metadata=False, row_group_size=100)
+        saved = pq.ParquetFile(katalog.path)
+        assert saved.metadata.num_row_groups == -(-len(katalog.data) // 100)
+        first_group = saved.metadata.row_group(0)
+        assert first_group.column(0).compression == "ZSTD"
+        # Sorted, so the row groups cover separate ranges of the key
+        assert (
+            first_group.column(0).statistics.max
+            <= saved.metadata.row_group(1).column(0).statistics.min
+        )
+        df = pd.read_parquet(katalog.path)
+        assert df["ident"].is_monotonic_increasing
+        pd.testing.assert_frame_equal(
+            df,
+            katalog.data.sort_values("ident", kind="stable", ignore_index=True),
+        )
+
     def test_merge_on(self):
         katalog = UtdKatalog(key_cols=["ident"], path=self.katalog_path)
         data = UtdData(path=self.data_path)
@@ -74,6 +104,20 @@ class TestUtdKatalog(unittest.TestCase):
         self.assertIn("data_sex", data.data.columns)
         self.assertEqual(len(data.data), data_n)
 
+    def test_apply_format_categorical(self):
+        katalog = UtdKatalog(key_cols=["ident"], path=self.katalog_path)
+        data = UtdData(path=self.data_path)
+        df_obj = data.data.copy()
+        df_cat = data.data.copy()
+        df_cat["ident"] = df_cat["ident"].astype("category")
+        df_cat.loc[0, "ident"] = np.nan
+        df_obj.loc[0, "ident"] = np.nan
+
+        expected = katalog.apply_format(df_obj, catalog_col_name="age")
+        result = katalog.apply_format(df_cat, catalog_col_name="age")
+        self.assertIsInstance(result["age"].dtype, pd.CategoricalDtype)
+        pd.testing.assert_series_equal(result["age"], expected["age"])
+
     def tearDown(self):
         # Clean up test files and folders after tests
         shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,70 @@
+import os
+import shutil
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from ssb_utdanning.paths import version_index
+from ssb_utdanning.paths.version_index import clear_version_index_cache
+from ssb_utdanning.paths.version_index import latest_version_path
+from ssb_utdanning.paths.version_index import read_version_index
+from ssb_utdanning.paths.version_index import similar_paths
+
+
+class TestVersionIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        template_dir = Path(os.getcwd())
+        self.folder_path = template_dir / "mock_version_index"
+        self.tearDown()
+        os.makedirs(self.folder_path, exist_ok=True)
+        clear_version_index_cache()
+        for filename in [
+            "data_p2024_v1.parquet",
+            "data_p2024_v2.parquet",
+            "data_p2024_v10.parquet",
+            "data_p2024_v1.sas7bdat",
+            "data_p2024_v1__DOC.json",
+            "other_p2024_v3.parquet",
+            "README",
+        ]:
+            (self.folder_path / filename).touch()
+        # Old enough to be kept in memory
+        os.utime(self.folder_path, ns=(0, 10**9))
+
+    def test_versions_sorted_by_number(self) -> None:
+        paths = similar_paths(self.folder_path / "data_p2024_v1.parquet")
+        assert [Path(path).name for path in paths] == [
+            "data_p2024_v1.parquet",
+            "data_p2024_v2.parquet",
+            "data_p2024_v10.parquet",
+        ]
+        assert latest_version_path(self.folder_path / "data_p2024_v99.parquet") == str(
+            self.folder_path / "data_p2024_v10.parquet"
+        )
+        with self.assertRaises(FileNotFoundError):
+            latest_version_path(self.folder_path / "missing_p2024_v1.parquet")
+
+    def test_scanned_once(self) -> None:
+        with mock.patch(
+            "ssb_utdanning.paths.version_index.os.scandir", wraps=os.scandir
+        ) as scandir:
+            read_version_index(self.folder_path)
+            similar_paths(self.folder_path / "data_p2024_v1.parquet")
+            latest_version_path(self.folder_path / "other_p2024_v1.parquet")
+        scandir.assert_called_once()
+
+    def test_rescanned_when_folder_changes(self) -> None:
+        read_version_index(self.folder_path)
+        (self.folder_path / "data_p2024_v11.parquet").touch()
+        os.utime(self.folder_path, ns=(0, 2 * 10**9))
+        assert latest_version_path(self.folder_path / "data_p2024_v1.parquet") == str(
+            self.folder_path / "data_p2024_v11.parquet"
+        )
+
+    def test_recently_changed_not_kept(self) -> None:
+        os.utime(self.folder_path)
+        read_version_index(self.folder_path)
+        assert str(self.folder_path) not in version_index._indexes
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.folder_path, ignore_errors=True)